@@ -0,0 +1,103 @@
+import asyncio
+import inspect
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Set,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_unordered(
+    func: Union[Callable[[T], Awaitable[R]], Callable[[T], R]],
+    items: Iterable[T],
+    concurrency: int,
+) -> Any:
+    """
+    Applies a function to every item with at most `concurrency` calls in flight,
+    yielding the results in the order they complete.
+
+    The sync API is generated from the async one, so the same
+    `async for result in map_unordered(...)` becomes a plain `for` loop there. Sync
+    Playwright objects can't be used from several threads, so synchronous functions
+    are applied one item at a time.
+
+    The items are consumed lazily, so they can be an iterator that is extended while
+    the results are consumed.
+
+    Args:
+        func (Union[Callable[[T], Awaitable[R]], Callable[[T], R]]): The function to apply.
+        items (Iterable[T]): The items to apply it to.
+        concurrency (int): The maximum number of calls running at once.
+
+    Returns:
+        Any: An async iterator of the results for a coroutine function, an iterator otherwise.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    if inspect.iscoroutinefunction(func):
+        return _map_unordered_async(func, items, concurrency)
+    return _map_sequential(func, items)
+
+
+def get_concurrency(func: Callable[..., Any], concurrency: int) -> int:
+    """
+    Gets the number of calls `map_unordered` will actually run at once, e.g. to size a
+    pool of resources shared by the calls.
+
+    Args:
+        func (Callable[..., Any]): The function that will be applied.
+        concurrency (int): The requested concurrency.
+
+    Returns:
+        int: `concurrency` for a coroutine function, 1 otherwise.
+    """
+    return concurrency if inspect.iscoroutinefunction(func) else 1
+
+
+async def _map_unordered_async(
+    func: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int
+) -> AsyncIterator[R]:
+    remaining = iter(items)
+    pending: Set["asyncio.Future[R]"] = set()
+
+    def schedule() -> None:
+        while len(pending) < concurrency:
+            item = next(remaining, _DONE)
+            if item is _DONE:
+                return
+            pending.add(asyncio.ensure_future(func(item)))  # type: ignore
+
+    try:
+        schedule()
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+            schedule()
+            for task in done:
+                yield task.result()
+            # The items can be added to while the results are consumed, e.g. by a crawler
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+
+def _map_sequential(func: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+    for item in items:
+        yield func(item)
+
+
+_DONE = object()
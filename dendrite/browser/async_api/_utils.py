@@ -1,23 +1,184 @@
+import asyncio
 import inspect
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
 
 import tldextract
 from bs4 import BeautifulSoup
 from loguru import logger
-from playwright.async_api import Error, Frame
+from playwright.async_api import CDPSession, Error, Frame
 from pydantic import BaseModel
 
+from dendrite.models.dto.cached_result_dto import CachedResultDTO, ResultOperation
 from dendrite.models.selector import Selector
 
 from .dendrite_element import AsyncElement
 from .types import PlaywrightPage, TypeSpec
 
 if TYPE_CHECKING:
+    from dendrite.logic import AsyncLogicEngine
+
     from .dendrite_page import AsyncPage
 
+from dendrite.logic.dom.selector_variants import XPATH_PREFIX
+from dendrite.logic.dom.snapshot import snapshot_to_soup
 from dendrite.logic.dom.strip import mild_strip_in_place
 
-from .js import GENERATE_DENDRITE_IDS_IFRAME_SCRIPT
+from .js import (
+    GENERATE_DENDRITE_IDS_IFRAME_SCRIPT,
+    IS_UNREACHABLE_FRAME_SCRIPT,
+    QUERY_SELECTORS_SCRIPT,
+)
+
+
+async def _attempt_with_backoff_helper(
+    operation_name: str,
+    operation: Callable,
+    timeout: float,
+    backoff_intervals: List[float] = [0.15, 0.45, 1.0, 2.0, 4.0, 8.0],
+) -> Optional[Any]:
+    """
+    Generic helper function that implements exponential backoff for operations.
+
+    Args:
+        operation_name: Name of the operation for logging
+        operation: Async function to execute
+        timeout: Maximum time to spend attempting the operation
+        backoff_intervals: List of timeouts between attempts
+
+    Returns:
+        The result of the operation if successful, None otherwise
+    """
+    total_elapsed_time = 0
+    start_time = time.time()
+
+    for i, current_timeout in enumerate(backoff_intervals):
+        if total_elapsed_time >= timeout:
+            logger.error(f"Timeout reached after {total_elapsed_time:.2f} seconds")
+            return None
+
+        request_start_time = time.time()
+        result = await operation()
+        request_duration = time.time() - request_start_time
+
+        if result:
+            return result
+
+        sleep_duration = max(0, current_timeout - request_duration)
+        logger.info(
+            f"{operation_name} attempt {i+1} failed. Sleeping for {sleep_duration:.2f} seconds"
+        )
+        await asyncio.sleep(sleep_duration)
+        total_elapsed_time = time.time() - start_time
+
+    logger.error(
+        f"All {operation_name} attempts failed after {total_elapsed_time:.2f} seconds"
+    )
+    return None
+
+
+async def _attempt_on_dom_change_helper(
+    page: "AsyncPage",
+    operation_name: str,
+    operation: Callable,
+    timeout: float,
+    min_intervals: List[float] = [0.15, 0.45, 1.0, 2.0, 4.0, 8.0],
+    max_attempts: int = 6,
+) -> Optional[Any]:
+    """
+    Generic helper function that retries an operation whenever the page changes.
+
+    Instead of sleeping on a fixed schedule, a failed attempt waits until the DOM is mutated
+    or the page navigates, so a retry happens as soon as new content renders and never runs
+    against a page it already failed on. Attempts are still spaced by at least
+    `min_intervals`, so a page that mutates constantly isn't retried in a tight loop.
+
+    Args:
+        page: The page whose changes trigger the retries
+        operation_name: Name of the operation for logging
+        operation: Async function to execute
+        timeout: Maximum time to spend attempting the operation
+        min_intervals: List of minimum times between the starts of consecutive attempts
+        max_attempts: Maximum number of attempts
+
+    Returns:
+        The result of the operation if successful, None otherwise
+    """
+    start_time = time.time()
+    attempt = 1
+
+    while True:
+        attempt_start = time.time()
+        dom_version = await page._get_dom_version()
+        result = await operation()
+
+        if result:
+            return result
+
+        remaining = timeout - (time.time() - start_time)
+        if remaining <= 0 or attempt >= max_attempts:
+            break
+
+        logger.info(
+            f"{operation_name} attempt {attempt} failed. Waiting up to {remaining:.2f} seconds for the page to change"
+        )
+        if not await page._wait_for_dom_change(dom_version, remaining):
+            break
+
+        min_interval = min_intervals[min(attempt, len(min_intervals)) - 1]
+        sleep_duration = min(
+            min_interval - (time.time() - attempt_start),
+            timeout - (time.time() - start_time),
+        )
+        if sleep_duration > 0:
+            await asyncio.sleep(sleep_duration)
+        attempt += 1
+
+    logger.error(
+        f"All {operation_name} attempts failed after {time.time() - start_time:.2f} seconds"
+    )
+    return None
+
+
+async def get_result_cache_dto(
+    page: "AsyncPage",
+    operation: ResultOperation,
+    prompt: str,
+    json_schema: Optional[Dict[str, Any]],
+) -> Optional[CachedResultDTO]:
+    """
+    Creates the key of a result in the result cache from the current content of the page.
+
+    Returns:
+        Optional[CachedResultDTO]: The key without the result, or None if the content couldn't be read.
+    """
+    fingerprint = await page._get_content_fingerprint()
+    if fingerprint is None:
+        return None
+    return CachedResultDTO(
+        url=page.url,
+        operation=operation,
+        prompt=prompt,
+        dom_fingerprint=fingerprint,
+        return_data_json_schema=json_schema,
+    )
+
+
+async def cache_result_if_unchanged(
+    page: "AsyncPage",
+    logic_engine: "AsyncLogicEngine",
+    result_dto: CachedResultDTO,
+    return_data: Any,
+) -> None:
+    """
+    Stores a result in the result cache, unless the page changed while it was computed
+    and the result might not match the content it is keyed by.
+    """
+    if await page._get_content_fingerprint() != result_dto.dom_fingerprint:
+        return
+    result_dto.return_data = return_data
+    await logic_engine.cache_result(result_dto)
 
 
 def get_domain_w_suffix(url: str) -> str:
@@ -28,23 +189,25 @@ def get_domain_w_suffix(url: str) -> str:
     return f"{parsed_url.domain}.{parsed_url.suffix}"
 
 
+async def get_iframe_path(frame: Frame) -> Optional[str]:
+    """Gets the `iframe-path` of a frame, None if one of its iframes has no d-id yet."""
+    path_parts = []
+    current_frame = frame
+    while current_frame.parent_frame is not None:
+        iframe_element = await current_frame.frame_element()
+        iframe_id = await iframe_element.get_attribute("d-id")
+        if iframe_id is None:
+            # If any iframe_id in the path is None, we cannot build the path
+            return None
+        path_parts.insert(0, iframe_id)
+        current_frame = current_frame.parent_frame
+    return "|".join(path_parts)
+
+
 async def expand_iframes(
     page: PlaywrightPage,
     page_soup: BeautifulSoup,
 ):
-    async def get_iframe_path(frame: Frame):
-        path_parts = []
-        current_frame = frame
-        while current_frame.parent_frame is not None:
-            iframe_element = await current_frame.frame_element()
-            iframe_id = await iframe_element.get_attribute("d-id")
-            if iframe_id is None:
-                # If any iframe_id in the path is None, we cannot build the path
-                return None
-            path_parts.insert(0, iframe_id)
-            current_frame = current_frame.parent_frame
-        return "|".join(path_parts)
-
     for frame in page.frames:
         if frame.parent_frame is None:
             continue  # Skip the main frame
@@ -61,6 +224,10 @@ async def expand_iframes(
         if iframe_path is None:
             continue
 
+        # The iframe was already expanded, e.g. by the CDP snapshot, or isn't in the soup
+        if page_soup.find("iframe", {"d-id": iframe_id}) is None:
+            continue
+
         try:
             await frame.evaluate(
                 GENERATE_DENDRITE_IDS_IFRAME_SCRIPT, {"frame_path": iframe_path}
@@ -73,6 +240,17 @@ async def expand_iframes(
             continue
 
 
+async def capture_dom_snapshot(cdp_session: CDPSession) -> BeautifulSoup:
+    """
+    Captures the DOM of the main frame and all same-process iframes with a single
+    `DOMSnapshot.captureSnapshot` call. The d-ids must already be generated in all frames.
+    """
+    snapshot = await cdp_session.send(
+        "DOMSnapshot.captureSnapshot", {"computedStyles": []}
+    )
+    return snapshot_to_soup(snapshot)
+
+
 def merge_iframe_to_page(
     iframe_id: str,
     page: BeautifulSoup,
@@ -91,18 +269,20 @@ async def _get_all_elements_from_selector_soup(
 ) -> List[AsyncElement]:
     dendrite_elements: List[AsyncElement] = []
 
+    if selector.startswith(XPATH_PREFIX):
+        # XPath variants can only be matched in the browser
+        return dendrite_elements
+
     elements = soup.select(selector)
 
     for element in elements:
-        frame = page._get_context(element)
         d_id = element.get("d-id", "")
-        locator = frame.locator(f"xpath=//*[@d-id='{d_id}']")
-
         if not d_id:
             continue
 
         if isinstance(d_id, list):
             d_id = d_id[0]
+        locator = page._get_element_locator(d_id, page._get_iframe_path(element))
         dendrite_elements.append(
             AsyncElement(d_id, locator, page.dendrite_browser, page._browser_api_client)
         )
@@ -110,6 +290,141 @@ async def _get_all_elements_from_selector_soup(
     return dendrite_elements
 
 
+async def query_selectors_in_page(
+    page: "AsyncPage", selectors: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Generates the d-ids and runs `querySelectorAll` for every selector in the main frame
+    and its same-origin iframes, in a single script evaluation. Selectors prefixed with
+    "xpath=" are evaluated as XPath expressions.
+
+    Iframes whose document can't be reached from the main frame, e.g. cross-origin ones,
+    are queried with one more evaluation each, like `expand_iframes` captures them.
+
+    Args:
+        page (AsyncPage): The page to query.
+        selectors (List[str]): The CSS or XPath selectors to test.
+
+    Returns:
+        List[Dict[str, Any]]: For each selector, its match count and the d-id and iframe
+            path of every match, or the error if the browser rejected the selector.
+    """
+    await page._generate_dendrite_ids(all_frames=True)
+    response = await page.playwright_page.evaluate(
+        QUERY_SELECTORS_SCRIPT, {"selectors": selectors, "frameOnly": False}
+    )
+    results: List[Dict[str, Any]] = response["results"]
+    if response["unreachable_frames"] == 0:
+        return results
+
+    for frame in page.playwright_page.frames:
+        if frame.parent_frame is None:
+            continue  # Skip the main frame
+
+        frame_results = await _query_selectors_in_unreachable_frame(frame, selectors)
+        if frame_results is None:
+            continue
+
+        for result, frame_result in zip(results, frame_results):
+            if "error" in result:
+                continue
+            if "error" in frame_result:
+                result.update(count=0, matches=[], error=frame_result["error"])
+                continue
+            result["matches"].extend(frame_result["matches"])
+            result["count"] += frame_result["count"]
+
+    return results
+
+
+async def _query_selectors_in_unreachable_frame(
+    frame: Frame, selectors: List[str]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Queries the selectors in the document of a frame that the query of the main frame
+    couldn't reach, generating its d-ids first.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: The results of the selectors in the frame, or None
+            if the frame was already queried from the main frame or couldn't be queried.
+    """
+    try:
+        if not await frame.evaluate(IS_UNREACHABLE_FRAME_SCRIPT):
+            return None
+
+        iframe_path = await get_iframe_path(frame)
+        if iframe_path is None:
+            return None
+
+        await frame.evaluate(
+            GENERATE_DENDRITE_IDS_IFRAME_SCRIPT, {"frame_path": iframe_path}
+        )
+        response = await frame.evaluate(
+            QUERY_SELECTORS_SCRIPT, {"selectors": selectors, "frameOnly": True}
+        )
+        return response["results"]
+    except Error:
+        # The frame detached or navigated while it was queried
+        return None
+
+
+def get_matching_selector(results: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Gets the most recent selector with any match from `query_selectors_in_page`,
+    i.e. the one `elements_from_query_results` returns the elements of.
+
+    Args:
+        results (List[Dict[str, Any]]): The results of the selectors, oldest first.
+
+    Returns:
+        Optional[str]: The matching selector, or None if no selector matched.
+    """
+    for result in reversed(results):
+        if "error" not in result and result["count"] > 0:
+            return result["selector"]
+    return None
+
+
+def elements_from_query_results(
+    page: "AsyncPage", results: List[Dict[str, Any]], only_one: bool
+) -> Union[Optional[AsyncElement], List[AsyncElement]]:
+    """
+    Gets the elements of the most recent selector with any match from `query_selectors_in_page`.
+
+    Args:
+        page (AsyncPage): The queried page.
+        results (List[Dict[str, Any]]): The results of the selectors, oldest first.
+        only_one (bool): Whether to return only the first matching element.
+
+    Returns:
+        Union[Optional[AsyncElement], List[AsyncElement]]: The matched elements, or None.
+    """
+    for result in reversed(results):
+        if "error" in result:
+            logger.debug(
+                f"Selector '{result['selector']}' failed in the browser: {result['error']}"
+            )
+            continue
+
+        dendrite_elements: List[AsyncElement] = []
+        for match in result["matches"]:
+            d_id = match["d_id"]
+            locator = page._get_element_locator(d_id, match["iframe_path"])
+            dendrite_elements.append(
+                AsyncElement(
+                    d_id, locator, page.dendrite_browser, page._browser_api_client
+                )
+            )
+
+        if len(dendrite_elements) > 0:
+            logger.debug(
+                f"Selector '{result['selector']}' matched {result['count']} elements"
+            )
+            return dendrite_elements[0] if only_one else dendrite_elements
+
+    return None
+
+
 async def get_elements_from_selectors_soup(
     page: "AsyncPage",
     soup: BeautifulSoup,
@@ -132,6 +447,37 @@ def to_json_schema(type_spec: TypeSpec) -> Dict[str, Any]:
     if isinstance(type_spec, dict):
         # Assume it's already a JSON schema
         return type_spec
+    return _type_to_json_schema(type_spec)
+
+
+def to_list_json_schema(item_type: Optional[TypeSpec]) -> Dict[str, Any]:
+    """
+    Creates the JSON schema of a list of items, e.g. for `extract_iter`.
+
+    The definitions of a Pydantic model's schema are referenced from its root, so they
+    are moved to the root of the list schema.
+
+    Args:
+        item_type (Optional[TypeSpec]): The type of the items, or None for any items.
+
+    Returns:
+        Dict[str, Any]: The JSON schema of the list.
+    """
+    if item_type is None:
+        return {"type": "array"}
+
+    items = dict(to_json_schema(item_type))
+    schema: Dict[str, Any] = {"type": "array"}
+    if "$defs" in items:
+        schema["$defs"] = items.pop("$defs")
+    schema["items"] = items
+    return schema
+
+
+# Generating the schema of a Pydantic model is slow, so it is done once per type.
+# The returned schemas are shared and must not be modified.
+@lru_cache(maxsize=128)
+def _type_to_json_schema(type_spec: TypeSpec) -> Dict[str, Any]:
     if inspect.isclass(type_spec) and issubclass(type_spec, BaseModel):
         # Convert Pydantic model to JSON schema
         return type_spec.model_json_schema()
@@ -52,9 +52,10 @@ def perform_action(interaction_type: Interaction):
                 return InteractionResponse(status="success", message="")
 
             page_before = await self._dendrite_browser.get_active_page()
-            page_before_info = await page_before.get_page_information()
-            soup = await page_before._get_previous_soup()
-            screenshot_before = page_before_info.screenshot_base64
+            soup = await page_before._get_soup()
+            screenshot_before = (
+                await page_before.screenshot_manager.take_full_page_screenshot()
+            )
             tag_name = soup.find(attrs={"d-id": self.dendrite_id})
             # Call the original method here
             await func(
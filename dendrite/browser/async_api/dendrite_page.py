@@ -2,17 +2,42 @@ import asyncio
 import pathlib
 import re
 import time
-from typing import TYPE_CHECKING, Any, List, Literal, Optional, Sequence, Union
+from hashlib import sha256
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from bs4 import BeautifulSoup, Tag
 from loguru import logger
-from playwright.async_api import Download, FilePayload, FrameLocator, Keyboard
+from playwright.async_api import (
+    CDPSession,
+    Download,
+    Error,
+    FilePayload,
+    FrameLocator,
+    Keyboard,
+    Locator,
+)
 
 from dendrite.logic import AsyncLogicEngine
 from dendrite.models.page_information import PageInformation
 
 from .dendrite_element import AsyncElement
-from .js import GENERATE_DENDRITE_IDS_SCRIPT
+from .js import (
+    DOM_VERSION_SCRIPT,
+    GENERATE_DENDRITE_IDS_ALL_FRAMES_SCRIPT,
+    GENERATE_DENDRITE_IDS_SCRIPT,
+    VISIBILITY_VERSION_SCRIPT,
+    WAIT_FOR_DOM_CHANGE_SCRIPT,
+)
 from .mixin.ask import AskMixin
 from .mixin.click import ClickMixin
 from .mixin.extract import ExtractionMixin
@@ -28,9 +53,23 @@ if TYPE_CHECKING:
 
 from dendrite.browser._common._exceptions.dendrite_exception import DendriteException
 
-from ._utils import expand_iframes
+from ._utils import capture_dom_snapshot, expand_iframes
 from .manager.screenshot_manager import ScreenshotManager
 
+# Mutations in iframes aren't observed from the main frame, so their DOM versions are
+# compared at least this often (in seconds) while waiting for the page to change.
+DOM_CHANGE_CHECK_INTERVAL = 1.0
+
+# When the DOM version can't be read, e.g. while a frame detaches, whether the page changed
+# is unknown, so the wait lasts this long (in seconds) instead of ending right away.
+UNKNOWN_DOM_VERSION_WAIT = 0.5
+
+# The attributes set by the d-id scripts, which don't change the content of a page
+DENDRITE_ATTRIBUTES_PATTERN = re.compile(r'\s(?:d-id|data-hidden|iframe-path)="[^"]*"')
+
+# The element locators are dropped past this size, e.g. on single page apps that never navigate
+MAX_CACHED_LOCATORS = 10000
+
 
 class AsyncPage(
     MarkdownMixin,
@@ -61,6 +100,13 @@ class AsyncPage(
         self._last_main_frame_url = page.url
         self._last_frame_navigated_timestamp = time.time()
         self._dendrite_browser = dendrite_browser
+        self._cdp_session: Optional[CDPSession] = None
+        self._previous_soup: Optional[BeautifulSoup] = None
+        self._previous_raw_html: Optional[str] = None
+        self._previous_dom_version: Optional[str] = None
+        self._previous_visibility_version: Optional[str] = None
+        self._content_fingerprint: Optional[str] = None
+        self._element_locators: Dict[Tuple[Optional[str], str], Locator] = {}
 
         self.playwright_page.on("framenavigated", self._on_frame_navigated)
 
@@ -68,6 +114,7 @@ class AsyncPage(
         if frame is self.playwright_page.main_frame:
             self._last_main_frame_url = frame.url
             self._last_frame_navigated_timestamp = time.time()
+            self._element_locators.clear()
 
     @property
     def dendrite_browser(self) -> "AsyncDendrite":
@@ -149,17 +196,67 @@ class AsyncPage(
             Union[Page, FrameLocator]: The context for the element.
         """
 
-        context = self.playwright_page
-
         if isinstance(element, Tag):
-            full_path = element.get("iframe-path")
+            full_path = self._get_iframe_path(element)
             if full_path:
-                full_path = full_path[0] if isinstance(full_path, list) else full_path
-                for path in full_path.split("|"):
-                    context = context.frame_locator(f"xpath=//iframe[@d-id='{path}']")
+                return self._get_frame_context(full_path)
+
+        return self.playwright_page
+
+    @staticmethod
+    def _get_iframe_path(element: Tag) -> Optional[str]:
+        """Gets the `iframe-path` of an element from the soup, None for the main frame."""
+        full_path = element.get("iframe-path")
+        if isinstance(full_path, list):
+            full_path = full_path[0]
+        return full_path or None
+
+    def _get_frame_context(
+        self, iframe_path: Optional[str]
+    ) -> Union[PlaywrightPage, FrameLocator]:
+        """
+        Gets the context for an `iframe-path`, i.e. the d-ids of the nested iframes joined by "|".
+
+        Args:
+            iframe_path (Optional[str]): The iframe path of the element, None for the main frame.
+
+        Returns:
+            Union[Page, FrameLocator]: The context for the iframe path.
+        """
+
+        context = self.playwright_page
+
+        if iframe_path:
+            for path in iframe_path.split("|"):
+                context = context.frame_locator(f'iframe[d-id="{path}"]')
 
         return context
 
+    def _get_element_locator(self, d_id: str, iframe_path: Optional[str]) -> Locator:
+        """
+        Gets the locator of the element with a d-id.
+
+        The locator uses a CSS attribute selector, which the browser matches natively
+        instead of scanning the whole document with XPath on every action. Locators are
+        reused until the main frame navigates.
+
+        Args:
+            d_id (str): The d-id of the element.
+            iframe_path (Optional[str]): The iframe path of the element, None for the main frame.
+
+        Returns:
+            Locator: The locator of the element.
+        """
+        key = (iframe_path, d_id)
+        locator = self._element_locators.get(key)
+        if locator is None:
+            if len(self._element_locators) >= MAX_CACHED_LOCATORS:
+                self._element_locators.clear()
+            frame = self._get_frame_context(iframe_path)
+            locator = frame.locator(f'[d-id="{d_id}"]')
+            self._element_locators[key] = locator
+        return locator
+
     async def scroll_to_bottom(
         self,
         timeout: float = 30000,
@@ -235,38 +332,52 @@ class AsyncPage(
         """
         Retrieves information about the current page, including the URL, raw HTML, and a screenshot.
 
+        The full page screenshot is deferred until it's first read with `PageInformation.get_screenshot`,
+        so consumers that only need the HTML never pay for it.
+
+        Args:
+            include_screenshot (bool): Whether a screenshot can be taken for this page information.
+                Call sites that never read the screenshot should pass False. Defaults to True.
+
         Returns:
             PageInformation: An object containing the page's URL, raw HTML, and a screenshot in base64 format.
         """
 
-        if include_screenshot:
-            base64 = await self.screenshot_manager.take_full_page_screenshot()
-        else:
-            base64 = "No screenshot available"
-
-        soup = await self._get_soup()
-
-        return PageInformation(
+        page_information = PageInformation(
             url=self.playwright_page.url,
-            raw_html=str(soup),
-            screenshot_base64=base64,
+            raw_html=await self._get_raw_html(),
             time_since_frame_navigated=self.get_time_since_last_frame_navigated(),
         )
+        if include_screenshot:
+            page_information.defer_screenshot(
+                self.screenshot_manager.take_full_page_screenshot
+            )
 
-    async def _generate_dendrite_ids(self):
+        return page_information
+
+    async def _generate_dendrite_ids(self, all_frames: bool = False):
         """
         Attempts to generate Dendrite IDs in the DOM by executing a script.
 
         This method will attempt to generate the Dendrite IDs up to 3 times. If all attempts fail,
         an exception is raised.
 
+        Args:
+            all_frames (bool): Whether to also generate the IDs in all same-origin iframes
+                within the same script evaluation. Defaults to False.
+
         Raises:
             Exception: If the Dendrite IDs could not be generated after 3 attempts.
         """
+        script = (
+            GENERATE_DENDRITE_IDS_ALL_FRAMES_SCRIPT
+            if all_frames
+            else GENERATE_DENDRITE_IDS_SCRIPT
+        )
         tries = 0
         while tries < 3:
             try:
-                await self.playwright_page.evaluate(GENERATE_DENDRITE_IDS_SCRIPT)
+                await self.playwright_page.evaluate(script)
                 return
             except Exception as e:
                 await self.playwright_page.wait_for_load_state(
@@ -329,17 +440,179 @@ class AsyncPage(
         Retrieves the page source as a BeautifulSoup object, with an option to exclude hidden elements.
         Generates Dendrite IDs in the DOM and expands iframes.
 
+        If the browser's capture mode is "cdp_snapshot", the main frame and all same-process
+        iframes are captured with a single CDP `DOMSnapshot.captureSnapshot` call instead of
+        serializing each frame with `content()`. The iframes left out of the snapshot are
+        still expanded from their `content()`.
+
+        If no frame's DOM has changed since the previous call and the same elements are
+        hidden, the previous soup is returned without capturing the page again. The returned
+        soup should therefore not be modified.
+
         Returns:
             BeautifulSoup: The parsed HTML of the current page.
         """
-        await self._generate_dendrite_ids()
+        dom_version = await self._get_dom_version()
+        if (
+            dom_version is not None
+            and dom_version == self._previous_dom_version
+            and self._previous_soup is not None
+        ):
+            # The data-hidden marks of the soup are only valid while the same elements are hidden
+            visibility_version = await self._get_visibility_version()
+            if (
+                visibility_version is not None
+                and visibility_version == self._previous_visibility_version
+            ):
+                logger.debug("DOM hasn't changed since the last capture, reusing it")
+                return self._previous_soup
+
+        if self.dendrite_browser.capture_mode == "cdp_snapshot":
+            await self._generate_dendrite_ids(all_frames=True)
+            soup = await capture_dom_snapshot(await self._get_cdp_session())
+            # Cross-origin and out-of-process iframes are left out of the snapshot,
+            # so they are captured with `content()` like in the "content" mode
+            if soup.find("iframe") is not None:
+                await self._expand_iframes(soup)
+        else:
+            await self._generate_dendrite_ids()
 
-        page_source = await self.playwright_page.content()
-        soup = BeautifulSoup(page_source, "lxml")
-        await self._expand_iframes(soup)
+            page_source = await self.playwright_page.content()
+            soup = BeautifulSoup(page_source, "lxml")
+            await self._expand_iframes(soup)
         self._previous_soup = soup
+        self._previous_raw_html = None
+        self._content_fingerprint = None
+        self._previous_dom_version = dom_version
+        self._previous_visibility_version = await self._get_visibility_version()
         return soup
 
+    async def _get_raw_html(self) -> str:
+        """Gets the html of the soup from `_get_soup`, serialized once per capture."""
+        soup = await self._get_soup()
+        if self._previous_raw_html is None:
+            self._previous_raw_html = str(soup)
+        return self._previous_raw_html
+
+    async def _get_dom_version(self) -> Optional[str]:
+        """
+        Gets a version of the DOM in all frames that changes whenever any of them is mutated
+        or navigated. Mutations made by the d-id scripts don't change the version.
+
+        Returns:
+            Optional[str]: The DOM version, or None if it couldn't be read from every frame.
+        """
+        versions: List[str] = []
+        for frame in self.playwright_page.frames:
+            try:
+                versions.append(await frame.evaluate(DOM_VERSION_SCRIPT))
+            except Error:
+                return None
+        return "|".join(versions)
+
+    async def _get_visibility_version(self) -> Optional[str]:
+        """
+        Gets a version of which elements are hidden in all frames. It can change without
+        any DOM mutation, e.g. on hover, when the viewport matches another media query or
+        when an animation ends, so it isn't part of `_get_dom_version`.
+
+        Returns:
+            Optional[str]: The visibility version, or None if it couldn't be read from every frame.
+        """
+        versions: List[str] = []
+        for frame in self.playwright_page.frames:
+            try:
+                versions.append(await frame.evaluate(VISIBILITY_VERSION_SCRIPT))
+            except Error:
+                return None
+        return "|".join(versions)
+
+    async def _get_content_fingerprint(self) -> Optional[str]:
+        """
+        Gets a hash of the html of all frames, which only changes with the content of the
+        page, e.g. it stays the same when an unchanged page is reloaded. The attributes set
+        by the d-id scripts are ignored.
+
+        The hash is taken of the capture from `_get_soup`, so the page isn't serialized
+        again for it, and is reused until the page is captured again.
+
+        Returns:
+            Optional[str]: The fingerprint, or None if the page couldn't be captured.
+        """
+        try:
+            raw_html = await self._get_raw_html()
+        except Error:
+            return None
+
+        if self._content_fingerprint is None:
+            content = DENDRITE_ATTRIBUTES_PATTERN.sub("", raw_html)
+            self._content_fingerprint = sha256(content.encode("utf-8")).hexdigest()
+        return self._content_fingerprint
+
+    async def _wait_for_dom_change(
+        self, dom_version: Optional[str], timeout: float
+    ) -> bool:
+        """
+        Waits until the DOM differs from the given version, the page navigates or the timeout is reached.
+
+        Mutations of the main frame are observed in the browser and end the wait right away,
+        while iframes are checked against `dom_version` every `DOM_CHANGE_CHECK_INTERVAL` seconds.
+        If either version is unknown, the wait ends after `UNKNOWN_DOM_VERSION_WAIT` seconds.
+
+        Args:
+            dom_version (Optional[str]): The version from `_get_dom_version` to wait for a change from.
+            timeout (float): The maximum time to wait in seconds.
+
+        Returns:
+            bool: True if the page changed, False if the timeout was reached first.
+        """
+        deadline = time.time() + timeout
+
+        while True:
+            current_version = await self._get_dom_version()
+            if current_version is None or dom_version is None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                await asyncio.sleep(min(remaining, UNKNOWN_DOM_VERSION_WAIT))
+                return True
+            if current_version != dom_version:
+                return True
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+
+            try:
+                await self.playwright_page.evaluate(
+                    WAIT_FOR_DOM_CHANGE_SCRIPT,
+                    min(remaining, DOM_CHANGE_CHECK_INTERVAL) * 1000,
+                )
+            except Error:
+                # The execution context was destroyed, i.e. the main frame navigated
+                remaining = deadline - time.time()
+                if remaining > 0:
+                    try:
+                        await self.playwright_page.wait_for_load_state(
+                            "domcontentloaded", timeout=remaining * 1000
+                        )
+                    except Error:
+                        pass
+                return True
+
+    async def _get_cdp_session(self) -> CDPSession:
+        """
+        Gets the Chrome DevTools Protocol session for this page, creating it on first use.
+
+        Returns:
+            CDPSession: The CDP session attached to the page.
+        """
+        if self._cdp_session is None:
+            self._cdp_session = await self.playwright_page.context.new_cdp_session(
+                self.playwright_page
+            )
+        return self._cdp_session
+
     async def _get_previous_soup(self) -> BeautifulSoup:
         """
         Retrieves the page source generated by the latest _get_soup() call as a Beautiful soup object. If it hasn't been called yet, it will call it.
@@ -369,15 +642,13 @@ class AsyncPage(
         elements = soup.select(selector)
 
         for element in elements:
-            frame = self._get_context(element)
             d_id = element.get("d-id", "")
-            locator = frame.locator(f"xpath=//*[@d-id='{d_id}']")
-
             if not d_id:
                 continue
 
             if isinstance(d_id, list):
                 d_id = d_id[0]
+            locator = self._get_element_locator(d_id, self._get_iframe_path(element))
             dendrite_elements.append(
                 AsyncElement(
                     d_id, locator, self.dendrite_browser, self._browser_api_client
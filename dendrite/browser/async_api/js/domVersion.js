@@ -0,0 +1,27 @@
+() => {
+    // Counts DOM mutations in this document so unchanged pages can reuse their previous capture.
+    // Mutations of the attributes set by the d-id scripts are ignored.
+    if (window.__dendriteDomVersion === undefined) {
+        window.__dendriteDomVersion = 0;
+        const ignoredAttributes = new Set(["d-id", "data-hidden", "iframe-path"]);
+
+        const observer = new MutationObserver((mutations) => {
+            for (const mutation of mutations) {
+                if (mutation.type === "attributes" && ignoredAttributes.has(mutation.attributeName)) {
+                    continue;
+                }
+                window.__dendriteDomVersion++;
+                return;
+            }
+        });
+        observer.observe(document, {
+            subtree: true,
+            childList: true,
+            attributes: true,
+            characterData: true,
+        });
+    }
+
+    // timeOrigin is unique per document, so a reload doesn't reuse the previous document's version
+    return `${performance.timeOrigin}:${window.__dendriteDomVersion}`;
+}
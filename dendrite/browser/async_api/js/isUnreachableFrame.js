@@ -0,0 +1,16 @@
+() => {
+    // Whether the frame's document can't be reached from the top document through
+    // same-origin iframes, e.g. because the frame or one of its ancestors is cross-origin
+    let current = window;
+    try {
+        while (current !== current.top) {
+            if (!current.frameElement) {
+                return true;
+            }
+            current = current.parent;
+        }
+        return false;
+    } catch (error) {
+        return true;
+    }
+}
@@ -0,0 +1,14 @@
+() => {
+    // Hashes which elements of this document are hidden, checked like the data-hidden marks of the
+    // d-id scripts, since hover, media queries or finished animations can hide or reveal elements
+    // without any DOM mutation.
+    let hash = 0;
+    let index = 0;
+    for (const element of document.querySelectorAll("*")) {
+        if (!element.checkVisibility()) {
+            hash = ((hash << 5) - hash + index) | 0;
+        }
+        index++;
+    }
+    return `${index}:${hash}`;
+}
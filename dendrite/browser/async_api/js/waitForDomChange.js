@@ -0,0 +1,31 @@
+(timeout) => {
+    // Resolves with true on the first DOM mutation in this document, or false after the timeout.
+    // Mutations of the attributes set by the d-id scripts are ignored, like in domVersion.js.
+    return new Promise((resolve) => {
+        const ignoredAttributes = new Set(["d-id", "data-hidden", "iframe-path"]);
+        let timer = null;
+
+        const observer = new MutationObserver((mutations) => {
+            for (const mutation of mutations) {
+                if (mutation.type === "attributes" && ignoredAttributes.has(mutation.attributeName)) {
+                    continue;
+                }
+                observer.disconnect();
+                clearTimeout(timer);
+                resolve(true);
+                return;
+            }
+        });
+        observer.observe(document, {
+            subtree: true,
+            childList: true,
+            attributes: true,
+            characterData: true,
+        });
+
+        timer = setTimeout(() => {
+            observer.disconnect();
+            resolve(false);
+        }, timeout);
+    });
+}
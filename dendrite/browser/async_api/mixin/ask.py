@@ -5,7 +5,12 @@ from typing import Optional, Type, overload
 from loguru import logger
 
 from dendrite.browser._common._exceptions.dendrite_exception import DendriteException
-from dendrite.browser.async_api._utils import convert_to_type_spec, to_json_schema
+from dendrite.browser.async_api._utils import (
+    cache_result_if_unchanged,
+    convert_to_type_spec,
+    get_result_cache_dto,
+    to_json_schema,
+)
 from dendrite.models.dto.ask_page_dto import AskPageDTO
 
 from ..protocol.page_protocol import DendritePageProtocol
@@ -131,6 +136,19 @@ class AskMixin(DendritePageProtocol):
         Raises:
             DendriteException: If the request fails, the exception includes the failure message and a screenshot.
         """
+        schema = to_json_schema(type_spec) if type_spec else None
+
+        result_dto = None
+        if self.logic_engine.result_cache_enabled:
+            page = await self._get_page()
+            result_dto = await get_result_cache_dto(page, "ask", prompt, schema)
+            if result_dto is not None:
+                cached_data = await self.logic_engine.get_cached_result(result_dto)
+                if cached_data is not None:
+                    if type_spec is not None:
+                        return convert_to_type_spec(type_spec, cached_data)
+                    return cached_data
+
         start_time = time.time()
         attempt_start = start_time
         attempt = -1
@@ -166,8 +184,6 @@ class AskMixin(DendritePageProtocol):
             page = await self._get_page()
             page_information = await page.get_page_information()
 
-            schema = to_json_schema(type_spec) if type_spec else None
-
             if elapsed_time < 5:
                 time_prompt = f"This page was loaded {elapsed_time} seconds ago, so it might still be loading. If the page is still loading, return failed status."
             else:
@@ -195,6 +211,10 @@ class AskMixin(DendritePageProtocol):
                 if type_spec is not None:
                     converted_res = convert_to_type_spec(type_spec, res.return_data)
 
+                if result_dto is not None:
+                    await cache_result_if_unchanged(
+                        page, self.logic_engine, result_dto, res.return_data
+                    )
                 return converted_res
 
             except Exception as e:
@@ -204,5 +224,6 @@ class AskMixin(DendritePageProtocol):
 
         raise DendriteException(
             message=f"Failed to get response for '{prompt}' after {attempt + 1} attempts",
-            screenshot_base64=page_information.screenshot_base64,
+            screenshot_base64=page_information.screenshot_base64
+            or await page.screenshot_manager.take_full_page_screenshot(),
         )
@@ -1,21 +1,39 @@
-import asyncio
+import hashlib
+import json
 import time
-from typing import Any, Callable, List, Optional, Type, overload
+from typing import Any, AsyncIterator, Dict, List, Optional, Type, overload
 
 from loguru import logger
-
-from dendrite.browser.async_api._utils import convert_to_type_spec, to_json_schema
-from dendrite.logic.code.code_session import execute
-from dendrite.models.dto.cached_extract_dto import CachedExtractDTO
+from playwright.async_api import Error
+
+from dendrite.browser._common._exceptions.dendrite_exception import DendriteException
+
+from dendrite.browser.async_api._utils import (
+    _attempt_on_dom_change_helper,
+    _attempt_with_backoff_helper,
+    cache_result_if_unchanged,
+    convert_to_type_spec,
+    get_result_cache_dto,
+    to_json_schema,
+    to_list_json_schema,
+)
+from dendrite.models.dto.cached_extract_dto import (
+    CachedExtractDTO,
+    CachedScriptResultDTO,
+    RunCachedScriptsDTO,
+)
 from dendrite.models.dto.extract_dto import ExtractDTO
 from dendrite.models.response.extract_response import ExtractResponse
-from dendrite.models.scripts import Script
 
 from ..manager.navigation_tracker import NavigationTracker
 from ..protocol.page_protocol import DendritePageProtocol
 from ..types import JsonSchema, PydanticModel, TypeSpec
 
 CACHE_TIMEOUT = 5
+# The seconds `extract_iter` waits for more items to load
+LOAD_MORE_TIMEOUT = 10
+# The number of steps in a row without new items after which `extract_iter` stops
+NO_NEW_ITEMS_LIMIT = 2
 
 
 class ExtractionMixin(DendritePageProtocol):
@@ -122,6 +140,144 @@ class ExtractionMixin(DendritePageProtocol):
         if prompt is None:
             prompt = ""
 
+        result_dto = None
+        if use_cache and self.logic_engine.result_cache_enabled:
+            page = await self._get_page()
+            result_dto = await get_result_cache_dto(
+                page, "extract", prompt, json_schema
+            )
+            if result_dto is not None:
+                cached_data = await self.logic_engine.get_cached_result(result_dto)
+                if cached_data is not None:
+                    return convert_and_return_result(
+                        ExtractResponse(
+                            status="success",
+                            message="Re-used the result of an extraction on the same page content.",
+                            return_data=cached_data,
+                        ),
+                        type_spec,
+                    )
+
+        result = await self._get_extract_response(
+            prompt, json_schema, use_cache, timeout
+        )
+        if result:
+            if result_dto is not None:
+                await cache_result_if_unchanged(
+                    page, self.logic_engine, result_dto, result.return_data
+                )
+            return convert_and_return_result(result, type_spec)
+        return None
+
+    async def extract_iter(
+        self,
+        prompt: str,
+        item_type: Optional[TypeSpec] = None,
+        next_page: Optional[str] = None,
+        use_cache: bool = True,
+        timeout: int = 180,
+        max_steps: int = 50,
+    ) -> AsyncIterator[Any]:
+        """
+        Extracts a list from the page item by item, loading more of the list until no new
+        items appear. Meant for long lists, e.g. on infinite scroll pages, where `extract`
+        would only return once everything is loaded.
+
+        The items currently on the page are extracted and yielded, then more are loaded by
+        scrolling to the bottom of the page, or by clicking `next_page` if given, and the
+        extraction repeats. Once a script has been generated for the list, the following
+        steps only run the cached script. Items yielded by the previous steps are skipped,
+        while the duplicates within a step are kept like with `extract`. Only a fingerprint
+        and a count of each item are kept instead of the whole list.
+
+        Args:
+            prompt (str): The prompt to describe the items to extract.
+            item_type (Optional[TypeSpec], optional): The type specification of each item.
+            next_page (Optional[str], optional): A prompt describing the element to click to load
+                the next page of items. Defaults to None, which scrolls to the bottom instead.
+            use_cache (bool, optional): Whether to use cached scripts for the first step. Defaults to True.
+            timeout (int, optional): Maximum time for the extraction of each step, like `extract`. Defaults to 180.
+            max_steps (int, optional): The maximum number of times the list is extracted. Defaults to 50.
+
+        Yields:
+            Any: The extracted items, converted to `item_type` if given.
+        """
+        json_schema = to_list_json_schema(item_type)
+        # How many times each item was yielded, by fingerprint. A list can hold the
+        # same item several times, e.g. identical rows of a table, so an item is only
+        # skipped once a step repeats it more often than the previous steps yielded it
+        yielded: Dict[bytes, int] = {}
+        steps_without_new_items = 0
+
+        for step in range(max_steps):
+            result = await self._get_extract_response(
+                prompt,
+                json_schema,
+                use_cache or step > 0,
+                timeout,
+                use_agent=step == 0,
+            )
+            if result is None:
+                break
+
+            new_items = 0
+            occurrences: Dict[bytes, int] = {}
+            for item in result.return_data or []:
+                fingerprint = hashlib.sha256(
+                    json.dumps(item, sort_keys=True, default=str).encode()
+                ).digest()
+                occurrences[fingerprint] = occurrences.get(fingerprint, 0) + 1
+                if occurrences[fingerprint] <= yielded.get(fingerprint, 0):
+                    continue
+                yielded[fingerprint] = occurrences[fingerprint]
+                new_items += 1
+                yield (
+                    convert_to_type_spec(item_type, item)
+                    if item_type is not None
+                    else item
+                )
+
+            logger.info(f"Extracted {new_items} new items in step {step + 1}")
+            steps_without_new_items = (
+                steps_without_new_items + 1 if new_items == 0 else 0
+            )
+            if steps_without_new_items >= NO_NEW_ITEMS_LIMIT:
+                break
+
+            if not await self._load_more_items(next_page):
+                break
+
+    async def _load_more_items(self, next_page: Optional[str]) -> bool:
+        """
+        Loads more items of a list, by clicking the next page element or scrolling to the bottom.
+
+        Returns:
+            bool: Whether the page changed.
+        """
+        page = await self._get_page()
+        dom_version = await page._get_dom_version()
+
+        if next_page is not None:
+            try:
+                await page.click(next_page)
+            except (DendriteException, Error) as e:
+                logger.info(f"Could not go to the next page, stopping: {e}")
+                return False
+        else:
+            await page.playwright_page.evaluate(
+                "window.scrollTo(0, document.body.scrollHeight)"
+            )
+
+        return await page._wait_for_dom_change(dom_version, LOAD_MORE_TIMEOUT)
+
+    async def _get_extract_response(
+        self,
+        prompt: str,
+        json_schema: Optional[JsonSchema],
+        use_cache: bool,
+        timeout: float,
+        use_agent: bool = True,
+    ) -> Optional[ExtractResponse]:
         start_time = time.time()
         page = await self._get_page()
         navigation_tracker = NavigationTracker(page)
@@ -132,7 +288,10 @@ class ExtractionMixin(DendritePageProtocol):
             logger.info("Testing cache")
             cached_result = await self._try_cached_extraction(prompt, json_schema)
             if cached_result:
-                return convert_and_return_result(cached_result, type_spec)
+                return cached_result
+
+        if not use_agent:
+            return None
 
         # If cache failed or disabled, proceed with extraction agent
         logger.info(
@@ -145,7 +304,7 @@ class ExtractionMixin(DendritePageProtocol):
         )
 
         if result:
-            return convert_and_return_result(result, type_spec)
+            return result
 
         logger.error(f"Extraction failed after {time.time() - start_time:.2f} seconds")
         return None
@@ -156,7 +315,7 @@ class ExtractionMixin(DendritePageProtocol):
         json_schema: Optional[JsonSchema],
     ) -> Optional[ExtractResponse]:
         """
-        Attempts to extract data using cached scripts with exponential backoff.
+        Attempts to extract data using cached scripts, retrying whenever the page changes.
         Only tries up to 5 most recent scripts.
 
         Args:
@@ -176,28 +335,46 @@ class ExtractionMixin(DendritePageProtocol):
             )
             return None
 
+        # Take at most the 5 preferred scripts, which are last
+        recent_scripts = scripts[-min(5, len(scripts)) :]
+        succeeded: Optional[str] = None
+        failed: List[str] = []
+
         async def try_cached_extract():
+            nonlocal succeeded, failed
             page = await self._get_page()
             soup = await page._get_soup()
-            # Take at most the last 5 scripts
-            recent_scripts = scripts[-min(5, len(scripts)) :]
-            for script in recent_scripts:
-                res = await test_script(script, str(soup), json_schema)
-                if res is not None:
-                    return ExtractResponse(
-                        status="success",
-                        message="Re-used a preexisting script from cache with the same specifications.",
-                        return_data=res,
-                        created_script=script.script,
-                    )
+            res = await self.logic_engine.run_cached_scripts(
+                RunCachedScriptsDTO(
+                    scripts=recent_scripts,
+                    raw_html=str(soup),
+                    return_data_json_schema=json_schema,
+                )
+            )
+            failed = res.failed
+            if res.script is None:
+                return None
 
-            return None
+            succeeded = res.script.script
+            return ExtractResponse(
+                status="success",
+                message="Re-used a preexisting script from cache with the same specifications.",
+                return_data=res.return_data,
+                created_script=res.script.script,
+            )
 
-        return await _attempt_with_backoff_helper(
+        res = await _attempt_on_dom_change_helper(
+            page,
             "cached_extraction",
             try_cached_extract,
             CACHE_TIMEOUT,
         )
+        await self.logic_engine.record_cached_script_results(
+            CachedScriptResultDTO(
+                url=page.url, prompt=prompt, succeeded=succeeded, failed=failed
+            )
+        )
+        return res
 
     async def _extract_with_agent(
         self,
@@ -246,52 +423,6 @@ class ExtractionMixin(DendritePageProtocol):
         )
 
 
-async def _attempt_with_backoff_helper(
-    operation_name: str,
-    operation: Callable,
-    timeout: float,
-    backoff_intervals: List[float] = [0.15, 0.45, 1.0, 2.0, 4.0, 8.0],
-) -> Optional[Any]:
-    """
-    Generic helper function that implements exponential backoff for operations.
-
-    Args:
-        operation_name: Name of the operation for logging
-        operation: Async function to execute
-        timeout: Maximum time to spend attempting the operation
-        backoff_intervals: List of timeouts between attempts
-
-    Returns:
-        The result of the operation if successful, None otherwise
-    """
-    total_elapsed_time = 0
-    start_time = time.time()
-
-    for i, current_timeout in enumerate(backoff_intervals):
-        if total_elapsed_time >= timeout:
-            logger.error(f"Timeout reached after {total_elapsed_time:.2f} seconds")
-            return None
-
-        request_start_time = time.time()
-        result = await operation()
-        request_duration = time.time() - request_start_time
-
-        if result:
-            return result
-
-        sleep_duration = max(0, current_timeout - request_duration)
-        logger.info(
-            f"{operation_name} attempt {i+1} failed. Sleeping for {sleep_duration:.2f} seconds"
-        )
-        await asyncio.sleep(sleep_duration)
-        total_elapsed_time = time.time() - start_time
-
-    logger.error(
-        f"All {operation_name} attempts failed after {total_elapsed_time:.2f} seconds"
-    )
-    return None
-
-
 def convert_and_return_result(
     res: ExtractResponse, type_spec: Optional[TypeSpec]
 ) -> TypeSpec:
@@ -302,16 +433,3 @@ def convert_and_return_result(
 
     logger.info("Extraction process completed successfully")
     return converted_res
-
-
-async def test_script(
-    script: Script,
-    raw_html: str,
-    return_data_json_schema: Any,
-) -> Optional[Any]:
-
-    try:
-        res = execute(script.script, raw_html, return_data_json_schema)
-        return res
-    except Exception as e:
-        logger.debug(f"Script failed with error: {str(e)} ")
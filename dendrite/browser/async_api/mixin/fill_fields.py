@@ -1,4 +1,3 @@
-import asyncio
 from typing import Any, Dict, Optional
 
 from dendrite.browser._common._exceptions.dendrite_exception import DendriteException
@@ -14,8 +13,10 @@ class FillFieldsMixin(GetElementMixin, DendritePageProtocol):
         """
         Fills multiple fields on the page with the provided values.
 
-        This method iterates through the given dictionary of fields and their corresponding values,
-        making a separate fill request for each key-value pair.
+        The elements of all fields are first retrieved together with `get_elements`, then
+        each field is filled in order. Fields whose element wasn't found up front, e.g.
+        because it only appears after another field is filled, are retrieved on their own
+        when it's their turn.
 
         Args:
             fields (Dict[str, Any]): A dictionary where each key is a field identifier (e.g., a prompt or selector)
@@ -24,14 +25,24 @@ class FillFieldsMixin(GetElementMixin, DendritePageProtocol):
         Returns:
             None
 
-        Note:
-            This method will make multiple fill requests, one for each key in the 'fields' dictionary.
+        Raises:
+            DendriteException: If the element of a field can't be found or filled.
         """
 
+        prompts = {
+            field: f"I'll be filling in text in several fields with these keys: {fields.keys()} in this page. Get the field best described as '{field}'. I want to fill it with a '{type(value)}' type value."
+            for field, value in fields.items()
+        }
+        elements = await self.get_elements(
+            {field: _fillable_prompt(prompt) for field, prompt in prompts.items()}
+        )
+
         for field, value in fields.items():
-            prompt = f"I'll be filling in text in several fields with these keys: {fields.keys()} in this page. Get the field best described as '{field}'. I want to fill it with a '{type(value)}' type value."
-            await self.fill(prompt, value)
-            await asyncio.sleep(0.5)
+            element = elements.get(field)
+            if element is None:
+                await self.fill(prompts[field], value)
+            else:
+                await element.fill(value)
 
     async def fill(
         self,
@@ -65,7 +76,7 @@ class FillFieldsMixin(GetElementMixin, DendritePageProtocol):
         Raises:
             DendriteException: If no suitable element is found or if the fill operation fails.
         """
-        augmented_prompt = prompt + "\n\nMake sure the element can be filled with text."
+        augmented_prompt = _fillable_prompt(prompt)
         element = await self.get_element(
             augmented_prompt,
             use_cache=use_cache,
@@ -85,3 +96,7 @@ class FillFieldsMixin(GetElementMixin, DendritePageProtocol):
             *args,
             **kwargs,
         )
+
+
+def _fillable_prompt(prompt: str) -> str:
+    return prompt + "\n\nMake sure the element can be filled with text."
@@ -11,7 +11,7 @@ from ..protocol.page_protocol import DendritePageProtocol
 class MarkdownMixin(ExtractionMixin, DendritePageProtocol):
     async def markdown(self, prompt: Optional[str] = None):
         page = await self._get_page()
-        page_information = await page.get_page_information()
+        page_information = await page.get_page_information(include_screenshot=False)
         if prompt:
             extract_prompt = f"Create a script that returns the HTML from one element from the DOM that best matches this requested section of the website.\n\nDescription of section: '{prompt}'\n\nWe will be converting your returned HTML to markdown, so just return ONE stringified HTML element and nothing else. It's OK if extra information is present. Example script: 'response_data = soup.find('tag', {{'attribute': 'value'}}).prettify()'"
             res = await self.extract(extract_prompt)
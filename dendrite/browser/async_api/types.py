@@ -5,6 +5,7 @@ from playwright.async_api import Page
 from pydantic import BaseModel
 
 Interaction = Literal["click", "fill", "hover"]
+CaptureMode = Literal["content", "cdp_snapshot"]
 
 T = TypeVar("T")
 PydanticModel = TypeVar("PydanticModel", bound=BaseModel)
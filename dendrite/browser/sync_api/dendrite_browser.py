@@ -2,7 +2,16 @@ import os
 import pathlib
 import re
 from abc import ABC
-from typing import Any, List, Optional, Sequence, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
 from uuid import uuid4
 from loguru import logger
 from playwright.sync_api import (
@@ -18,11 +27,21 @@ from dendrite.browser._common._exceptions.dendrite_exception import (
     DendriteException,
     IncorrectOutcomeError,
 )
+from dendrite.browser._common.concurrency import get_concurrency, map_unordered
 from dendrite.browser._common.constants import STEALTH_ARGS
 from dendrite.browser.sync_api._utils import get_domain_w_suffix
 from dendrite.browser.remote import Providers
 from dendrite.logic.config import Config
 from dendrite.logic import LogicEngine
+from dendrite.logic.crawl.frontier import CrawlFrontier
+from dendrite.logic.crawl.links import (
+    find_list_links,
+    find_next_page_link,
+    get_site,
+    resolve_link,
+)
+from dendrite.models.response.crawl_response import CrawlResult
+from dendrite.models.response.extract_response import ExtractManyResult
 from ._event_sync import EventSync
 from .browser_impl.impl_mapping import get_impl
 from .dendrite_page import Page
@@ -39,7 +58,7 @@ from .mixin import (
     WaitForMixin,
 )
 from .protocol.browser_protocol import BrowserProtocol
-from .types import PlaywrightPage
+from .types import CaptureMode, PlaywrightPage, TypeSpec
 
 
 class Dendrite(
@@ -76,6 +95,7 @@ class Dendrite(
         remote_config: Optional[Providers] = None,
         config: Optional[Config] = None,
         auth: Optional[Union[List[str], str]] = None,
+        capture_mode: CaptureMode = "content",
     ):
         """
         Initialize Dendrite with optional domain authentication.
@@ -89,12 +109,17 @@ class Dendrite(
                 Defaults to a new Config instance.
             auth (Optional[Union[List[str], str]]): List of domains or single domain
                 to load authentication state for. Defaults to None.
+            capture_mode (CaptureMode): How pages are captured before being sent to the
+                logic engine. "content" serializes every frame with Playwright's `content()`,
+                "cdp_snapshot" captures the main frame and all same-process iframes with one
+                CDP `DOMSnapshot.captureSnapshot` call (Chromium only). Defaults to "content".
         """
         self._impl = self._get_impl(remote_config)
         self._playwright_options = playwright_options
         self._config = config or Config()
         auth_url = [auth] if isinstance(auth, str) else auth or []
         self._auth_domains = [get_domain_w_suffix(url) for url in auth_url]
+        self._capture_mode: CaptureMode = capture_mode
         self._id = uuid4().hex
         self._active_page_manager: Optional[PageManager] = None
         self._user_id: Optional[str] = None
@@ -124,6 +149,10 @@ class Dendrite(
     def logic_engine(self) -> LogicEngine:
         return self._browser_api_client
 
+    @property
+    def capture_mode(self) -> CaptureMode:
+        return self._capture_mode
+
     @property
     def dendrite_browser(self) -> "Dendrite":
         return self
@@ -197,20 +226,12 @@ class Dendrite(
             IncorrectOutcomeError: If expected_page is provided and the loaded page
                 doesn't match the expected description.
         """
-        if not re.match("^\\w+://", url):
-            url = f"https://{url}"
         active_page_manager = self._get_active_page_manager()
         if new_tab:
             active_page = active_page_manager.new_page()
         else:
             active_page = active_page_manager.get_active_page()
-        try:
-            logger.info(f"Going to {url}")
-            active_page.playwright_page.goto(url, timeout=timeout)
-        except TimeoutError:
-            logger.debug("Timeout when loading page but continuing anyways.")
-        except Exception as e:
-            logger.debug(f"Exception when loading page but continuing anyways. {e}")
+        self._navigate(active_page, url, timeout)
         if expected_page != "":
             try:
                 prompt = f"We are checking if we have arrived on the expected type of page. If it is apparent that we have arrived on the wrong page, output an error. Here is the description: '{expected_page}'"
@@ -219,6 +240,200 @@ class Dendrite(
                 raise IncorrectOutcomeError(f"Incorrect navigation, reason: {e}")
         return active_page
 
+    def _navigate(self, page: Page, url: str, timeout: Optional[float]) -> None:
+        url = _add_protocol(url)
+        try:
+            logger.info(f"Going to {url}")
+            page.playwright_page.goto(url, timeout=timeout)
+        except TimeoutError:
+            logger.debug("Timeout when loading page but continuing anyways.")
+        except Exception as e:
+            logger.debug(f"Exception when loading page but continuing anyways. {e}")
+
+    def extract_many(
+        self,
+        urls: Sequence[str],
+        prompt: str,
+        type_spec: Optional[TypeSpec] = None,
+        concurrency: int = 4,
+        use_cache: bool = True,
+        timeout: int = 180,
+        navigation_timeout: Optional[float] = 15000,
+    ) -> AsyncIterator[ExtractManyResult]:
+        """
+        Extracts the same data from many pages, using a pool of tabs to process several
+        URLs at once.
+
+        Pages built from the same template share their cached script, and concurrent
+        extractions wait for the one generating it instead of each generating their own,
+        so the extraction agent usually only runs for the first page of a site.
+
+        Results are yielded as soon as they are ready, in the order they complete. A URL
+        that fails doesn't stop the others, its result holds the error instead.
+
+        Args:
+            urls (Sequence[str]): The URLs to extract from. If no protocol is specified, https:// will be added.
+            prompt (str): The prompt to describe the information to extract.
+            type_spec (Optional[TypeSpec], optional): The type specification for the extracted data.
+            concurrency (int, optional): The number of tabs extracting at once. Defaults to 4.
+            use_cache (bool, optional): Whether to use cached scripts. Defaults to True.
+            timeout (int, optional): The maximum time for the extraction of each page, like `extract`. Defaults to 180.
+            navigation_timeout (Optional[float], optional): The maximum time in milliseconds to wait
+                for each page to load. Defaults to 15000.
+
+        Yields:
+            ExtractManyResult: The URL with either its extracted data or the error that occurred.
+        """
+        urls = list(urls)
+        if not urls:
+            return
+
+        def extract_url(tab: Page, url: str) -> ExtractManyResult:
+            try:
+                self._navigate(tab, url, navigation_timeout)
+                data = tab.extract(
+                    prompt, type_spec, use_cache=use_cache, timeout=timeout
+                )
+                if data is None:
+                    return ExtractManyResult(url=url, error="Extraction failed")
+                return ExtractManyResult(url=url, data=data)
+            except Exception as e:
+                logger.warning(f"Failed to extract from {url}: {e}")
+                return ExtractManyResult(url=url, error=str(e))
+
+        for result in self._map_in_tabs(extract_url, urls, min(concurrency, len(urls))):
+            yield result
+
+    def crawl(
+        self,
+        url: str,
+        prompt: Optional[str] = None,
+        type_spec: Optional[TypeSpec] = None,
+        next_page: Optional[str] = None,
+        max_pages: int = 100,
+        concurrency: int = 4,
+        same_domain: bool = True,
+        use_cache: bool = True,
+        timeout: int = 180,
+        navigation_timeout: Optional[float] = 15000,
+    ) -> AsyncIterator[CrawlResult]:
+        """
+        Crawls a site from a list page, e.g. a category or search results, following the
+        pages of the list and visiting the page of every item in it.
+
+        The items of a page are detected as repeating elements with links, and the next
+        page of a list as a link marked with rel="next", or else as the element described
+        by `next_page`, whose selector is cached like with `get_element`. Pages with a list
+        outside of their navigation, header and footer are list pages, the others are
+        detail pages. `prompt` is extracted from every page, since a detail page can have a
+        list too, e.g. of related items. The scripts of the extraction are cached per page
+        template, so pages are usually extracted without the extraction agent after the
+        first one of their template.
+
+        Every URL is visited at most once, with `concurrency` tabs at once, and results
+        are yielded in the order the pages are done.
+
+        Args:
+            url (str): The URL to start from. If no protocol is specified, https:// will be added.
+            prompt (Optional[str], optional): The prompt to describe the information to extract from
+                the pages. Defaults to None, which only visits them.
+            type_spec (Optional[TypeSpec], optional): The type specification for the extracted data.
+            next_page (Optional[str], optional): A prompt describing the link to the next page of a list,
+                used when it isn't marked with rel="next". Defaults to None.
+            max_pages (int, optional): The maximum number of pages to visit. Defaults to 100.
+            concurrency (int, optional): The number of tabs crawling at once. Defaults to 4.
+            same_domain (bool, optional): Whether to only follow links to the domain of `url`. Defaults to True.
+            use_cache (bool, optional): Whether to use cached scripts and selectors. Defaults to True.
+            timeout (int, optional): The maximum time for the extraction of each page, like `extract`. Defaults to 180.
+            navigation_timeout (Optional[float], optional): The maximum time in milliseconds to wait
+                for each page to load. Defaults to 15000.
+
+        Yields:
+            CrawlResult: The visited page, with its type, extracted data and the links found on it.
+        """
+        url = _add_protocol(url)
+        site = get_site(url)
+        frontier = CrawlFrontier(max_pages)
+        frontier.add(url)
+
+        def visit(tab: Page, page_url: str) -> CrawlResult:
+            try:
+                self._navigate(tab, page_url, navigation_timeout)
+                soup = tab._get_soup()
+                links = find_list_links(soup, tab.url)
+                next_page_url = find_next_page_link(soup, tab.url)
+                if links and next_page_url is None and (next_page is not None):
+                    next_page_url = self._find_next_page_url(tab, next_page, use_cache)
+                data = None
+                if prompt is not None:
+                    try:
+                        data = tab.extract(
+                            prompt, type_spec, use_cache=use_cache, timeout=timeout
+                        )
+                    except Exception as e:
+                        if not links:
+                            raise
+                        logger.warning(
+                            f"Failed to extract from list page {page_url}, following its links anyway: {e}"
+                        )
+                return CrawlResult(
+                    url=page_url,
+                    page_type="list" if links else "detail",
+                    data=data,
+                    links=links,
+                    next_page=next_page_url,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to crawl {page_url}: {e}")
+                return CrawlResult(url=page_url, error=str(e))
+
+        for result in self._map_in_tabs(visit, frontier, concurrency):
+            found = result.links + ([result.next_page] if result.next_page else [])
+            for link in found:
+                if not same_domain or get_site(link) == site:
+                    frontier.add(link)
+            yield result
+
+    def _find_next_page_url(
+        self, page: Page, next_page: str, use_cache: bool
+    ) -> Optional[str]:
+        element = page.get_element(next_page, use_cache=use_cache)
+        if element is None:
+            return None
+        href = element.locator.get_attribute("href")
+        return resolve_link(href, page.url)
+
+    def _map_in_tabs(
+        self, func: Callable[[Page, Any], Any], items: Iterable[Any], concurrency: int
+    ) -> AsyncIterator[Any]:
+        """
+        Applies `func(tab, item)` to every item with a pool of new tabs, yielding the
+        results in the order they complete. The tabs are closed once done.
+        """
+        active_page_manager = self._get_active_page_manager()
+        tabs: List[Page] = []
+        idle_tabs: List[Page] = []
+
+        def run(item: Any) -> Any:
+            tab = idle_tabs.pop()
+            try:
+                return func(tab, item)
+            finally:
+                idle_tabs.append(tab)
+
+        for _ in range(get_concurrency(run, concurrency)):
+            tabs.append(active_page_manager.new_page())
+        idle_tabs.extend(tabs)
+        try:
+            for result in map_unordered(run, items, len(tabs)):
+                yield result
+        finally:
+            for tab in tabs:
+                try:
+                    tab.close()
+                except Exception as e:
+                    logger.debug(f"Failed to close tab: {e}")
+
     def scroll_to_bottom(
         self,
         timeout: float = 30000,
@@ -503,3 +718,9 @@ class Dendrite(
                     merged["cookies"].append(cookie)
                     seen_cookies.add(cookie_key)
         return StorageState(**merged)
+
+
+def _add_protocol(url: str) -> str:
+    if not re.match("^\\w+://", url):
+        return f"https://{url}"
+    return url
@@ -42,9 +42,10 @@ def perform_action(interaction_type: Interaction):
                 func(self, *args, **kwargs)
                 return InteractionResponse(status="success", message="")
             page_before = self._dendrite_browser.get_active_page()
-            page_before_info = page_before.get_page_information()
-            soup = page_before._get_previous_soup()
-            screenshot_before = page_before_info.screenshot_base64
+            soup = page_before._get_soup()
+            screenshot_before = (
+                page_before.screenshot_manager.take_full_page_screenshot()
+            )
             tag_name = soup.find(attrs={"d-id": self.dendrite_id})
             func(self, *args, expected_outcome=expected_outcome, **kwargs)
             self._wait_for_page_changes(page_before.url)
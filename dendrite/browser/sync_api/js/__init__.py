@@ -9,3 +9,9 @@ def load_script(filename: str) -> str:
 
 GENERATE_DENDRITE_IDS_SCRIPT = load_script("generateDendriteIDs.js")
 GENERATE_DENDRITE_IDS_IFRAME_SCRIPT = load_script("generateDendriteIDsIframe.js")
+GENERATE_DENDRITE_IDS_ALL_FRAMES_SCRIPT = load_script("generateDendriteIDsAllFrames.js")
+DOM_VERSION_SCRIPT = load_script("domVersion.js")
+VISIBILITY_VERSION_SCRIPT = load_script("visibilityVersion.js")
+QUERY_SELECTORS_SCRIPT = load_script("querySelectors.js")
+IS_UNREACHABLE_FRAME_SCRIPT = load_script("isUnreachableFrame.js")
+WAIT_FOR_DOM_CHANGE_SCRIPT = load_script("waitForDomChange.js")
@@ -0,0 +1,65 @@
+({ selectors, frameOnly }) => {
+    // Iframes whose document can't be reached, e.g. cross-origin ones, are queried separately
+    let unreachableFrames = 0;
+
+    // Collects the main document and all same-origin iframe documents
+    var collectDocuments = (doc, documents) => {
+        documents.push(doc);
+        doc.querySelectorAll('iframe, frame').forEach((iframe) => {
+            let frameDoc = null;
+            try {
+                frameDoc = iframe.contentDocument;
+            } catch (error) {
+                frameDoc = null;
+            }
+            if (frameDoc && frameDoc.documentElement) {
+                collectDocuments(frameDoc, documents);
+            } else if (!frameDoc) {
+                unreachableFrames++;
+            }
+        });
+        return documents;
+    }
+
+    // Selectors prefixed with "xpath=" are XPath expressions, like in Playwright
+    var selectAll = (doc, selector) => {
+        if (!selector.startsWith('xpath=')) {
+            return doc.querySelectorAll(selector);
+        }
+        const result = doc.evaluate(
+            selector.slice('xpath='.length), doc, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+        );
+        const elements = [];
+        for (let i = 0; i < result.snapshotLength; i++) {
+            const node = result.snapshotItem(i);
+            if (node.nodeType === Node.ELEMENT_NODE) {
+                elements.push(node);
+            }
+        }
+        return elements;
+    }
+
+    const documents = frameOnly ? [document] : collectDocuments(document, []);
+
+    const results = selectors.map((selector) => {
+        const matches = [];
+        for (const doc of documents) {
+            let elements;
+            try {
+                elements = selectAll(doc, selector);
+            } catch (error) {
+                // Invalid selector, e.g. pseudo classes only supported by soupsieve
+                return { selector: selector, count: 0, matches: [], error: String(error) };
+            }
+            elements.forEach((element) => {
+                const dId = element.getAttribute('d-id');
+                if (dId) {
+                    matches.push({ d_id: dId, iframe_path: element.getAttribute('iframe-path') });
+                }
+            });
+        }
+        return { selector: selector, count: matches.length, matches: matches };
+    });
+
+    return { results: results, unreachable_frames: unreachableFrames };
+}
@@ -3,7 +3,12 @@ import time
 from typing import Optional, Type, overload
 from loguru import logger
 from dendrite.browser._common._exceptions.dendrite_exception import DendriteException
-from dendrite.browser.sync_api._utils import convert_to_type_spec, to_json_schema
+from dendrite.browser.sync_api._utils import (
+    cache_result_if_unchanged,
+    convert_to_type_spec,
+    get_result_cache_dto,
+    to_json_schema,
+)
 from dendrite.models.dto.ask_page_dto import AskPageDTO
 from ..protocol.page_protocol import DendritePageProtocol
 from ..types import JsonSchema, PydanticModel, TypeSpec
@@ -124,6 +129,17 @@ class AskMixin(DendritePageProtocol):
         Raises:
             DendriteException: If the request fails, the exception includes the failure message and a screenshot.
         """
+        schema = to_json_schema(type_spec) if type_spec else None
+        result_dto = None
+        if self.logic_engine.result_cache_enabled:
+            page = self._get_page()
+            result_dto = get_result_cache_dto(page, "ask", prompt, schema)
+            if result_dto is not None:
+                cached_data = self.logic_engine.get_cached_result(result_dto)
+                if cached_data is not None:
+                    if type_spec is not None:
+                        return convert_to_type_spec(type_spec, cached_data)
+                    return cached_data
         start_time = time.time()
         attempt_start = start_time
         attempt = -1
@@ -151,7 +167,6 @@ class AskMixin(DendritePageProtocol):
             logger.info(f"Asking '{prompt}' | Attempt {attempt + 1}")
             page = self._get_page()
             page_information = page.get_page_information()
-            schema = to_json_schema(type_spec) if type_spec else None
             if elapsed_time < 5:
                 time_prompt = f"This page was loaded {elapsed_time} seconds ago, so it might still be loading. If the page is still loading, return failed status."
             else:
@@ -173,6 +188,10 @@ class AskMixin(DendritePageProtocol):
                 converted_res = res.return_data
                 if type_spec is not None:
                     converted_res = convert_to_type_spec(type_spec, res.return_data)
+                if result_dto is not None:
+                    cache_result_if_unchanged(
+                        page, self.logic_engine, result_dto, res.return_data
+                    )
                 return converted_res
             except Exception as e:
                 logger.error(f"Exception occurred on attempt {attempt + 1}: {str(e)}")
@@ -180,5 +199,6 @@ class AskMixin(DendritePageProtocol):
                     raise
         raise DendriteException(
             message=f"Failed to get response for '{prompt}' after {attempt + 1} attempts",
-            screenshot_base64=page_information.screenshot_base64,
+            screenshot_base64=page_information.screenshot_base64
+            or page.screenshot_manager.take_full_page_screenshot(),
         )
@@ -1,18 +1,33 @@
+import hashlib
+import json
 import time
-import time
-from typing import Any, Callable, List, Optional, Type, overload
+from typing import Any, AsyncIterator, Dict, List, Optional, Type, overload
 from loguru import logger
-from dendrite.browser.sync_api._utils import convert_to_type_spec, to_json_schema
-from dendrite.logic.code.code_session import execute
-from dendrite.models.dto.cached_extract_dto import CachedExtractDTO
+from playwright.sync_api import Error
+from dendrite.browser._common._exceptions.dendrite_exception import DendriteException
+from dendrite.browser.sync_api._utils import (
+    _attempt_on_dom_change_helper,
+    _attempt_with_backoff_helper,
+    cache_result_if_unchanged,
+    convert_to_type_spec,
+    get_result_cache_dto,
+    to_json_schema,
+    to_list_json_schema,
+)
+from dendrite.models.dto.cached_extract_dto import (
+    CachedExtractDTO,
+    CachedScriptResultDTO,
+    RunCachedScriptsDTO,
+)
 from dendrite.models.dto.extract_dto import ExtractDTO
 from dendrite.models.response.extract_response import ExtractResponse
-from dendrite.models.scripts import Script
 from ..manager.navigation_tracker import NavigationTracker
 from ..protocol.page_protocol import DendritePageProtocol
 from ..types import JsonSchema, PydanticModel, TypeSpec
 
 CACHE_TIMEOUT = 5
+LOAD_MORE_TIMEOUT = 10
+NO_NEW_ITEMS_LIMIT = 2
 
 
 class ExtractionMixin(DendritePageProtocol):
@@ -116,6 +131,126 @@ class ExtractionMixin(DendritePageProtocol):
             logger.debug(f"Type specification converted to JSON schema: {json_schema}")
         if prompt is None:
             prompt = ""
+        result_dto = None
+        if use_cache and self.logic_engine.result_cache_enabled:
+            page = self._get_page()
+            result_dto = get_result_cache_dto(page, "extract", prompt, json_schema)
+            if result_dto is not None:
+                cached_data = self.logic_engine.get_cached_result(result_dto)
+                if cached_data is not None:
+                    return convert_and_return_result(
+                        ExtractResponse(
+                            status="success",
+                            message="Re-used the result of an extraction on the same page content.",
+                            return_data=cached_data,
+                        ),
+                        type_spec,
+                    )
+        result = self._get_extract_response(prompt, json_schema, use_cache, timeout)
+        if result:
+            if result_dto is not None:
+                cache_result_if_unchanged(
+                    page, self.logic_engine, result_dto, result.return_data
+                )
+            return convert_and_return_result(result, type_spec)
+        return None
+
+    def extract_iter(
+        self,
+        prompt: str,
+        item_type: Optional[TypeSpec] = None,
+        next_page: Optional[str] = None,
+        use_cache: bool = True,
+        timeout: int = 180,
+        max_steps: int = 50,
+    ) -> AsyncIterator[Any]:
+        """
+        Extracts a list from the page item by item, loading more of the list until no new
+        items appear. Meant for long lists, e.g. on infinite scroll pages, where `extract`
+        would only return once everything is loaded.
+
+        The items currently on the page are extracted and yielded, then more are loaded by
+        scrolling to the bottom of the page, or by clicking `next_page` if given, and the
+        extraction repeats. Once a script has been generated for the list, the following
+        steps only run the cached script. Items yielded by the previous steps are skipped,
+        while the duplicates within a step are kept like with `extract`. Only a fingerprint
+        and a count of each item are kept instead of the whole list.
+
+        Args:
+            prompt (str): The prompt to describe the items to extract.
+            item_type (Optional[TypeSpec], optional): The type specification of each item.
+            next_page (Optional[str], optional): A prompt describing the element to click to load
+                the next page of items. Defaults to None, which scrolls to the bottom instead.
+            use_cache (bool, optional): Whether to use cached scripts for the first step. Defaults to True.
+            timeout (int, optional): Maximum time for the extraction of each step, like `extract`. Defaults to 180.
+            max_steps (int, optional): The maximum number of times the list is extracted. Defaults to 50.
+
+        Yields:
+            Any: The extracted items, converted to `item_type` if given.
+        """
+        json_schema = to_list_json_schema(item_type)
+        yielded: Dict[bytes, int] = {}
+        steps_without_new_items = 0
+        for step in range(max_steps):
+            result = self._get_extract_response(
+                prompt, json_schema, use_cache or step > 0, timeout, use_agent=step == 0
+            )
+            if result is None:
+                break
+            new_items = 0
+            occurrences: Dict[bytes, int] = {}
+            for item in result.return_data or []:
+                fingerprint = hashlib.sha256(
+                    json.dumps(item, sort_keys=True, default=str).encode()
+                ).digest()
+                occurrences[fingerprint] = occurrences.get(fingerprint, 0) + 1
+                if occurrences[fingerprint] <= yielded.get(fingerprint, 0):
+                    continue
+                yielded[fingerprint] = occurrences[fingerprint]
+                new_items += 1
+                yield (
+                    convert_to_type_spec(item_type, item)
+                    if item_type is not None
+                    else item
+                )
+            logger.info(f"Extracted {new_items} new items in step {step + 1}")
+            steps_without_new_items = (
+                steps_without_new_items + 1 if new_items == 0 else 0
+            )
+            if steps_without_new_items >= NO_NEW_ITEMS_LIMIT:
+                break
+            if not self._load_more_items(next_page):
+                break
+
+    def _load_more_items(self, next_page: Optional[str]) -> bool:
+        """
+        Loads more items of a list, by clicking the next page element or scrolling to the bottom.
+
+        Returns:
+            bool: Whether the page changed.
+        """
+        page = self._get_page()
+        dom_version = page._get_dom_version()
+        if next_page is not None:
+            try:
+                page.click(next_page)
+            except (DendriteException, Error) as e:
+                logger.info(f"Could not go to the next page, stopping: {e}")
+                return False
+        else:
+            page.playwright_page.evaluate(
+                "window.scrollTo(0, document.body.scrollHeight)"
+            )
+        return page._wait_for_dom_change(dom_version, LOAD_MORE_TIMEOUT)
+
+    def _get_extract_response(
+        self,
+        prompt: str,
+        json_schema: Optional[JsonSchema],
+        use_cache: bool,
+        timeout: float,
+        use_agent: bool = True,
+    ) -> Optional[ExtractResponse]:
         start_time = time.time()
         page = self._get_page()
         navigation_tracker = NavigationTracker(page)
@@ -124,7 +259,9 @@ class ExtractionMixin(DendritePageProtocol):
             logger.info("Testing cache")
             cached_result = self._try_cached_extraction(prompt, json_schema)
             if cached_result:
-                return convert_and_return_result(cached_result, type_spec)
+                return cached_result
+        if not use_agent:
+            return None
         logger.info(
             "Using extraction agent to perform extraction, since no cache was found or failed."
         )
@@ -132,7 +269,7 @@ class ExtractionMixin(DendritePageProtocol):
             prompt, json_schema, timeout - (time.time() - start_time)
         )
         if result:
-            return convert_and_return_result(result, type_spec)
+            return result
         logger.error(f"Extraction failed after {time.time() - start_time:.2f} seconds")
         return None
 
@@ -140,7 +277,7 @@ class ExtractionMixin(DendritePageProtocol):
         self, prompt: str, json_schema: Optional[JsonSchema]
     ) -> Optional[ExtractResponse]:
         """
-        Attempts to extract data using cached scripts with exponential backoff.
+        Attempts to extract data using cached scripts, retrying whenever the page changes.
         Only tries up to 5 most recent scripts.
 
         Args:
@@ -159,25 +296,41 @@ class ExtractionMixin(DendritePageProtocol):
                 f"No scripts found in cache for prompt: {prompt} in domain: {page.url}"
             )
             return None
+        recent_scripts = scripts[-min(5, len(scripts)) :]
+        succeeded: Optional[str] = None
+        failed: List[str] = []
 
         def try_cached_extract():
+            nonlocal succeeded, failed
             page = self._get_page()
             soup = page._get_soup()
-            recent_scripts = scripts[-min(5, len(scripts)) :]
-            for script in recent_scripts:
-                res = test_script(script, str(soup), json_schema)
-                if res is not None:
-                    return ExtractResponse(
-                        status="success",
-                        message="Re-used a preexisting script from cache with the same specifications.",
-                        return_data=res,
-                        created_script=script.script,
-                    )
-            return None
+            res = self.logic_engine.run_cached_scripts(
+                RunCachedScriptsDTO(
+                    scripts=recent_scripts,
+                    raw_html=str(soup),
+                    return_data_json_schema=json_schema,
+                )
+            )
+            failed = res.failed
+            if res.script is None:
+                return None
+            succeeded = res.script.script
+            return ExtractResponse(
+                status="success",
+                message="Re-used a preexisting script from cache with the same specifications.",
+                return_data=res.return_data,
+                created_script=res.script.script,
+            )
 
-        return _attempt_with_backoff_helper(
-            "cached_extraction", try_cached_extract, CACHE_TIMEOUT
+        res = _attempt_on_dom_change_helper(
+            page, "cached_extraction", try_cached_extract, CACHE_TIMEOUT
         )
+        self.logic_engine.record_cached_script_results(
+            CachedScriptResultDTO(
+                url=page.url, prompt=prompt, succeeded=succeeded, failed=failed
+            )
+        )
+        return res
 
     def _extract_with_agent(
         self, prompt: str, json_schema: Optional[JsonSchema], remaining_timeout: float
@@ -217,47 +370,6 @@ class ExtractionMixin(DendritePageProtocol):
         )
 
 
-def _attempt_with_backoff_helper(
-    operation_name: str,
-    operation: Callable,
-    timeout: float,
-    backoff_intervals: List[float] = [0.15, 0.45, 1.0, 2.0, 4.0, 8.0],
-) -> Optional[Any]:
-    """
-    Generic helper function that implements exponential backoff for operations.
-
-    Args:
-        operation_name: Name of the operation for logging
-        operation: Async function to execute
-        timeout: Maximum time to spend attempting the operation
-        backoff_intervals: List of timeouts between attempts
-
-    Returns:
-        The result of the operation if successful, None otherwise
-    """
-    total_elapsed_time = 0
-    start_time = time.time()
-    for i, current_timeout in enumerate(backoff_intervals):
-        if total_elapsed_time >= timeout:
-            logger.error(f"Timeout reached after {total_elapsed_time:.2f} seconds")
-            return None
-        request_start_time = time.time()
-        result = operation()
-        request_duration = time.time() - request_start_time
-        if result:
-            return result
-        sleep_duration = max(0, current_timeout - request_duration)
-        logger.info(
-            f"{operation_name} attempt {i + 1} failed. Sleeping for {sleep_duration:.2f} seconds"
-        )
-        time.sleep(sleep_duration)
-        total_elapsed_time = time.time() - start_time
-    logger.error(
-        f"All {operation_name} attempts failed after {total_elapsed_time:.2f} seconds"
-    )
-    return None
-
-
 def convert_and_return_result(
     res: ExtractResponse, type_spec: Optional[TypeSpec]
 ) -> TypeSpec:
@@ -267,13 +379,3 @@ def convert_and_return_result(
         converted_res = convert_to_type_spec(type_spec, res.return_data)
     logger.info("Extraction process completed successfully")
     return converted_res
-
-
-def test_script(
-    script: Script, raw_html: str, return_data_json_schema: Any
-) -> Optional[Any]:
-    try:
-        res = execute(script.script, raw_html, return_data_json_schema)
-        return res
-    except Exception as e:
-        logger.debug(f"Script failed with error: {str(e)} ")
@@ -1,4 +1,3 @@
-import time
 from typing import Any, Dict, Optional
 from dendrite.browser._common._exceptions.dendrite_exception import DendriteException
 from dendrite.models.response.interaction_response import InteractionResponse
@@ -12,8 +11,10 @@ class FillFieldsMixin(GetElementMixin, DendritePageProtocol):
         """
         Fills multiple fields on the page with the provided values.
 
-        This method iterates through the given dictionary of fields and their corresponding values,
-        making a separate fill request for each key-value pair.
+        The elements of all fields are first retrieved together with `get_elements`, then
+        each field is filled in order. Fields whose element wasn't found up front, e.g.
+        because it only appears after another field is filled, are retrieved on their own
+        when it's their turn.
 
         Args:
             fields (Dict[str, Any]): A dictionary where each key is a field identifier (e.g., a prompt or selector)
@@ -22,13 +23,22 @@ class FillFieldsMixin(GetElementMixin, DendritePageProtocol):
         Returns:
             None
 
-        Note:
-            This method will make multiple fill requests, one for each key in the 'fields' dictionary.
+        Raises:
+            DendriteException: If the element of a field can't be found or filled.
         """
+        prompts = {
+            field: f"I'll be filling in text in several fields with these keys: {fields.keys()} in this page. Get the field best described as '{field}'. I want to fill it with a '{type(value)}' type value."
+            for field, value in fields.items()
+        }
+        elements = self.get_elements(
+            {field: _fillable_prompt(prompt) for field, prompt in prompts.items()}
+        )
         for field, value in fields.items():
-            prompt = f"I'll be filling in text in several fields with these keys: {fields.keys()} in this page. Get the field best described as '{field}'. I want to fill it with a '{type(value)}' type value."
-            self.fill(prompt, value)
-            time.sleep(0.5)
+            element = elements.get(field)
+            if element is None:
+                self.fill(prompts[field], value)
+            else:
+                element.fill(value)
 
     def fill(
         self,
@@ -62,7 +72,7 @@ class FillFieldsMixin(GetElementMixin, DendritePageProtocol):
         Raises:
             DendriteException: If no suitable element is found or if the fill operation fails.
         """
-        augmented_prompt = prompt + "\n\nMake sure the element can be filled with text."
+        augmented_prompt = _fillable_prompt(prompt)
         element = self.get_element(
             augmented_prompt, use_cache=use_cache, timeout=timeout
         )
@@ -74,3 +84,7 @@ class FillFieldsMixin(GetElementMixin, DendritePageProtocol):
         return element.fill(
             value, *args, expected_outcome=expected_outcome, timeout=timeout, **kwargs
         )
+
+
+def _fillable_prompt(prompt: str) -> str:
+    return prompt + "\n\nMake sure the element can be filled with text."
@@ -1,24 +1,23 @@
 import time
-import time
-from typing import (
-    TYPE_CHECKING,
-    Any,
-    Callable,
-    Dict,
-    List,
-    Literal,
-    Optional,
-    Union,
-    overload,
-)
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Union, overload
 from bs4 import BeautifulSoup
 from loguru import logger
-from .._utils import _get_all_elements_from_selector_soup
+from .._utils import (
+    _attempt_on_dom_change_helper,
+    _attempt_with_backoff_helper,
+    _get_all_elements_from_selector_soup,
+    elements_from_query_results,
+    get_matching_selector,
+    query_selectors_in_page,
+)
 from ..dendrite_element import Element
 
 if TYPE_CHECKING:
     from ..dendrite_page import Page
-from dendrite.models.dto.cached_selector_dto import CachedSelectorDTO
+from dendrite.models.dto.cached_selector_dto import (
+    CachedSelectorDTO,
+    CachedSelectorResultDTO,
+)
 from dendrite.models.dto.get_elements_dto import GetElementsDTO
 from ..protocol.page_protocol import DendritePageProtocol
 
@@ -47,6 +46,86 @@ class GetElementMixin(DendritePageProtocol):
             prompt, only_one=True, use_cache=use_cache, timeout=timeout / 1000
         )
 
+    def get_elements(
+        self, prompts: Dict[str, str], use_cache: bool = True
+    ) -> Dict[str, Optional[Element]]:
+        """
+        Retrieves several Dendrite elements at once, one for each of the provided prompts.
+
+        The cached selectors of all prompts are tested with a single query of the page. The
+        remaining prompts are then resolved together: the page is captured and segmented once
+        and every segment is searched for all of them in the same request. The selector of
+        each found element is cached under its own prompt, like with `get_element`.
+
+        Args:
+            prompts (Dict[str, str]): The prompts describing the elements, keyed by a name of your choice.
+            use_cache (bool, optional): Whether to use cached results. Defaults to True.
+
+        Returns:
+            Dict[str, Optional[Element]]: The element for each name, or None if it wasn't found.
+        """
+        logger.info(f"Getting elements for prompts: {list(prompts.values())}")
+        page = self._get_page()
+        elements: Dict[str, Optional[Element]] = {name: None for name in prompts}
+        if use_cache:
+            cached_selectors: Dict[str, List[str]] = {}
+            for name, prompt in prompts.items():
+                dto = CachedSelectorDTO(url=page.url, prompt=prompt)
+                selectors = self.logic_engine.get_cached_selectors(dto)
+                cached_selectors[name] = [
+                    selector.selector
+                    for selector in selectors[-min(5, len(selectors)) :]
+                ]
+            all_selectors = [
+                selector
+                for selectors in cached_selectors.values()
+                for selector in selectors
+            ]
+            if len(all_selectors) > 0:
+                results = query_selectors_in_page(page, all_selectors)
+                start = 0
+                for name, selectors in cached_selectors.items():
+                    end = start + len(selectors)
+                    element = elements_from_query_results(
+                        page, results[start:end], only_one=True
+                    )
+                    if isinstance(element, Element):
+                        elements[name] = element
+                    if len(selectors) > 0:
+                        self._record_cached_selector_results(
+                            page,
+                            prompts[name],
+                            selectors,
+                            get_matching_selector(results[start:end]),
+                        )
+                    start = end
+        remaining = {
+            name: prompt for name, prompt in prompts.items() if elements[name] is None
+        }
+        if len(remaining) == 0:
+            return elements
+        logger.info(
+            f"Using the find element agent for the prompts without cached selectors: {list(remaining.keys())}"
+        )
+        page_information = page.get_page_information(include_screenshot=False)
+        dto = GetElementsDTO(
+            page_information=page_information, prompt=remaining, only_one=True
+        )
+        res = self.logic_engine.get_elements(dto)
+        soup = page._get_previous_soup()
+        for name, element_res in res.elements.items():
+            if element_res.status != "success" or element_res.selectors is None:
+                logger.warning(
+                    f"Failed to get element '{name}'. Reason: {element_res.message}"
+                )
+                continue
+            element = get_elements_from_selectors_soup(
+                page, soup, element_res.selectors, only_one=True
+            )
+            if isinstance(element, Element):
+                elements[name] = element
+        return elements
+
     @overload
     def _get_element(
         self, prompt_or_elements: str, only_one: Literal[True], use_cache: bool, timeout
@@ -111,10 +190,9 @@ class GetElementMixin(DendritePageProtocol):
         logger.info(f"Getting element for prompt: '{prompt_or_elements}'")
         start_time = time.time()
         page = self._get_page()
-        soup = page._get_soup()
         if use_cache:
             cached_elements = self._try_cached_selectors(
-                page, soup, prompt_or_elements, only_one
+                page, prompt_or_elements, only_one
             )
             if cached_elements:
                 return cached_elements
@@ -135,14 +213,16 @@ class GetElementMixin(DendritePageProtocol):
         return None
 
     def _try_cached_selectors(
-        self, page: "Page", soup: BeautifulSoup, prompt: str, only_one: bool
+        self, page: "Page", prompt: str, only_one: bool
     ) -> Union[Optional[Element], List[Element]]:
         """
-        Attempts to retrieve elements using cached selectors with exponential backoff.
+        Attempts to retrieve elements using cached selectors, retrying whenever the page changes.
+
+        The selectors are tested in the browser against the live DOM, so every attempt
+        sees the current page without serializing it.
 
         Args:
             page: The current page object
-            soup: The BeautifulSoup object of the current page
             prompt: The prompt to search for
             only_one: Whether to return only one element
 
@@ -157,54 +237,48 @@ class GetElementMixin(DendritePageProtocol):
         logger.debug("Attempting to use cached selectors with backoff")
         recent_selectors = selectors[-min(5, len(selectors)) :]
         str_selectors = list(map(lambda x: x.selector, recent_selectors))
+        matching_selector: Optional[str] = None
 
         def try_cached_selectors():
-            return get_elements_from_selectors_soup(page, soup, str_selectors, only_one)
+            nonlocal matching_selector
+            results = query_selectors_in_page(page, str_selectors)
+            matching_selector = get_matching_selector(results)
+            return elements_from_query_results(page, results, only_one)
 
-        return _attempt_with_backoff_helper(
-            "cached_selectors", try_cached_selectors, timeout=CACHE_TIMEOUT
+        res = _attempt_on_dom_change_helper(
+            page, "cached_selectors", try_cached_selectors, timeout=CACHE_TIMEOUT
+        )
+        self._record_cached_selector_results(
+            page, prompt, str_selectors, matching_selector
         )
+        return res
 
+    def _record_cached_selector_results(
+        self,
+        page: "Page",
+        prompt: str,
+        selectors: List[str],
+        matching_selector: Optional[str],
+    ) -> None:
+        """
+        Records which of the tried cached selectors worked, so that the cache can order
+        them by success and evict the ones that keep failing.
 
-def _attempt_with_backoff_helper(
-    operation_name: str,
-    operation: Callable,
-    timeout: float,
-    backoff_intervals: List[float] = [0.15, 0.45, 1.0, 2.0, 4.0, 8.0],
-) -> Optional[Any]:
-    """
-    Generic helper function that implements exponential backoff for operations.
-
-    Args:
-        operation_name: Name of the operation for logging
-        operation: Async function to execute
-        timeout: Maximum time to spend attempting the operation
-        backoff_intervals: List of timeouts between attempts
-
-    Returns:
-        The result of the operation if successful, None otherwise
-    """
-    total_elapsed_time = 0
-    start_time = time.time()
-    for i, current_timeout in enumerate(backoff_intervals):
-        if total_elapsed_time >= timeout:
-            logger.error(f"Timeout reached after {total_elapsed_time:.2f} seconds")
-            return None
-        request_start_time = time.time()
-        result = operation()
-        request_duration = time.time() - request_start_time
-        if result:
-            return result
-        sleep_duration = max(0, current_timeout - request_duration)
-        logger.info(
-            f"{operation_name} attempt {i + 1} failed. Sleeping for {sleep_duration:.2f} seconds"
+        Args:
+            page: The current page object
+            prompt: The prompt the selectors are cached for
+            selectors: The tried selectors, from the least to the most preferred
+            matching_selector: The selector that matched, if any
+        """
+        if matching_selector is None:
+            failed = selectors
+        else:
+            failed = selectors[selectors.index(matching_selector) + 1 :]
+        self.logic_engine.record_cached_selector_results(
+            CachedSelectorResultDTO(
+                url=page.url, prompt=prompt, succeeded=matching_selector, failed=failed
+            )
         )
-        time.sleep(sleep_duration)
-        total_elapsed_time = time.time() - start_time
-    logger.error(
-        f"All {operation_name} attempts failed after {total_elapsed_time:.2f} seconds"
-    )
-    return None
 
 
 def try_get_element(
@@ -216,7 +290,7 @@ def try_get_element(
 
     def _try_get_element():
         page = obj._get_page()
-        page_information = page.get_page_information()
+        page_information = page.get_page_information(include_screenshot=False)
         dto = GetElementsDTO(
             page_information=page_information,
             prompt=prompt_or_elements,
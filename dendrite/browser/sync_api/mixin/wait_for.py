@@ -36,8 +36,8 @@ class WaitForMixin(AskMixin, DendritePageProtocol):
             if elapsed_time >= timeout:
                 break
             page = self._get_page()
-            page_information = page.get_page_information()
-            prompt_with_instruction = f"Prompt: '{prompt}'\n\nReturn a boolean that determines if the requested information or thing is available on the page. {round(page_information.time_since_frame_navigated, 2)} seconds have passed since the page first loaded."
+            time_since_frame_navigated = page.get_time_since_last_frame_navigated()
+            prompt_with_instruction = f"Prompt: '{prompt}'\n\nReturn a boolean that determines if the requested information or thing is available on the page. {round(time_since_frame_navigated, 2)} seconds have passed since the page first loaded."
             try:
                 res = self.ask(prompt_with_instruction, bool)
                 if res:
@@ -46,8 +46,8 @@ class WaitForMixin(AskMixin, DendritePageProtocol):
                 logger.debug(f"Attempt failed: {e.message}")
             time.sleep(0.5)
         page = self._get_page()
-        page_information = page.get_page_information()
+        screenshot = page.screenshot_manager.take_full_page_screenshot()
         raise PageConditionNotMet(
             message=f"Failed to wait for the requested condition within the {timeout}ms timeout.",
-            screenshot_base64=page_information.screenshot_base64,
+            screenshot_base64=screenshot,
         )
@@ -4,6 +4,7 @@ from playwright.sync_api import Page
 from pydantic import BaseModel
 
 Interaction = Literal["click", "fill", "hover"]
+CaptureMode = Literal["content", "cdp_snapshot"]
 T = TypeVar("T")
 PydanticModel = TypeVar("PydanticModel", bound=BaseModel)
 PrimitiveTypes = PrimitiveTypes = Union[Type[bool], Type[int], Type[float], Type[str]]
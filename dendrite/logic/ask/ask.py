@@ -2,27 +2,37 @@ import re
 from typing import List
 
 import json_repair
-from jsonschema import validate
 from openai.types.chat.chat_completion_content_part_param import (
     ChatCompletionContentPartParam,
 )
 
+from dendrite.logic.code.json_schema import validate_json
 from dendrite.logic.config import Config
 from dendrite.logic.llm.agent import Agent, Message
 from dendrite.models.dto.ask_page_dto import AskPageDTO
 from dendrite.models.response.ask_page_response import AskPageResponse
 
-from .image import segment_image
+from .image import ImageSegments
 
 
 async def ask_page_action(ask_page_dto: AskPageDTO, config: Config) -> AskPageResponse:
-    image_segments = segment_image(
-        ask_page_dto.page_information.screenshot_base64, segment_height=2000
+    llm = config.llm_config.get("ask_page_agent")
+    # The next segments are encoded while the agent looks at the current one
+    image_segments = ImageSegments(
+        await ask_page_dto.page_information.get_screenshot(),
+        segment_height=2000,
+        max_width=llm.image_max_width,
+        quality=llm.image_quality,
     )
 
-    agent = Agent(config.llm_config.get("ask_page_agent"))
+    agent = Agent(
+        llm,
+        response_cache=config.llm_config.get_response_cache("ask_page_agent"),
+    )
     scrolled_to_segment_i = 0
-    content = generate_ask_page_prompt(ask_page_dto, image_segments)
+    content = generate_ask_page_prompt(
+        ask_page_dto, await image_segments.get(0), len(image_segments)
+    )
     messages: List[Message] = [
         {"role": "user", "content": content},
     ]
@@ -59,9 +69,13 @@ async def ask_page_action(ask_page_dto: AskPageDTO, config: Config) -> AskPageRe
             continue
 
         if "scroll_down" in data_dict:
+            agent.cache_response()
             next = scrolled_to_segment_i + 1
             if next < len(image_segments):
-                content = generate_scroll_prompt(image_segments, next)
+                content = generate_scroll_prompt(
+                    await image_segments.get(next), next, len(image_segments)
+                )
+                scrolled_to_segment_i = next
             else:
                 content = "You cannot scroll any further."
             messages.append({"role": "user", "content": content})
@@ -71,7 +85,7 @@ async def ask_page_action(ask_page_dto: AskPageDTO, config: Config) -> AskPageRe
             return_data = data_dict["return_data"]
             try:
                 if ask_page_dto.return_schema:
-                    validate(instance=return_data, schema=ask_page_dto.return_schema)
+                    validate_json(return_data, ask_page_dto.return_schema)
             except Exception as e:
                 err_message = "Your return data doesn't match the requested return json schema, try again. Exception: {e}"
                 messages.append(
@@ -82,6 +96,7 @@ async def ask_page_action(ask_page_dto: AskPageDTO, config: Config) -> AskPageRe
                 )
                 continue
 
+            agent.cache_response()
             return AskPageResponse(
                 status="success",
                 return_data=data_dict["return_data"],
@@ -115,12 +130,12 @@ async def ask_page_action(ask_page_dto: AskPageDTO, config: Config) -> AskPageRe
 
 
 def generate_ask_page_prompt(
-    ask_page_dto: AskPageDTO, image_segments: list, scrolled_to_segment_i: int = 0
+    ask_page_dto: AskPageDTO, image_segment: str, segment_count: int
 ) -> List[ChatCompletionContentPartParam]:
     # Generate scroll down hint based on number of segments
     scroll_down_hint = (
         ""
-        if len(image_segments) == 1
+        if segment_count == 1
         else """
     
 If you think need to scroll further down, output an object with the key scroll down and nothing else:
@@ -187,9 +202,7 @@ Here is a screenshot of the viewport:""",
         },
         {
             "type": "image_url",
-            "image_url": {
-                "url": f"data:image/jpeg;base64,{image_segments[scrolled_to_segment_i]}"
-            },
+            "image_url": {"url": f"data:image/jpeg;base64,{image_segment}"},
         },
     ]
 
@@ -197,34 +210,33 @@ Here is a screenshot of the viewport:""",
 
 
 def generate_scroll_prompt(
-    image_segments: list, next_segment: int
+    image_segment: str, next_segment: int, segment_count: int
 ) -> List[ChatCompletionContentPartParam]:
     """
     Generates the prompt for scrolling to next segment.
 
     Args:
-        image_segments: List of image segments
+        image_segment: The next image segment, base64 encoded
         next_segment: Index of next segment
+        segment_count: Number of image segments
 
     Returns:
         List of message content blocks
     """
     last_segment_reminder = (
         " You won't be able to scroll further now."
-        if next_segment == len(image_segments) - 1
+        if next_segment == segment_count - 1
         else ""
     )
 
     content = [
         {
             "type": "text",
-            "text": f"""You have scrolled down. You are viewing segment {next_segment+1}/{len(image_segments)}.{last_segment_reminder} Here is the new viewport:""",
+            "text": f"""You have scrolled down. You are viewing segment {next_segment+1}/{segment_count}.{last_segment_reminder} Here is the new viewport:""",
         },
         {
             "type": "image_url",
-            "image_url": {
-                "url": f"data:image/jpeg;base64,{image_segments[next_segment]}"
-            },
+            "image_url": {"url": f"data:image/jpeg;base64,{image_segment}"},
         },
     ]
 
@@ -1,35 +1,144 @@
+import asyncio
 import base64
 import io
-from typing import List
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
 
-from loguru import logger
 from PIL import Image
 
+# PIL releases the GIL while it decodes, resizes and encodes, so threads run in parallel
+IMAGE_WORKERS = min(4, os.cpu_count() or 1)
 
-def segment_image(
-    base64_image: str,
-    segment_height: int = 7900,
-) -> List[str]:
-    if len(base64_image) < 100:
-        raise Exception("Failed to segment image since it is too small / glitched.")
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=IMAGE_WORKERS, thread_name_prefix="dendrite-image"
+            )
+        return _pool
+
+
+class ImageSegments:
+    """
+    The segments of a full-page screenshot, encoded to JPEG in a pool of worker threads
+    as they are needed. Getting a segment also starts encoding the next `prefetch`
+    segments, so they are ready by the time the agent has reasoned about the current one,
+    and the first segment is encoded right away.
+
+    Attributes:
+        segment_height (int): The height of each segment in pixels, before downscaling.
+        max_width (Optional[int]): The width segments are downscaled to if they are wider, None to keep their size.
+        quality (Optional[int]): The JPEG quality of the segments, None for PIL's default.
+        prefetch (int): The number of segments to encode ahead of the requested one.
+    """
+
+    def __init__(
+        self,
+        base64_image: str,
+        segment_height: int = 7900,
+        max_width: Optional[int] = None,
+        quality: Optional[int] = None,
+        prefetch: int = 1,
+    ):
+        if len(base64_image) < 100:
+            raise Exception("Failed to segment image since it is too small / glitched.")
+
+        self.segment_height = segment_height
+        self.max_width = max_width
+        self.quality = quality
+        self.prefetch = prefetch
+
+        # Only the header is read here, the pixels are decoded once by the first worker
+        self._image = Image.open(io.BytesIO(base64.b64decode(base64_image)))
+        self._load_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._futures: Dict[int, "Future[str]"] = {}
+
+        self._submit(0)
+
+    def __len__(self) -> int:
+        height = self._image.size[1]
+        return max(1, -(-height // self.segment_height))
 
-    image_data = base64.b64decode(base64_image)
-    image = Image.open(io.BytesIO(image_data))
-    width, height = image.size
-    segments = []
+    async def get(self, index: int) -> str:
+        """
+        Gets a segment, waiting for it to be encoded.
 
-    for i in range(0, height, segment_height):
+        Args:
+            index (int): The index of the segment, from the top of the page.
+
+        Returns:
+            str: The segment as a base64 encoded JPEG.
+        """
+        future = self._submit(index)
+        for next_index in range(index + 1, min(index + 1 + self.prefetch, len(self))):
+            self._submit(next_index)
+        return await asyncio.wrap_future(future)
+
+    def get_all(self) -> List[str]:
+        """
+        Encodes all the segments in parallel, blocking until they are ready.
+
+        Returns:
+            List[str]: The segments as base64 encoded JPEGs.
+        """
+        futures = [self._submit(index) for index in range(len(self))]
+        return [future.result() for future in futures]
+
+    def _submit(self, index: int) -> "Future[str]":
+        if not 0 <= index < len(self):
+            raise IndexError(f"There are only {len(self)} image segments.")
+
+        with self._lock:
+            future = self._futures.get(index)
+            if future is None:
+                future = _get_pool().submit(self._encode, index)
+                self._futures[index] = future
+            return future
+
+    def _encode(self, index: int) -> str:
+        with self._load_lock:
+            # Decoding isn't thread-safe, while cropping the decoded image is
+            self._image.load()
+
+        width, height = self._image.size
+        top = index * self.segment_height
         # Define the box for cropping (left, upper, right, lower)
-        box = (0, i, width, min(i + segment_height, height))
-        segment = image.crop(box)
+        box = (0, top, width, min(top + self.segment_height, height))
+        segment = self._image.crop(box)
 
-        # Convert RGBA to RGB if necessary
-        if segment.mode == "RGBA":
+        # JPEG has no alpha channel, so convert RGBA and other modes to RGB
+        if segment.mode != "RGB":
             segment = segment.convert("RGB")
 
+        if self.max_width is not None and segment.width > self.max_width:
+            ratio = self.max_width / segment.width
+            segment = segment.resize(
+                (self.max_width, max(1, round(segment.height * ratio))),
+                Image.Resampling.LANCZOS,
+            )
+
         buffer = io.BytesIO()
-        segment.save(buffer, format="JPEG")
-        segment_data = buffer.getvalue()
-        segments.append(base64.b64encode(segment_data).decode())
+        if self.quality is not None:
+            segment.save(buffer, format="JPEG", quality=self.quality)
+        else:
+            segment.save(buffer, format="JPEG")
+        return base64.b64encode(buffer.getvalue()).decode()
+
 
-    return segments
+def segment_image(
+    base64_image: str,
+    segment_height: int = 7900,
+    max_width: Optional[int] = None,
+    quality: Optional[int] = None,
+) -> List[str]:
+    return ImageSegments(
+        base64_image, segment_height, max_width=max_width, quality=quality
+    ).get_all()
@@ -1,19 +1,34 @@
-from typing import List, Optional, Protocol
+from typing import Any, List, Optional, Protocol
 
 from dendrite.logic.ask import ask
+from dendrite.logic.cache.result_cache import cache_result, get_cached_result
 from dendrite.logic.config import Config
 from dendrite.logic.extract import extract
 from dendrite.logic.get_element import get_element
 from dendrite.logic.verify_interaction import verify_interaction
 from dendrite.models.dto.ask_page_dto import AskPageDTO
-from dendrite.models.dto.cached_extract_dto import CachedExtractDTO
-from dendrite.models.dto.cached_selector_dto import CachedSelectorDTO
+from dendrite.models.dto.cached_extract_dto import (
+    CachedExtractDTO,
+    CachedScriptResultDTO,
+    RunCachedScriptsDTO,
+)
+from dendrite.models.dto.cached_result_dto import CachedResultDTO
+from dendrite.models.dto.cached_selector_dto import (
+    CachedSelectorDTO,
+    CachedSelectorResultDTO,
+)
 from dendrite.models.dto.extract_dto import ExtractDTO
 from dendrite.models.dto.get_elements_dto import GetElementsDTO
 from dendrite.models.dto.make_interaction_dto import VerifyActionDTO
 from dendrite.models.response.ask_page_response import AskPageResponse
-from dendrite.models.response.extract_response import ExtractResponse
-from dendrite.models.response.get_element_response import GetElementResponse
+from dendrite.models.response.extract_response import (
+    ExtractResponse,
+    RunCachedScriptsResponse,
+)
+from dendrite.models.response.get_element_response import (
+    GetElementResponse,
+    GetElementsResponse,
+)
 from dendrite.models.response.interaction_response import InteractionResponse
 from dendrite.models.scripts import Script
 from dendrite.models.selector import Selector
@@ -26,12 +41,38 @@ class AsyncLogicEngine:
     async def get_element(self, dto: GetElementsDTO) -> GetElementResponse:
         return await get_element.get_element(dto, self._config)
 
+    async def get_elements(self, dto: GetElementsDTO) -> GetElementsResponse:
+        return await get_element.get_elements(dto, self._config)
+
     async def get_cached_selectors(self, dto: CachedSelectorDTO) -> List[Selector]:
         return await get_element.get_cached_selector(dto, self._config)
 
     async def get_cached_scripts(self, dto: CachedExtractDTO) -> List[Script]:
         return await extract.get_cached_scripts(dto, self._config)
 
+    async def record_cached_selector_results(
+        self, dto: CachedSelectorResultDTO
+    ) -> None:
+        await get_element.record_cached_selector_results(dto, self._config)
+
+    async def record_cached_script_results(self, dto: CachedScriptResultDTO) -> None:
+        await extract.record_cached_script_results(dto, self._config)
+
+    async def run_cached_scripts(
+        self, dto: RunCachedScriptsDTO
+    ) -> RunCachedScriptsResponse:
+        return await extract.run_cached_scripts(dto, self._config)
+
+    @property
+    def result_cache_enabled(self) -> bool:
+        return self._config.result_cache is not None
+
+    async def get_cached_result(self, dto: CachedResultDTO) -> Optional[Any]:
+        return get_cached_result(dto, self._config.result_cache)
+
+    async def cache_result(self, dto: CachedResultDTO) -> None:
+        cache_result(dto, self._config.result_cache)
+
     async def extract(self, dto: ExtractDTO) -> ExtractResponse:
         return await extract.extract(dto, self._config)
 
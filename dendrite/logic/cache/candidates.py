@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import Callable, List, Optional, Protocol, Tuple, TypeVar
+
+from dendrite.logic.cache.file_cache import FileCache
+from dendrite.logic.cache.path_template import get_path_template
+
+# Entries failing this many times in a row since their last success are evicted
+MAX_CONSECUTIVE_FAILURES = 3
+
+
+class CachedCandidate(Protocol):
+    url: str
+    created_at: str
+    path_template: Optional[str]
+    success_count: int
+    failure_count: int
+    consecutive_failures: int
+    last_success_at: Optional[str]
+
+
+T = TypeVar("T", bound=CachedCandidate)
+
+
+def order_candidates(candidates: List[T], url: str) -> List[T]:
+    """
+    Orders cached candidates from the least to the most preferred, since the cache
+    consumers pick their preferred candidates from the end of the list.
+
+    Candidates recorded on the same path template as the URL are preferred, then the ones
+    that haven't failed since their last success, then the most recently successful or
+    created ones.
+
+    Args:
+        candidates (List[T]): The cached candidates, oldest first.
+        url (str): The URL of the page the candidates will be used on.
+
+    Returns:
+        List[T]: The reordered candidates.
+    """
+    template = get_path_template(url)
+
+    def preference(candidate: T) -> Tuple[bool, int, str]:
+        candidate_template = candidate.path_template or get_path_template(candidate.url)
+        return (
+            candidate_template == template,
+            -candidate.consecutive_failures,
+            candidate.last_success_at or candidate.created_at,
+        )
+
+    return sorted(candidates, key=preference)
+
+
+def record_candidate_results(
+    cache: FileCache[T],
+    key: dict,
+    is_candidate: Callable[[T, str], bool],
+    succeeded: Optional[str],
+    failed: List[str],
+) -> None:
+    """
+    Updates the success and failure counters of the cached candidates that were tried,
+    evicting the ones that failed `MAX_CONSECUTIVE_FAILURES` times in a row.
+
+    Args:
+        cache (FileCache[T]): The cache the candidates are stored in.
+        key (dict): The cache key of the candidates.
+        is_candidate (Callable[[T, str], bool]): Whether a cached entry is the tried candidate.
+        succeeded (Optional[str]): The candidate that worked, if any.
+        failed (List[str]): The candidates that didn't work.
+    """
+    # The entries are read, updated and written back as one step, so concurrent calls,
+    # in this process or another one, don't lose each other's counters or bring back
+    # evicted entries
+    with cache.file_lock():
+        cache.reload()
+        entries = cache.get(key)
+        if entries is None:
+            return
+
+        now = datetime.now().isoformat()
+        kept: List[T] = []
+        for entry in entries:
+            if succeeded is not None and is_candidate(entry, succeeded):
+                entry.success_count += 1
+                entry.consecutive_failures = 0
+                entry.last_success_at = now
+            elif any(is_candidate(entry, candidate) for candidate in failed):
+                entry.failure_count += 1
+                entry.consecutive_failures += 1
+                if entry.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                    continue
+            kept.append(entry)
+
+        if len(kept) == 0:
+            cache.delete(key)
+        else:
+            cache.set(key, kept)
@@ -1,22 +1,32 @@
 import json
+import os
 import threading
+from contextlib import contextmanager
 from hashlib import md5
 from pathlib import Path
 from typing import (
     Any,
     Dict,
     Generic,
+    Iterator,
     List,
     Mapping,
     Type,
     TypeVar,
     Union,
     Optional,
+    Tuple,
     overload,
 )
 
 from pydantic import BaseModel
 
+try:
+    import fcntl
+except ImportError:  # Windows, where files are locked with msvcrt instead
+    fcntl = None  # type: ignore
+    import msvcrt
+
 T = TypeVar("T", bound=Union[BaseModel, Mapping[Any, Any]])
 
 
@@ -28,18 +38,65 @@ class FileCache(Generic[T]):
         self.model_class = model_class
         self.lock = threading.RLock()
         self.cache: Dict[str, List[T]] = {}
+        # The identity of the file when it was last loaded or saved
+        self._file_stat: Optional[Tuple[int, int, int]] = None
+        self._file_lock_depth = 0
 
-        # Create file if it doesn't exist
-        if not self.filepath.exists():
-            self.filepath.parent.mkdir(parents=True, exist_ok=True)
-            self._save_cache({})
-        else:
-            self._load_cache()
+        self.filepath.parent.mkdir(parents=True, exist_ok=True)
+        with self.file_lock():
+            # Create file if it doesn't exist
+            if not self.filepath.exists():
+                self._save_cache({})
+            else:
+                self._load_cache()
+
+    @contextmanager
+    def file_lock(self) -> Iterator[None]:
+        """
+        Holds the lock of the cache file, shared by every process using the file, so that
+        reading the file, changing it and writing it back happen as one step. The lock is
+        reentrant within a thread, like `lock`.
+        """
+        with self.lock:
+            if self._file_lock_depth > 0:
+                self._file_lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._file_lock_depth -= 1
+                return
+
+            lock_path = self.filepath.with_name(f"{self.filepath.name}.lock")
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                self._file_lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._file_lock_depth = 0
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_UN)
+                    else:
+                        os.lseek(fd, 0, os.SEEK_SET)
+                        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+
+    def _get_file_stat(self) -> Tuple[int, int, int]:
+        # The file is replaced on every save, so its inode changes even within the
+        # resolution of the modification time
+        stat = self.filepath.stat()
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
 
     def _load_cache(self) -> None:
         """Load cache from file into memory"""
         with self.lock:
             try:
+                self._file_stat = self._get_file_stat()
                 json_string = self.filepath.read_text()
                 raw_dict = json.loads(json_string)
 
@@ -78,7 +135,23 @@ class FileCache(Generic[T]):
                     else:
                         raise ValueError(f"Unsupported type for cache value: {type(v)}")
 
-            self.filepath.write_text(json.dumps(serializable_dict, indent=2))
+            # Replace the file at once, so other processes never read a partial cache
+            tmp_path = self.filepath.with_name(
+                f"{self.filepath.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            tmp_path.write_text(json.dumps(serializable_dict, indent=2))
+            os.replace(tmp_path, self.filepath)
+            self._file_stat = self._get_file_stat()
+
+    def reload(self) -> None:
+        """Reload the cache from its file if another process changed it since it was last loaded or saved"""
+        with self.lock:
+            try:
+                file_stat = self._get_file_stat()
+            except FileNotFoundError:
+                return
+            if file_stat != self._file_stat:
+                self._load_cache()
 
     @overload
     def get(
@@ -107,9 +180,11 @@ class FileCache(Generic[T]):
         """
         Replace all values for a key with new value(s).
         If a single value is provided, it will be wrapped in a list.
+        The changes other processes saved to the file are kept.
         """
         hashed_key = self.hash(key)
-        with self.lock:
+        with self.file_lock():
+            self.reload()
             if isinstance(values, list):
                 self.cache[hashed_key] = values
             else:
@@ -120,9 +195,11 @@ class FileCache(Generic[T]):
         """
         Append a single value to the list of values for a key.
         Creates a new list if the key doesn't exist.
+        The changes other processes saved to the file are kept.
         """
         hashed_key = self.hash(key)
-        with self.lock:
+        with self.file_lock():
+            self.reload()
             if hashed_key not in self.cache:
                 self.cache[hashed_key] = []
             self.cache[hashed_key].append(value)
@@ -132,9 +209,11 @@ class FileCache(Generic[T]):
         """
         Delete cached value(s). If index is provided, only that item is deleted.
         If index is None, all items for the key are deleted.
+        The changes other processes saved to the file are kept.
         """
         hashed_key = self.hash(key)
-        with self.lock:
+        with self.file_lock():
+            self.reload()
             if hashed_key in self.cache:
                 if index is not None and 0 <= index < len(self.cache[hashed_key]):
                     del self.cache[hashed_key][index]
@@ -0,0 +1,55 @@
+import re
+from urllib.parse import parse_qsl, urlparse
+
+ID_PLACEHOLDER = "{id}"
+SLUG_PLACEHOLDER = "{slug}"
+
+UUID_PATTERN = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE
+)
+# Numbers, hashes and codes like "B08N5WRWNW", i.e. mixed letters and digits
+ID_PATTERN = re.compile(
+    r"^(\d+|(?=.*\d)[0-9a-f]{8,}|(?=.*\d)(?=.*[a-zA-Z])[a-zA-Z0-9_]{6,})$"
+)
+SLUG_WORD_PATTERN = re.compile(r"[-_]")
+MIN_SLUG_WORDS = 3
+
+
+def get_path_template(url: str) -> str:
+    """
+    Gets the route pattern of a URL by collapsing the path segments that identify a
+    specific resource, so that pages built from the same template share a key.
+
+    e.g. "https://shop.com/product/123/red-running-shoes-2024?ref=home" becomes
+    "/product/{id}/{slug}?ref"
+
+    Args:
+        url (str): The URL of the page.
+
+    Returns:
+        str: The path template, with the names of the query parameters but not their values.
+    """
+    parsed = urlparse(url)
+    segments = [
+        _collapse_segment(segment) for segment in parsed.path.split("/") if segment
+    ]
+    template = "/" + "/".join(segments)
+
+    query_keys = sorted({key for key, _ in parse_qsl(parsed.query)})
+    if query_keys:
+        template += "?" + "&".join(query_keys)
+
+    return template
+
+
+def _collapse_segment(segment: str) -> str:
+    if UUID_PATTERN.match(segment) or ID_PATTERN.match(segment):
+        return ID_PLACEHOLDER
+
+    words = [word for word in SLUG_WORD_PATTERN.split(segment) if word]
+    if len(words) >= MIN_SLUG_WORDS or (
+        len(words) > 1 and any(word.isdigit() for word in words)
+    ):
+        return SLUG_PLACEHOLDER
+
+    return segment
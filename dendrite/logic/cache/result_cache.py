@@ -0,0 +1,182 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Any, Dict, Optional, Tuple, Union
+
+from loguru import logger
+
+from dendrite.logic.code.json_schema import schema_hash
+from dendrite.logic.crawl.links import normalize_url
+from dendrite.models.dto.cached_result_dto import CachedResultDTO, ResultOperation
+
+
+class ResultCache:
+    """
+    In-memory cache of the results of `extract` and `ask`, so that asking the same thing
+    about a page whose content hasn't changed, e.g. when polling a dashboard or re-running
+    a job, returns instantly instead of running a script or calling a model again.
+
+    Results are keyed by the normalized URL of the page, the operation, the prompt, the
+    hash of the return schema and a fingerprint of the page content, so any change to the page
+    computes the result again. Enable it with `Config(result_cache=ResultCache())`.
+
+    Attributes:
+        ttl (Optional[float]): The number of seconds a result stays valid, or None to keep it until evicted.
+        max_entries (int): The maximum number of results kept, the least recently used are evicted first.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that had to compute the result.
+    """
+
+    def __init__(self, ttl: Optional[float] = 5 * 60, max_entries: int = 1000):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl (Optional[float]): The number of seconds a result stays valid, or None
+                to keep results until they are evicted. Defaults to 5 minutes.
+            max_entries (int): The maximum number of results to keep. Defaults to 1000.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # Results and the time they were stored, from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def key(
+        self,
+        url: str,
+        operation: ResultOperation,
+        prompt: str,
+        return_data_json_schema: Optional[Dict[str, Any]],
+        dom_fingerprint: str,
+    ) -> str:
+        """
+        Creates the key of a result.
+
+        Args:
+            url (str): The URL of the page.
+            operation (ResultOperation): Whether the result is of `ask` or `extract`, which
+                return different results for the same prompt.
+            prompt (str): The prompt of the request.
+            return_data_json_schema (Optional[Dict[str, Any]]): The schema of the result, if any.
+            dom_fingerprint (str): The fingerprint of the page content.
+
+        Returns:
+            str: The sha256 hash of the parts of the key.
+        """
+        parts = [
+            normalize_url(url),
+            operation,
+            prompt,
+            schema_hash(return_data_json_schema) if return_data_json_schema else "",
+            dom_fingerprint,
+        ]
+        return sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Gets a cached result, counting the lookup as a hit or a miss.
+
+        Args:
+            key (str): The key from `key`.
+
+        Returns:
+            Optional[Any]: A copy of the cached result, or None if it isn't cached or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[0]):
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        # The results are returned to the caller, which may modify them
+        return copy.deepcopy(entry[1])
+
+    def set(self, key: str, result: Any) -> None:
+        """
+        Stores a result, evicting the least recently used ones above `max_entries`.
+
+        Args:
+            key (str): The key from `key`.
+            result (Any): The result, which must not be None.
+        """
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all cached results and resets the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of lookups answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Gets the usage statistics of the cache.
+
+        Returns:
+            Dict[str, Union[int, float]]: The hits, misses, hit rate and number of entries.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self._entries),
+        }
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+
+def get_cached_result(
+    dto: CachedResultDTO, cache: Optional[ResultCache]
+) -> Optional[Any]:
+    if cache is None:
+        return None
+
+    key = cache.key(
+        dto.url,
+        dto.operation,
+        dto.prompt,
+        dto.return_data_json_schema,
+        dto.dom_fingerprint,
+    )
+    result = cache.get(key)
+    if result is not None:
+        logger.info(f"Reusing the cached result of '{dto.prompt}' on {dto.url}")
+    return result
+
+
+def cache_result(dto: CachedResultDTO, cache: Optional[ResultCache]) -> None:
+    if cache is None or dto.return_data is None:
+        return
+
+    key = cache.key(
+        dto.url,
+        dto.operation,
+        dto.prompt,
+        dto.return_data_json_schema,
+        dto.dom_fingerprint,
+    )
+    cache.set(key, dto.return_data)
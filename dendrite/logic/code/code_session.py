@@ -3,19 +3,43 @@ import re  # Important to keep since it is used inside the scripts
 import sys
 import traceback
 from datetime import datetime  # Important to keep since it is used inside the scripts
-from typing import Any, List, Optional
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Hashable, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
-from jsonschema import validate
+from bs4 import BeautifulSoup, Tag
 from loguru import logger
 
 from ..dom.truncate import truncate_long_string
+from .json_schema import validate_json
+
+
+# The number of compiled scripts kept, cached scripts are run many times on a hot path
+COMPILED_SCRIPTS_CACHE_SIZE = 256
 
 
 class InterpreterError(Exception):
     pass
 
 
+@lru_cache(maxsize=COMPILED_SCRIPTS_CACHE_SIZE)
+def compile_script(code: str) -> CodeType:
+    """
+    Compiles a script once, the compiled code is reused for every later run of the same
+    script.
+
+    Args:
+        code (str): The source of the script.
+
+    Returns:
+        CodeType: The compiled script.
+
+    Raises:
+        SyntaxError: If the script isn't valid Python.
+    """
+    return compile(code, "<string>", "exec")
+
+
 def custom_exec(
     cmd,
     globals=None,
@@ -68,7 +92,7 @@ class CodeSession:
             copied_vars = self.local_vars.copy()
 
             try:
-                exec(code, globals(), copied_vars)
+                exec(compile_script(code), globals(), copied_vars)
             except SyntaxError as err:
                 error_class = err.__class__.__name__
                 detail = err.args[0]
@@ -100,10 +124,7 @@ class CodeSession:
     def validate_response(self, return_data_json_schema: Any, response_data: Any):
         if return_data_json_schema != None:
             try:
-                validate(
-                    instance=response_data,
-                    schema=return_data_json_schema,
-                )
+                validate_json(response_data, return_data_json_schema)
             except Exception as e:
                 raise e
 
@@ -144,9 +165,82 @@ class CodeSession:
         return response
 
 
-def execute(script: str, raw_html: str, return_data_json_schema) -> Any:
+class ParsedPage:
+    """
+    A page parsed once to run several scripts against it, e.g. when testing the cached
+    scripts of a prompt.
+
+    Every script gets the same soup. Before handing it to the next script, a fingerprint
+    of the tree is compared to the one taken after parsing, and the page is only parsed
+    again if the previous script modified the soup. Fingerprinting is several times
+    cheaper than parsing.
+    """
+
+    def __init__(self, raw_html: str):
+        self.raw_html = raw_html
+        self._soup: Optional[BeautifulSoup] = None
+        self._fingerprint: Optional[int] = None
+        self._handed_out = False
+
+    def get_soup(self) -> BeautifulSoup:
+        """
+        Gets a soup of the page that no previous script has modified.
+
+        Returns:
+            BeautifulSoup: The parsed page.
+        """
+        if self._soup is not None and self._handed_out:
+            if tree_fingerprint(self._soup) != self._fingerprint:
+                logger.debug("A script modified the page, parsing it again")
+                self._soup = None
+
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.raw_html, "lxml")
+            self._fingerprint = tree_fingerprint(self._soup)
+
+        self._handed_out = True
+        return self._soup
+
+
+def tree_fingerprint(soup: BeautifulSoup) -> int:
+    """Hashes the tags, attributes and strings of a soup, in document order."""
+
+    def node_key(node: Any) -> Hashable:
+        if isinstance(node, Tag):
+            attrs: Tuple[Any, ...] = tuple(
+                (name, tuple(value) if isinstance(value, list) else value)
+                for name, value in node.attrs.items()
+            )
+            return (node.name, attrs, len(node.contents))
+        return str(node)
+
+    return hash(tuple(node_key(node) for node in soup.descendants))
+
+
+def execute(
+    script: str,
+    raw_html: str,
+    return_data_json_schema,
+    parsed_page: Optional[ParsedPage] = None,
+) -> Any:
+    """
+    Runs a script on a page and validates its `response_data`.
+
+    Args:
+        script (str): The script to run.
+        raw_html (str): The html of the page.
+        return_data_json_schema: The JSON schema the response data must match, if any.
+        parsed_page (Optional[ParsedPage]): The already parsed page, to avoid parsing
+            `raw_html` again when running several scripts on it.
+
+    Returns:
+        Any: The response data of the script.
+    """
     code_session = CodeSession()
-    soup = BeautifulSoup(raw_html, "lxml")
+    if parsed_page is not None:
+        soup = parsed_page.get_soup()
+    else:
+        soup = BeautifulSoup(raw_html, "lxml")
     try:
 
         created_variables = code_session.exec_code(script, soup, raw_html)
@@ -164,3 +258,46 @@ def execute(script: str, raw_html: str, return_data_json_schema) -> Any:
             raise Exception("No return data available for this script.")
     except Exception as e:
         raise e
+
+
+def run_generated_script(
+    script: str,
+    raw_html: str,
+    soup: BeautifulSoup,
+    return_data_json_schema: Any,
+    prompt: str,
+    attempts: int,
+    max_attempts: int,
+) -> Tuple[Any, str]:
+    """
+    Runs a script written by the extract agent and describes its variables, so that the
+    agent can check them against the prompt.
+
+    Args:
+        script (str): The generated script.
+        raw_html (str): The html of the page.
+        soup (BeautifulSoup): The parsed page.
+        return_data_json_schema (Any): The JSON schema the response data must match, if any.
+        prompt (str): The prompt the script was written for.
+        attempts (int): The number of scripts the agent has written so far.
+        max_attempts (int): The number of scripts the agent may write.
+
+    Returns:
+        Tuple[Any, str]: The response data of the script and the description of its variables.
+
+    Raises:
+        Exception: If the script failed, or its response data is missing or invalid.
+    """
+    code_session = CodeSession()
+    variables = code_session.exec_code(script, soup, raw_html)
+
+    if "response_data" not in variables:
+        raise Exception("You need to add the variable 'response_data'")
+
+    response_data = variables["response_data"]
+    if return_data_json_schema:
+        code_session.validate_response(return_data_json_schema, response_data)
+
+    return response_data, code_session.llm_readable_exec_res(
+        variables, prompt, attempts, max_attempts
+    )
@@ -0,0 +1,69 @@
+import json
+import threading
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Any, Dict
+
+from jsonschema.exceptions import best_match
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
+
+# The number of validators kept, one per distinct schema
+VALIDATOR_CACHE_SIZE = 128
+
+_validators: "OrderedDict[str, Validator]" = OrderedDict()
+_validators_lock = threading.Lock()
+
+
+def schema_hash(schema: Dict[str, Any]) -> str:
+    """Hashes a JSON schema independently of the order of its keys."""
+    serialized = json.dumps(schema, sort_keys=True, default=str)
+    return sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def get_validator(schema: Dict[str, Any]) -> Validator:
+    """
+    Gets the validator of a JSON schema, checking the schema against its metaschema and
+    building the validator only the first time the schema is seen.
+
+    Args:
+        schema (Dict[str, Any]): The JSON schema.
+
+    Returns:
+        Validator: The `Draft*Validator` of the schema's version.
+
+    Raises:
+        jsonschema.exceptions.SchemaError: If the schema is invalid.
+    """
+    key = schema_hash(schema)
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is not None:
+            _validators.move_to_end(key)
+            return validator
+
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    validator = cls(schema)
+
+    with _validators_lock:
+        _validators[key] = validator
+        while len(_validators) > VALIDATOR_CACHE_SIZE:
+            _validators.popitem(last=False)
+    return validator
+
+
+def validate_json(instance: Any, schema: Dict[str, Any]) -> None:
+    """
+    Same as `jsonschema.validate`, but with the validator from `get_validator`.
+
+    Args:
+        instance (Any): The data to validate.
+        schema (Dict[str, Any]): The JSON schema.
+
+    Raises:
+        jsonschema.exceptions.ValidationError: With the most relevant error if the data is invalid.
+    """
+    error = best_match(get_validator(schema).iter_errors(instance))
+    if error is not None:
+        raise error
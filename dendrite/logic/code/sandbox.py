@@ -0,0 +1,406 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    import resource
+except ImportError:  # Windows, where the limits aren't available
+    resource = None  # type: ignore
+
+from .code_session import (
+    InterpreterError,
+    ParsedPage,
+    execute,
+    run_generated_script,
+)
+
+
+# The seconds a spawned worker may take to import its modules
+WORKER_STARTUP_TIMEOUT = 120.0
+
+
+class ScriptTimeoutError(InterpreterError):
+    pass
+
+
+class ScriptResourceError(InterpreterError):
+    pass
+
+
+class SharedPage:
+    """
+    The html of a page written once to shared memory, so that the workers of a
+    `ScriptSandbox` can read it without it being pickled for every script.
+
+    Use it as a context manager, the shared memory is freed when it exits.
+    """
+
+    def __init__(self, raw_html: str):
+        data = raw_html.encode("utf-8")
+        self.size = len(data)
+        self._shm = SharedMemory(create=True, size=max(1, self.size))
+        self._shm.buf[: self.size] = data
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def close(self) -> None:
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SharedPage":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class _Worker:
+    def __init__(self, process: multiprocessing.process.BaseProcess, conn: Connection):
+        self.process = process
+        self.conn = conn
+        self.ready = False
+
+    def wait_until_ready(self) -> None:
+        """Waits for the worker to finish starting, so that its startup doesn't count as run time."""
+        if self.ready:
+            return
+        if not self.conn.poll(WORKER_STARTUP_TIMEOUT):
+            raise ScriptResourceError("The script worker failed to start")
+        self.conn.recv()
+        self.ready = True
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ScriptSandbox:
+    """
+    Runs generated scripts in a pool of pre-started worker processes instead of in the
+    calling process, so that a slow or runaway script can't block the event loop and
+    several pages can be processed on several cores. This covers both the cached scripts
+    and the scripts the extract agent is still writing.
+
+    Each run is limited in wall time, after which its worker is killed and replaced, and,
+    where the platform supports it, in CPU time and memory.
+
+    Enable it with `Config(script_sandbox=ScriptSandbox())`.
+
+    Attributes:
+        timeout (float): The seconds a script may run before its worker is killed.
+        cpu_time_limit (Optional[float]): The seconds of CPU time a script may use.
+        memory_limit_mb (Optional[int]): The address space a worker may use, in megabytes.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        timeout: float = 30.0,
+        cpu_time_limit: Optional[float] = 20.0,
+        memory_limit_mb: Optional[int] = 2048,
+    ):
+        """
+        Initialize the sandbox and start its workers.
+
+        The workers are spawned rather than forked, since the calling process usually runs
+        an event loop and browser connections, so starting them takes a few seconds.
+
+        Args:
+            workers (Optional[int]): The number of worker processes. Defaults to the number of CPUs.
+            timeout (float): The seconds a script may run. Defaults to 30.
+            cpu_time_limit (Optional[float]): The seconds of CPU time a script may use,
+                or None for no limit. Defaults to 20.
+            memory_limit_mb (Optional[int]): The address space of a worker in megabytes,
+                or None for no limit. Defaults to 2048.
+        """
+        self.timeout = timeout
+        self.cpu_time_limit = cpu_time_limit
+        self.memory_limit_mb = memory_limit_mb
+
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for _ in range(workers or os.cpu_count() or 1):
+            self._idle.put(self._start_worker())
+
+    def share_page(self, raw_html: str) -> SharedPage:
+        """
+        Writes a page to shared memory for the scripts that will run on it.
+
+        Args:
+            raw_html (str): The html of the page.
+
+        Returns:
+            SharedPage: The shared page, to be closed once the scripts are done.
+        """
+        return SharedPage(raw_html)
+
+    def run(self, script: str, page: SharedPage, return_data_json_schema: Any) -> Any:
+        """
+        Runs a script on a page in a worker, blocking until it is done.
+
+        Args:
+            script (str): The script to run.
+            page (SharedPage): The page from `share_page`.
+            return_data_json_schema (Any): The JSON schema the response data must match, if any.
+
+        Returns:
+            Any: The response data of the script.
+
+        Raises:
+            ScriptTimeoutError: If the script ran longer than `timeout`.
+            ScriptResourceError: If the worker died, e.g. by exceeding its limits.
+            Exception: If the script failed, like `execute`.
+        """
+        return self._call(page, _execute, script, return_data_json_schema)
+
+    def run_generated(
+        self,
+        script: str,
+        page: SharedPage,
+        return_data_json_schema: Any,
+        prompt: str,
+        attempts: int,
+        max_attempts: int,
+    ) -> Tuple[Any, str]:
+        """
+        Runs a script written by the extract agent in a worker, like `run_generated_script`,
+        blocking until it is done.
+
+        Returns:
+            Tuple[Any, str]: The response data of the script and the description of its variables.
+
+        Raises:
+            ScriptTimeoutError: If the script ran longer than `timeout`.
+            ScriptResourceError: If the worker died, e.g. by exceeding its limits.
+            Exception: If the script failed, like `run_generated_script`.
+        """
+        return self._call(
+            page,
+            _run_generated,
+            script,
+            return_data_json_schema,
+            prompt,
+            attempts,
+            max_attempts,
+        )
+
+    async def execute(
+        self, script: str, page: SharedPage, return_data_json_schema: Any
+    ) -> Any:
+        """Same as `run`, without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.run, script, page, return_data_json_schema)
+        )
+
+    async def execute_generated(
+        self,
+        script: str,
+        page: SharedPage,
+        return_data_json_schema: Any,
+        prompt: str,
+        attempts: int,
+        max_attempts: int,
+    ) -> Tuple[Any, str]:
+        """Same as `run_generated`, without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            functools.partial(
+                self.run_generated,
+                script,
+                page,
+                return_data_json_schema,
+                prompt,
+                attempts,
+                max_attempts,
+            ),
+        )
+
+    def _call(self, page: SharedPage, function: Callable[..., Any], *args: Any) -> Any:
+        if self._closed:
+            raise RuntimeError("The script sandbox is closed")
+
+        worker = self._idle.get()
+        try:
+            worker.wait_until_ready()
+            # The function is pickled by name and called with the parsed page in the worker
+            worker.conn.send(
+                (page.name, page.size, self.cpu_time_limit, function, args)
+            )
+            if not worker.conn.poll(self.timeout):
+                logger.warning(
+                    f"Script ran for more than {self.timeout} seconds, killing its worker"
+                )
+                worker = self._replace_worker(worker)
+                raise ScriptTimeoutError(
+                    f"Script timed out after {self.timeout} seconds"
+                )
+            status, value = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            worker = self._replace_worker(worker)
+            raise ScriptResourceError(f"The worker running the script died: {e}")
+        finally:
+            self._idle.put(worker)
+
+        if status == "error":
+            raise Exception(value)
+        return value
+
+    def close(self) -> None:
+        """Stops all workers."""
+        with self._lock:
+            self._closed = True
+            for worker in self._workers:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+                worker.process.join(timeout=1)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                worker.conn.close()
+            self._workers = []
+
+    def _start_worker(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.memory_limit_mb),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+
+        worker = _Worker(process, parent_conn)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _replace_worker(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        return self._start_worker()
+
+
+class _CPUTimeLimitExceeded(Exception):
+    pass
+
+
+def _raise_cpu_time_limit(signum, frame):
+    raise _CPUTimeLimitExceeded("Script exceeded its CPU time limit")
+
+
+def _worker_main(conn: Connection, memory_limit_mb: Optional[int]) -> None:
+    if resource is not None:
+        if memory_limit_mb is not None:
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        signal.signal(signal.SIGXCPU, _raise_cpu_time_limit)
+
+    # The scripts of a page usually run one after the other, so the last page is kept parsed
+    last_page: Optional[Tuple[str, ParsedPage]] = None
+
+    conn.send("ready")
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if request is None:
+            return
+
+        page_name, size, cpu_time_limit, function, args = request
+        try:
+            if last_page is None or last_page[0] != page_name:
+                last_page = (page_name, ParsedPage(_read_shared_page(page_name, size)))
+
+            with _cpu_time_limit(cpu_time_limit):
+                res = function(last_page[1], *args)
+            conn.send(("ok", res))
+        except BaseException as e:
+            if isinstance(e, MemoryError):
+                last_page = None
+            try:
+                conn.send(("error", str(e)))
+            except Exception:
+                return
+
+
+def _execute(parsed_page: ParsedPage, script: str, return_data_json_schema: Any) -> Any:
+    return execute(script, parsed_page.raw_html, return_data_json_schema, parsed_page)
+
+
+def _run_generated(
+    parsed_page: ParsedPage,
+    script: str,
+    return_data_json_schema: Any,
+    prompt: str,
+    attempts: int,
+    max_attempts: int,
+) -> Tuple[Any, str]:
+    return run_generated_script(
+        script,
+        parsed_page.raw_html,
+        parsed_page.get_soup(),
+        return_data_json_schema,
+        prompt,
+        attempts,
+        max_attempts,
+    )
+
+
+def _read_shared_page(name: str, size: int) -> str:
+    # The spawned workers share the resource tracker of the parent, which owns the page
+    # and unlinks it when the scripts are done
+    shm = SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[:size]).decode("utf-8")
+    finally:
+        shm.close()
+
+
+class _cpu_time_limit:
+    """Limits the CPU time of the worker for a run, on top of the time already used."""
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self.previous: Optional[Tuple[int, int]] = None
+
+    def __enter__(self) -> None:
+        if resource is None or self.seconds is None:
+            return
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        used = usage.ru_utime + usage.ru_stime
+        self.previous = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = int(used + self.seconds) + 1
+        hard = self.previous[1]
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+    def __exit__(self, *args) -> None:
+        if resource is not None and self.previous is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, self.previous)
@@ -4,6 +4,9 @@ from typing import Optional, Union
 from playwright.async_api import StorageState
 
 from dendrite.logic.cache.file_cache import FileCache
+from dendrite.logic.cache.result_cache import ResultCache
+from dendrite.logic.code.sandbox import ScriptSandbox
+from dendrite.logic.extract.generation_lock import GenerationLock
 from dendrite.logic.llm.config import LLMConfig
 from dendrite.models.scripts import Script
 from dendrite.models.selector import Selector
@@ -23,6 +26,13 @@ class Config:
         element_cache (FileCache): Cache for element selectors
         storage_cache (FileCache): Cache for browser storage states
         auth_session_path (Path): Path to authentication session data
+        early_exit_segment_search (bool): Whether to stop the segment search once a confident match is found
+        skip_select_agent_when_confident (bool): Whether to accept a confident segment match without the select agent
+        skip_select_agent_when_unambiguous (bool): Whether to accept the only element found by the segment agent without the select agent
+        check_fast_path_match (bool): Whether matches accepted without the select agent must pass a local sanity check
+        script_sandbox (Optional[ScriptSandbox]): The worker processes to run cached and generated scripts in, None to run them in-process
+        result_cache (Optional[ResultCache]): The cache of the results of extract and ask on unchanged pages, None to disable it
+        generation_lock (Optional[GenerationLock]): The locks making sure a script is only generated once, None to only coordinate this process
     """
 
     def __init__(
@@ -31,6 +41,13 @@ class Config:
         cache_path: Union[str, Path] = "cache",
         auth_session_path: Union[str, Path] = "auth",
         llm_config: Optional[LLMConfig] = None,
+        early_exit_segment_search: bool = True,
+        skip_select_agent_when_confident: bool = False,
+        skip_select_agent_when_unambiguous: bool = False,
+        check_fast_path_match: bool = True,
+        script_sandbox: Optional[ScriptSandbox] = None,
+        result_cache: Optional[ResultCache] = None,
+        generation_lock: Optional[GenerationLock] = None,
     ):
         """
         Initialize the Config with specified paths and LLM configuration.
@@ -44,6 +61,24 @@ class Config:
                 sessions relative to root_path. Defaults to "auth".
             llm_config (Optional[LLMConfig]): Configuration for language models.
                 If None, creates a default LLMConfig instance.
+            early_exit_segment_search (bool): Whether to cancel the remaining segment agent
+                calls once one of them returns a confident match. Defaults to True.
+            skip_select_agent_when_confident (bool): Whether to return a confident segment
+                match directly instead of confirming it with the select agent. Defaults to False.
+            skip_select_agent_when_unambiguous (bool): Whether to return the element directly
+                when the segment agent found a single element across all segments.
+                Defaults to False.
+            check_fast_path_match (bool): Whether an element returned without the select agent
+                must be visible, enabled and share a word with the prompt. Defaults to True.
+            script_sandbox (Optional[ScriptSandbox]): Worker processes with time and resource
+                limits to run the cached and generated scripts in. Defaults to None, running
+                them in-process.
+            result_cache (Optional[ResultCache]): Cache of the results of `extract` and `ask`,
+                reused while the content of the page doesn't change. Defaults to None.
+            generation_lock (Optional[GenerationLock]): Locks letting a single extraction
+                generate the script of a page and prompt while the others wait for it, e.g.
+                a `FileGenerationLock` shared by the processes of a host. Defaults to None,
+                which only coordinates the extractions of this process.
         """
         self.cache_path = root_path / Path(cache_path)
         self.llm_config = llm_config or LLMConfig()
@@ -53,3 +88,10 @@ class Config:
             StorageState, self.cache_path / "storage_state.json"
         )
         self.auth_session_path = root_path / Path(auth_session_path)
+        self.early_exit_segment_search = early_exit_segment_search
+        self.skip_select_agent_when_confident = skip_select_agent_when_confident
+        self.skip_select_agent_when_unambiguous = skip_select_agent_when_unambiguous
+        self.check_fast_path_match = check_fast_path_match
+        self.script_sandbox = script_sandbox
+        self.result_cache = result_cache
+        self.generation_lock = generation_lock
@@ -0,0 +1,45 @@
+from collections import deque
+from typing import Deque, Iterator, Set
+
+from .links import normalize_url
+
+
+class CrawlFrontier:
+    """
+    The queue of URLs a crawl has left to visit.
+
+    Every URL is queued at most once, compared by `normalize_url`, and at most `max_pages`
+    are queued in total. It is iterated lazily, so it can be iterated while URLs found on
+    the visited pages are still being added.
+    """
+
+    def __init__(self, max_pages: int):
+        self.max_pages = max_pages
+        self._queue: Deque[str] = deque()
+        self._seen: Set[str] = set()
+
+    def add(self, url: str) -> bool:
+        """
+        Queues a URL unless it was already queued or the limit of pages is reached.
+
+        Returns:
+            bool: Whether the URL was queued.
+        """
+        normalized = normalize_url(url)
+        if normalized in self._seen or len(self._seen) >= self.max_pages:
+            return False
+
+        self._seen.add(normalized)
+        self._queue.append(url)
+        return True
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        if not self._queue:
+            raise StopIteration
+        return self._queue.popleft()
+
+    def __len__(self) -> int:
+        return len(self._queue)
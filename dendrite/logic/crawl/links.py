@@ -0,0 +1,144 @@
+from typing import List, Optional, Union
+from urllib.parse import urljoin, urlparse, urlunparse
+
+import tldextract
+from bs4 import BeautifulSoup, Tag
+
+from dendrite.logic.extract.compress_html import CompressHTML
+
+FOLLOWABLE_SCHEMES = ("http", "https")
+
+# Lists inside these elements are menus repeated on every page, not the items of a list page
+NAVIGATION_TAGS = {"nav", "header", "footer"}
+NAVIGATION_ROLES = {"navigation", "banner", "contentinfo", "menu", "menubar"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so that the different spellings of a page compare equal, by
+    lowercasing the scheme and host, removing default ports, the fragment and a
+    trailing slash of the path.
+
+    Args:
+        url (str): The URL to normalize.
+
+    Returns:
+        str: The normalized URL.
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    netloc = parsed.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (
+        scheme == "https" and netloc.endswith(":443")
+    ):
+        netloc = netloc.rsplit(":", 1)[0]
+
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse((scheme, netloc, path, parsed.params, parsed.query, ""))
+
+
+def get_site(url: str) -> str:
+    """
+    Gets the registered domain of a URL, e.g. "example.co.uk" for
+    "https://shop.example.co.uk/", or its host when it has no public suffix, like
+    "localhost" or an IP address.
+    """
+    parsed = tldextract.extract(url)
+    if parsed.suffix:
+        return f"{parsed.domain}.{parsed.suffix}"
+    return (urlparse(url).hostname or "").lower()
+
+
+def resolve_link(href: Optional[Union[str, List[str]]], base_url: str) -> Optional[str]:
+    """
+    Resolves the href of a link against the URL of its page.
+
+    Returns:
+        Optional[str]: The absolute URL without its fragment, or None if the link
+            can't be followed, e.g. a "javascript:" or "mailto:" link.
+    """
+    if not isinstance(href, str) or not href.strip() or href.startswith("#"):
+        return None
+
+    url = urljoin(base_url, href.strip())
+    if urlparse(url).scheme not in FOLLOWABLE_SCHEMES:
+        return None
+    return url.split("#", 1)[0]
+
+
+def find_list_links(soup: Union[BeautifulSoup, Tag], base_url: str) -> List[str]:
+    """
+    Finds the links of the repeating elements of a page, e.g. the products of a category
+    or the results of a search, with the list detection of `CompressHTML`.
+
+    `CompressHTML` only keeps the first elements of a list it collapses, so the links
+    are collected from every element of the list's parent with the same tag. Lists in
+    the navigation, header or footer of the page are ignored, since detail pages usually
+    have them too.
+
+    Args:
+        soup (Union[BeautifulSoup, Tag]): The soup of the page, with dendrite ids.
+        base_url (str): The URL of the page, to resolve relative links.
+
+    Returns:
+        List[str]: The absolute URLs of the first link of each element, in page order and without duplicates.
+    """
+    compressor = CompressHTML(soup, ids_to_expand=[])
+    compressor.get_html_display()
+
+    links: List[str] = []
+    seen = set()
+    for followable_list in compressor.get_lists_with_followable_urls():
+        parent = soup.find(attrs={"d-id": followable_list["parent_element_d_id"]})
+        first = soup.find(attrs={"d-id": followable_list["first_element_d_id"]})
+        if not isinstance(parent, Tag) or not isinstance(first, Tag):
+            continue
+        if is_in_navigation(parent):
+            continue
+
+        for element in parent.find_all(first.name, recursive=False):
+            link = element if element.name == "a" else element.find("a", href=True)
+            if not isinstance(link, Tag):
+                continue
+            url = resolve_link(link.get("href"), base_url)
+            if url is not None and normalize_url(url) not in seen:
+                seen.add(normalize_url(url))
+                links.append(url)
+
+    return links
+
+
+def is_in_navigation(tag: Tag) -> bool:
+    """Whether an element is part of the navigation, header or footer of its page."""
+    for element in [tag, *tag.parents]:
+        role = element.get("role")
+        if element.name in NAVIGATION_TAGS or (
+            isinstance(role, str) and role.lower() in NAVIGATION_ROLES
+        ):
+            return True
+    return False
+
+
+def find_next_page_link(
+    soup: Union[BeautifulSoup, Tag], base_url: str
+) -> Optional[str]:
+    """
+    Finds the next page of a paginated list from the links marked with rel="next",
+    which don't need the page to be searched by an agent.
+
+    Args:
+        soup (Union[BeautifulSoup, Tag]): The soup of the page.
+        base_url (str): The URL of the page, to resolve relative links.
+
+    Returns:
+        Optional[str]: The absolute URL of the next page, or None if none is marked.
+    """
+    for tag in soup.find_all(["a", "link"], href=True):
+        rel = tag.get("rel") or []
+        if isinstance(rel, str):
+            rel = rel.split()
+        if "next" in [value.lower() for value in rel]:
+            url = resolve_link(tag.get("href"), base_url)
+            if url is not None:
+                return url
+    return None
@@ -0,0 +1,234 @@
+import re
+from typing import List, Optional, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+from dendrite.logic.dom.css import (
+    check_if_selector_successful,
+    check_unique_attribute,
+    find_selector_with_parent,
+    find_unique_class_combination,
+)
+from dendrite.models.selector import SelectorVariant
+
+# Selectors with this prefix are XPath expressions instead of CSS selectors
+XPATH_PREFIX = "xpath="
+
+# How likely a selector built from each attribute is to survive changes to the page
+ATTRIBUTE_STABILITY = {
+    "data-testid": 0.95,
+    "data-test-id": 0.95,
+    "data-test": 0.95,
+    "data-cy": 0.95,
+    "data-qa": 0.95,
+    "id": 0.9,
+    "name": 0.85,
+    "aria-label": 0.8,
+    "for": 0.75,
+    "placeholder": 0.7,
+    "href": 0.65,
+    "alt": 0.65,
+    "title": 0.65,
+    "aria-labelledby": 0.6,
+    "role": 0.5,
+}
+CLASS_STABILITY = 0.5
+TEXT_STABILITY = 0.75
+STRUCTURAL_STABILITY = 0.45
+NTH_CHILD_STABILITY = 0.3
+XPATH_STABILITY = 0.2
+
+# Values like "input-4821", ":r1:" or "css-1a2b3c4d" are usually generated per build or render
+GENERATED_VALUE_PATTERN = re.compile(
+    r"\d{3,}|^:r[0-9a-z]*:$|(?=[a-z]*\d)[0-9a-f]{6,}", re.IGNORECASE
+)
+GENERATED_VALUE_PENALTY = 0.5
+
+MAX_TEXT_LENGTH = 50
+# Attributes that name an element to assistive technologies, used when it has no text
+ACCESSIBLE_NAME_ATTRIBUTES = ["aria-label", "title", "alt", "placeholder"]
+
+
+def get_selector_variants(ele: Tag, soup: BeautifulSoup) -> List[SelectorVariant]:
+    """
+    Builds several selectors for an element with different strategies, so that a cached
+    element can still be found when the page changes in a way that breaks some of them.
+
+    The variants are an attribute-based CSS selector, a text or accessible name XPath,
+    a structural CSS selector anchored on the closest identifiable ancestor and a
+    positional XPath, each with an estimate of how stable it is.
+
+    Args:
+        ele (Tag): The element to build the selectors of.
+        soup (BeautifulSoup): The soup of the page, used to check the selectors are unique.
+
+    Returns:
+        List[SelectorVariant]: The unique variants, ordered from the least to the most stable.
+    """
+    # Inherently unique elements
+    if ele.name in ["html", "head", "body"]:
+        return [SelectorVariant(selector=ele.name, strategy="attribute", stability=1.0)]
+
+    candidates = [
+        _attribute_variant(ele, soup),
+        _text_variant(ele, soup),
+        _structural_variant(ele, soup),
+        _xpath_variant(ele, soup),
+    ]
+
+    variants: List[SelectorVariant] = []
+    for variant in candidates:
+        if variant is not None and all(
+            variant.selector != other.selector for other in variants
+        ):
+            variants.append(variant)
+
+    return sorted(variants, key=lambda variant: variant.stability)
+
+
+def _value_stability(stability: float, value: str) -> float:
+    if GENERATED_VALUE_PATTERN.search(value):
+        return stability * GENERATED_VALUE_PENALTY
+    return stability
+
+
+def _attribute_variant(ele: Tag, soup: BeautifulSoup) -> Optional[SelectorVariant]:
+    best: Optional[SelectorVariant] = None
+    for attr, stability in ATTRIBUTE_STABILITY.items():
+        value = ele.get(attr)
+        if not isinstance(value, str) or not value:
+            continue
+
+        stability = _value_stability(stability, value)
+        if best is not None and best.stability >= stability:
+            continue
+
+        if selector := check_unique_attribute(ele, soup, attr, ele.name):
+            best = SelectorVariant(
+                selector=selector, strategy="attribute", stability=stability
+            )
+
+    if best is None or best.stability < CLASS_STABILITY:
+        if selector := find_unique_class_combination(ele, soup):
+            stability = _value_stability(CLASS_STABILITY, selector)
+            if best is None or stability > best.stability:
+                best = SelectorVariant(
+                    selector=selector, strategy="attribute", stability=stability
+                )
+
+    return best
+
+
+def _text_variant(ele: Tag, soup: BeautifulSoup) -> Optional[SelectorVariant]:
+    # Same as XPath's normalize-space(.)
+    text = " ".join(ele.get_text().split())
+    if text and len(text) <= MAX_TEXT_LENGTH:
+        same_text = [
+            tag
+            for tag in soup.find_all(ele.name)
+            if " ".join(tag.get_text().split()) == text
+        ]
+        if len(same_text) == 1:
+            return SelectorVariant(
+                selector=f"{XPATH_PREFIX}//{ele.name}[normalize-space(.)={xpath_literal(text)}]",
+                strategy="text",
+                stability=TEXT_STABILITY,
+            )
+
+    for attr in ACCESSIBLE_NAME_ATTRIBUTES:
+        value = ele.get(attr)
+        if not isinstance(value, str) or not value or len(value) > MAX_TEXT_LENGTH:
+            continue
+        if len(soup.find_all(ele.name, attrs={attr: value})) == 1:
+            return SelectorVariant(
+                selector=f"{XPATH_PREFIX}//{ele.name}[@{attr}={xpath_literal(value)}]",
+                strategy="text",
+                stability=_value_stability(TEXT_STABILITY, value),
+            )
+
+    return None
+
+
+def _structural_variant(ele: Tag, soup: BeautifulSoup) -> Optional[SelectorVariant]:
+    selector = find_selector_with_parent(ele, soup)
+    if not check_if_selector_successful(selector, soup, True):
+        return None
+
+    stability = (
+        NTH_CHILD_STABILITY if ":nth-child" in selector else STRUCTURAL_STABILITY
+    )
+    return SelectorVariant(
+        selector=selector, strategy="structural", stability=stability
+    )
+
+
+def _xpath_variant(ele: Tag, soup: BeautifulSoup) -> Optional[SelectorVariant]:
+    """
+    Builds the positional path of the element from the root of its document, if no
+    other document of the page has an element at the same path.
+    """
+    steps: List[Tuple[str, Optional[int]]] = []
+    current: Tag = ele
+    while True:
+        parent = current.parent
+        siblings = (
+            parent.find_all(current.name, recursive=False) if parent is not None else []
+        )
+        position = None
+        if len(siblings) > 1:
+            # Tags compare equal by content, so the position is found by identity
+            position = next(i for i, tag in enumerate(siblings) if tag is current) + 1
+        steps.insert(0, (current.name, position))
+
+        # Stop at the root of the page or of the iframe the element is in
+        if (
+            parent is None
+            or isinstance(parent, BeautifulSoup)
+            or parent.get("iframe-path") != current.get("iframe-path")
+        ):
+            break
+        current = parent
+
+    if current.name != "html":
+        return None
+
+    # The path is evaluated in the page and in every iframe, so it must only match once
+    # among all of them, or it could select an element of another frame
+    if _count_path_matches(soup.find_all("html"), steps) != 1:
+        return None
+
+    path = "/".join(
+        name if position is None else f"{name}[{position}]" for name, position in steps
+    )
+    return SelectorVariant(
+        selector=f"{XPATH_PREFIX}/{path}",
+        strategy="xpath",
+        stability=XPATH_STABILITY,
+    )
+
+
+def _count_path_matches(
+    roots: List[Tag], steps: List[Tuple[str, Optional[int]]]
+) -> int:
+    """Counts the elements a positional path matches from the roots of the documents."""
+    matches = [root for root in roots if root.name == steps[0][0]]
+    for name, position in steps[1:]:
+        children: List[Tag] = []
+        for tag in matches:
+            same_name = tag.find_all(name, recursive=False)
+            if position is None:
+                children.extend(same_name)
+            elif position <= len(same_name):
+                children.append(same_name[position - 1])
+        matches = children
+    return len(matches)
+
+
+def xpath_literal(value: str) -> str:
+    """Quotes a string for an XPath expression, which has no escape sequences."""
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split("'")
+    return "concat(" + ', "\'", '.join(f"'{part}'" for part in parts) + ")"
@@ -0,0 +1,117 @@
+from typing import Any, Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup, Comment, Doctype, NavigableString, Tag
+
+from dendrite.logic.dom.strip import mild_strip_in_place
+
+ELEMENT_NODE = 1
+TEXT_NODE = 3
+CDATA_SECTION_NODE = 4
+COMMENT_NODE = 8
+DOCUMENT_NODE = 9
+DOCUMENT_TYPE_NODE = 10
+
+
+def snapshot_to_soup(snapshot: Dict[str, Any]) -> BeautifulSoup:
+    """
+    Builds a BeautifulSoup tree from the result of the CDP `DOMSnapshot.captureSnapshot` command.
+
+    The first document in the snapshot is the main frame. The documents of same-process
+    iframes are built the same way and merged in place of their iframe element, like
+    `expand_iframes` does for the `content()` based capture.
+
+    Args:
+        snapshot (Dict[str, Any]): The raw `DOMSnapshot.captureSnapshot` response.
+
+    Returns:
+        BeautifulSoup: The parsed DOM of the main frame with its iframes expanded.
+    """
+    strings: List[str] = snapshot["strings"]
+    documents: List[Dict[str, Any]] = snapshot["documents"]
+
+    if len(documents) == 0:
+        return BeautifulSoup("", "lxml")
+
+    return _build_document(0, documents, strings)
+
+
+def _get_string(strings: List[str], index: int) -> str:
+    return strings[index] if index >= 0 else ""
+
+
+def _build_document(
+    document_index: int, documents: List[Dict[str, Any]], strings: List[str]
+) -> BeautifulSoup:
+    document = documents[document_index]
+    nodes = document["nodes"]
+
+    parent_indexes: List[int] = nodes["parentIndex"]
+    node_types: List[int] = nodes["nodeType"]
+    node_names: List[int] = nodes["nodeName"]
+    node_values: List[int] = nodes["nodeValue"]
+    attributes: List[List[int]] = nodes["attributes"]
+
+    content_document = nodes.get("contentDocumentIndex", {})
+    content_document_indexes = dict(
+        zip(content_document.get("index", []), content_document.get("value", []))
+    )
+    pseudo_elements = set(nodes.get("pseudoType", {}).get("index", []))
+
+    soup = BeautifulSoup("", "lxml")
+    built: List[Optional[Union[BeautifulSoup, Tag]]] = [None] * len(parent_indexes)
+    iframes: Dict[int, Tag] = {}
+
+    for i, parent_index in enumerate(parent_indexes):
+        node_type = node_types[i]
+
+        if parent_index == -1:
+            if node_type == DOCUMENT_NODE:
+                built[i] = soup
+            continue
+
+        # Descendants of skipped nodes (shadow roots, pseudo elements etc.) are skipped too
+        parent = built[parent_index]
+        if parent is None or i in pseudo_elements:
+            continue
+
+        if node_type == ELEMENT_NODE:
+            name = _get_string(strings, node_names[i]).lower()
+            flat_attrs = attributes[i]
+            attrs = {
+                _get_string(strings, flat_attrs[j]): _get_string(
+                    strings, flat_attrs[j + 1]
+                )
+                for j in range(0, len(flat_attrs) - 1, 2)
+            }
+            tag = soup.new_tag(name, attrs=attrs)
+            parent.append(tag)
+            built[i] = tag
+
+            if i in content_document_indexes:
+                iframes[i] = tag
+        elif node_type in (TEXT_NODE, CDATA_SECTION_NODE):
+            parent.append(NavigableString(_get_string(strings, node_values[i])))
+        elif node_type == COMMENT_NODE:
+            parent.append(Comment(_get_string(strings, node_values[i])))
+        elif node_type == DOCUMENT_TYPE_NODE:
+            parent.append(
+                Doctype.for_name_and_ids(
+                    _get_string(strings, node_names[i]),
+                    _get_string(strings, document.get("publicId", -1)) or None,
+                    _get_string(strings, document.get("systemId", -1)) or None,
+                )
+            )
+
+    for node_index, iframe_tag in iframes.items():
+        frame_tree = _build_document(
+            content_document_indexes[node_index], documents, strings
+        )
+        # Frames without d-ids couldn't be reached by the id script (e.g. cross-origin),
+        # so their elements can't be located and are left out like in `expand_iframes`.
+        if frame_tree.find(attrs={"d-id": True}) is None:
+            continue
+
+        mild_strip_in_place(frame_tree)
+        iframe_tag.replace_with(frame_tree)
+
+    return soup
@@ -5,16 +5,30 @@ from urllib.parse import urlparse
 from loguru import logger
 
 from dendrite.logic.cache.file_cache import FileCache
-from dendrite.logic.code.code_session import execute
+from dendrite.logic.cache.candidates import order_candidates, record_candidate_results
+from dendrite.logic.cache.path_template import get_path_template
+from dendrite.logic.code.code_session import ParsedPage, compile_script, execute
 from dendrite.logic.config import Config
 from dendrite.models.dto.cached_extract_dto import CachedExtractDTO
+from dendrite.models.response.extract_response import RunCachedScriptsResponse
 from dendrite.models.scripts import Script
 
 
 def save_script(code: str, prompt: str, url: str, cache: FileCache[Script]):
+    try:
+        # Also warms the compiled script cache for the next runs
+        compile_script(code)
+    except SyntaxError as e:
+        logger.error(f"Not caching a script with invalid syntax: {e}")
+        return
+
     domain = urlparse(url).netloc
     script = Script(
-        url=url, domain=domain, script=code, created_at=datetime.now().isoformat()
+        url=url,
+        domain=domain,
+        script=code,
+        created_at=datetime.now().isoformat(),
+        path_template=get_path_template(url),
     )
     cache.append({"prompt": prompt, "domain": domain}, script)
 
@@ -22,8 +36,33 @@ def save_script(code: str, prompt: str, url: str, cache: FileCache[Script]):
 def get_scripts(
     prompt: str, url: str, cache: FileCache[Script]
 ) -> Optional[List[Script]]:
+    """
+    Gets the cached scripts for a prompt on the domain of the URL, ordered by `order_candidates`
+    so that the preferred ones come last.
+    """
     domain = urlparse(url).netloc
-    return cache.get({"prompt": prompt, "domain": domain})
+    scripts = cache.get({"prompt": prompt, "domain": domain})
+    if scripts is None:
+        return None
+
+    return order_candidates(scripts, url)
+
+
+def record_script_results(
+    prompt: str,
+    url: str,
+    succeeded: Optional[str],
+    failed: List[str],
+    cache: FileCache[Script],
+) -> None:
+    domain = urlparse(url).netloc
+    record_candidate_results(
+        cache,
+        {"prompt": prompt, "domain": domain},
+        lambda entry, code: entry.script == code,
+        succeeded,
+        failed,
+    )
 
 
 async def get_working_cached_script(
@@ -40,16 +79,65 @@ async def get_working_cached_script(
         f"Found {len(scripts)} scripts in cache | Prompt: {prompt} in domain: {url}"
     )
 
-    for script in scripts:
-        try:
-            res = execute(script.script, raw_html, return_data_json_schema)
-            return script, res
-        except Exception as e:
-            logger.debug(
-                f"Script failed with error: {str(e)} | Prompt: {prompt} in domain: {url}"
-            )
-            continue
+    res = await run_scripts(scripts, raw_html, return_data_json_schema, config)
+    if res.script is not None:
+        record_script_results(
+            prompt, url, res.script.script, res.failed, config.extract_cache
+        )
+        return res.script, res.return_data
 
+    record_script_results(prompt, url, None, res.failed, config.extract_cache)
     raise Exception(
         f"No working script found in cache even though {len(scripts)} scripts were available | Prompt: '{prompt}' in domain: '{url}'"
     )
+
+
+async def run_scripts(
+    scripts: List[Script], raw_html: str, return_data_json_schema: Any, config: Config
+) -> RunCachedScriptsResponse:
+    """
+    Runs cached scripts on a page, from the last, preferred one, until one of them works.
+
+    The page is parsed once for all scripts, or shared once with the workers of the
+    script sandbox if one is configured.
+
+    Args:
+        scripts (List[Script]): The scripts, from the least to the most preferred.
+        raw_html (str): The html of the page.
+        return_data_json_schema (Any): The JSON schema the response data must match, if any.
+        config (Config): The dendrite configuration.
+
+    Returns:
+        RunCachedScriptsResponse: The working script and its data, if any, and the scripts that failed.
+    """
+    failed: List[str] = []
+    sandbox = config.script_sandbox
+
+    if sandbox is None:
+        parsed_page = ParsedPage(raw_html)
+        for script in reversed(scripts):
+            try:
+                res = execute(
+                    script.script, raw_html, return_data_json_schema, parsed_page
+                )
+                return RunCachedScriptsResponse(
+                    script=script, return_data=res, failed=failed
+                )
+            except Exception as e:
+                logger.debug(f"Script failed with error: {str(e)}")
+                failed.append(script.script)
+        return RunCachedScriptsResponse(failed=failed)
+
+    with sandbox.share_page(raw_html) as page:
+        for script in reversed(scripts):
+            try:
+                res = await sandbox.execute(
+                    script.script, page, return_data_json_schema
+                )
+                return RunCachedScriptsResponse(
+                    script=script, return_data=res, failed=failed
+                )
+            except Exception as e:
+                logger.debug(f"Script failed in the sandbox with error: {str(e)}")
+                failed.append(script.script)
+    return RunCachedScriptsResponse(failed=failed)
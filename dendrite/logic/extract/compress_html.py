@@ -250,7 +250,8 @@ class CompressHTML:
             has_placed_truncation = False
             same_element_repeat_amount: int = 0
 
-            tag_children = (child for child in tag.children if isinstance(child, Tag))
+            # The children are replaced while iterating, so they are listed first
+            tag_children = [child for child in tag.children if isinstance(child, Tag)]
 
             total_token_size = 0
             for index, child in enumerate(tag_children):
@@ -1,4 +1,3 @@
-import asyncio
 import hashlib
 from typing import List, Optional
 from urllib.parse import urlparse
@@ -6,11 +5,27 @@ from urllib.parse import urlparse
 from loguru import logger
 
 from dendrite.logic.config import Config
-from dendrite.logic.extract.cache import get_scripts, get_working_cached_script
+from dendrite.logic.extract.cache import (
+    get_scripts,
+    get_working_cached_script,
+    record_script_results,
+    run_scripts,
+)
 from dendrite.logic.extract.extract_agent import ExtractAgent
-from dendrite.models.dto.cached_extract_dto import CachedExtractDTO
+from dendrite.logic.extract.generation_lock import (
+    GenerationLock,
+    InMemoryGenerationLock,
+)
+from dendrite.models.dto.cached_extract_dto import (
+    CachedExtractDTO,
+    CachedScriptResultDTO,
+    RunCachedScriptsDTO,
+)
 from dendrite.models.dto.extract_dto import ExtractDTO
-from dendrite.models.response.extract_response import ExtractResponse
+from dendrite.models.response.extract_response import (
+    ExtractResponse,
+    RunCachedScriptsResponse,
+)
 from dendrite.models.scripts import Script
 
 
@@ -18,6 +33,22 @@ async def get_cached_scripts(dto: CachedExtractDTO, config: Config) -> List[Scri
     return get_scripts(dto.prompt, dto.url, config.extract_cache) or []
 
 
+async def record_cached_script_results(
+    dto: CachedScriptResultDTO, config: Config
+) -> None:
+    record_script_results(
+        dto.prompt, dto.url, dto.succeeded, dto.failed, config.extract_cache
+    )
+
+
+async def run_cached_scripts(
+    dto: RunCachedScriptsDTO, config: Config
+) -> RunCachedScriptsResponse:
+    return await run_scripts(
+        dto.scripts, dto.raw_html, dto.return_data_json_schema, config
+    )
+
+
 async def test_cache(
     extract_dto: ExtractDTO, config: Config
 ) -> Optional[ExtractResponse]:
@@ -49,75 +80,29 @@ async def test_cache(
         )
 
 
-class InMemoryLockManager:
-    # Class-level dictionaries to keep track of locks and events
-    locks = {}
-    events = {}
-    global_lock = asyncio.Lock()
-
-    def __init__(
-        self,
-        extract_page_dto: ExtractDTO,
-    ):
-        self.key = self.generate_key(extract_page_dto)
-
-    def generate_key(self, extract_page_dto: ExtractDTO) -> str:
-        domain = urlparse(extract_page_dto.page_information.url).netloc
-        key_data = f"{domain}:{extract_page_dto.combined_prompt}"
-        return hashlib.sha256(key_data.encode()).hexdigest()
-
-    async def acquire_lock(self, timeout: int = 60) -> bool:
-        async with InMemoryLockManager.global_lock:
-            if self.key in InMemoryLockManager.locks:
-                # Lock is already acquired
-                return False
-            else:
-                # Acquire the lock
-                InMemoryLockManager.locks[self.key] = True
-                return True
-
-    async def release_lock(self):
-        async with InMemoryLockManager.global_lock:
-            InMemoryLockManager.locks.pop(self.key, None)
-            InMemoryLockManager.events.pop(self.key, None)
-
-    async def publish(self, message: str):
-        async with InMemoryLockManager.global_lock:
-            event = InMemoryLockManager.events.get(self.key)
-            if event:
-                event.set()
-
-    async def subscribe(self):
-        async with InMemoryLockManager.global_lock:
-            if self.key not in InMemoryLockManager.events:
-                InMemoryLockManager.events[self.key] = asyncio.Event()
-            # No need to assign to self.event; return the event instead
-            return InMemoryLockManager.events[self.key]
-
-    async def wait_for_notification(
-        self, event: asyncio.Event, timeout: float = 1600.0
-    ) -> bool:
-        try:
-            await asyncio.wait_for(event.wait(), timeout)
-            return True
-        except asyncio.TimeoutError as e:
-            logger.error(f"Timeout error: {e}")
-            return False
-        finally:
-            # Clean up event
-            async with InMemoryLockManager.global_lock:
-                InMemoryLockManager.events.pop(self.key, None)
+# The seconds to wait for another extraction to generate the script of a page
+GENERATION_WAIT_TIMEOUT = 1600.0
+
+# The generation locks used when none is configured, shared by the whole process
+_in_process_generation_lock = InMemoryGenerationLock()
+
+
+def get_generation_key(extract_page_dto: ExtractDTO) -> str:
+    domain = urlparse(extract_page_dto.page_information.url).netloc
+    key_data = f"{domain}:{extract_page_dto.combined_prompt}"
+    return hashlib.sha256(key_data.encode()).hexdigest()
 
 
 async def extract(extract_page_dto: ExtractDTO, config: Config) -> ExtractResponse:
 
-    lock_manager = InMemoryLockManager(extract_page_dto)
-    lock_acquired = await lock_manager.acquire_lock()
+    lock = config.generation_lock or _in_process_generation_lock
+    key = get_generation_key(extract_page_dto)
+    lock_acquired = await lock.acquire(key)
 
     if lock_acquired:
-        return await generate_script(extract_page_dto, lock_manager, config)
+        return await generate_script(extract_page_dto, lock, key, config)
     else:
-        res = await wait_for_script_generation(extract_page_dto, lock_manager, config)
+        res = await wait_for_script_generation(extract_page_dto, lock, key, config)
 
         if res:
             return res
@@ -128,29 +113,27 @@ async def extract(extract_page_dto: ExtractDTO, config: Config) -> ExtractRespon
 
 
 async def generate_script(
-    extract_page_dto: ExtractDTO, lock_manager: InMemoryLockManager, config: Config
+    extract_page_dto: ExtractDTO, lock: GenerationLock, key: str, config: Config
 ) -> ExtractResponse:
     try:
         extract_agent = ExtractAgent(extract_page_dto.page_information, config=config)
-        res = await extract_agent.write_and_run_script(extract_page_dto)
-        await lock_manager.publish("done")
-        return res
-    except Exception as e:
-        await lock_manager.publish("failed")
-        raise e
+        return await extract_agent.write_and_run_script(extract_page_dto)
     finally:
-        await lock_manager.release_lock()
+        await lock.release(key)
 
 
 async def wait_for_script_generation(
-    extract_page_dto: ExtractDTO, lock_manager: InMemoryLockManager, config: Config
+    extract_page_dto: ExtractDTO, lock: GenerationLock, key: str, config: Config
 ) -> Optional[ExtractResponse]:
-    event = await lock_manager.subscribe()
     logger.info("Waiting for script to be generated")
-    notification_received = await lock_manager.wait_for_notification(event)
+    released = await lock.wait(key, GENERATION_WAIT_TIMEOUT)
 
     # If script was created after waiting
-    if notification_received:
+    if released:
+        # The script may have been saved by another process sharing the cache directory
+        config.extract_cache.reload()
         res = await test_cache(extract_page_dto, config)
         if res:
             return res
+    else:
+        logger.error("Timed out waiting for the script to be generated")
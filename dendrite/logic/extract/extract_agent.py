@@ -22,13 +22,17 @@ from dendrite.models.dto.extract_dto import ExtractDTO
 from dendrite.models.page_information import PageInformation
 from dendrite.models.response.extract_response import ExtractResponse
 
-from ..ask.image import segment_image
-from ..code.code_session import CodeSession
+from ..ask.image import ImageSegments
+from ..code.code_session import run_generated_script
 
 
 class ExtractAgent(Agent):
     def __init__(self, page_information: PageInformation, config: Config) -> None:
-        super().__init__(config.llm_config.get("extract_agent"))
+        super().__init__(
+            config.llm_config.get("extract_agent"),
+            priority="background",
+            response_cache=config.llm_config.get_response_cache("extract_agent"),
+        )
         self.page_information = page_information
         self.soup = BeautifulSoup(page_information.raw_html, "lxml")
         self.messages = []
@@ -40,13 +44,16 @@ class ExtractAgent(Agent):
     ) -> ExtractResponse:
         mild_soup = mild_strip(self.soup)
 
-        segments = segment_image(
-            extract_page_dto.page_information.screenshot_base64, segment_height=4000
-        )
-
         scroll_agent = ScrollAgent(
             self.page_information, llm_config=self.config.llm_config
         )
+        # The next segments are encoded while the scroll agent looks at the current one
+        segments = ImageSegments(
+            await extract_page_dto.page_information.get_screenshot(),
+            segment_height=4000,
+            max_width=scroll_agent.llm.image_max_width,
+            quality=scroll_agent.llm.image_quality,
+        )
         scroll_result = await scroll_agent.scroll_through_page(
             extract_page_dto.combined_prompt,
             image_segments=segments,
@@ -71,8 +78,9 @@ class ExtractAgent(Agent):
                 "Get these elements (make sure you only return element that you are confident that these are the correct elements, it's OK to not select any elements):\n- "
                 + "\n- ".join(scroll_result.element_to_inspect_html)
             )
+            # Several elements are requested, so every segment has to be searched
             expanded = await get_expanded_dom(
-                mild_soup, combined_prompt, self.config.llm_config
+                mild_soup, combined_prompt, self.config.llm_config, wave_size=None
             )
             if expanded:
                 expanded_html = expanded[0]
@@ -198,35 +206,32 @@ class ExtractAgent(Agent):
         extract_page_dto: ExtractDTO,
         agent_logger,
     ) -> List[Message]:
-        temp_code_session = CodeSession()
-
+        sandbox = self.config.script_sandbox
         try:
-            variables = temp_code_session.exec_code(
-                generated_script, self.soup, self.page_information.raw_html
-            )
-
-            if "response_data" not in variables:
-                return [
-                    {
-                        "role": "user",
-                        "content": "Error: You need to add the variable 'response_data'",
-                    }
-                ]
-
-            self.response_data = variables["response_data"]
-
-            if extract_page_dto.return_data_json_schema:
-                temp_code_session.validate_response(
-                    extract_page_dto.return_data_json_schema, self.response_data
+            if sandbox is None:
+                self.response_data, llm_readable_exec_res = run_generated_script(
+                    generated_script,
+                    self.page_information.raw_html,
+                    self.soup,
+                    extract_page_dto.return_data_json_schema,
+                    extract_page_dto.combined_prompt,
+                    iterations,
+                    max_retries,
                 )
+            else:
+                with sandbox.share_page(self.page_information.raw_html) as page:
+                    self.response_data, llm_readable_exec_res = (
+                        await sandbox.execute_generated(
+                            generated_script,
+                            page,
+                            extract_page_dto.return_data_json_schema,
+                            extract_page_dto.combined_prompt,
+                            iterations,
+                            max_retries,
+                        )
+                    )
 
-            llm_readable_exec_res = temp_code_session.llm_readable_exec_res(
-                variables,
-                extract_page_dto.combined_prompt,
-                iterations,
-                max_retries,
-            )
-
+            self.cache_response()
             return [{"role": "user", "content": llm_readable_exec_res}]
 
         except Exception as e:
@@ -239,12 +244,14 @@ class ExtractAgent(Agent):
             data_dict = json.loads(json_str)
 
             if "request_more_html" in data_dict:
+                self.cache_response()
                 return self._handle_more_html_request(expanded_html)
 
             if "error" in data_dict:
                 raise Exception(data_dict["error"])
 
             if "success" in data_dict:
+                self.cache_response()
                 return ExtractResponse(
                     status="success",
                     message=data_dict["success"],
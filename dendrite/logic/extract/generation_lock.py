@@ -0,0 +1,421 @@
+import asyncio
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows, where files are locked with msvcrt instead
+    fcntl = None  # type: ignore
+    import msvcrt
+
+# The seconds the coordinator may take to answer a request that doesn't wait
+REQUEST_TIMEOUT = 10.0
+
+
+class GenerationLock(ABC):
+    """
+    Makes sure a script is only generated once for the same page and prompt: the first
+    extraction takes the lock and generates the script, while the others wait for the
+    lock to be released and then look for the script in the cache.
+
+    The default `InMemoryGenerationLock` only coordinates the extractions of one process.
+    To share the locks between processes, pass a `FileGenerationLock` or a
+    `SocketGenerationLock` as `Config(generation_lock=...)`. Since the waiting extractions
+    read the script from their own extract cache, the processes must share the cache
+    directory, e.g. run on the same host or mount it from shared storage. Processes with
+    separate caches wait for the lock and then generate the script again.
+    """
+
+    @abstractmethod
+    async def acquire(self, key: str) -> bool:
+        """
+        Tries to take the lock of a key, without waiting for it.
+
+        Args:
+            key (str): The key of the script to generate.
+
+        Returns:
+            bool: Whether the lock was taken, False if another extraction holds it.
+        """
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """
+        Releases a lock taken with `acquire`, waking up the extractions waiting for it.
+
+        Args:
+            key (str): The key of the generated script.
+        """
+
+    @abstractmethod
+    async def wait(self, key: str, timeout: float) -> bool:
+        """
+        Waits until the lock of a key is released, returning right away if it isn't held.
+
+        Args:
+            key (str): The key of the script being generated.
+            timeout (float): The maximum time to wait in seconds.
+
+        Returns:
+            bool: Whether the lock was released, False if the timeout was reached first.
+        """
+
+
+class InMemoryGenerationLock(GenerationLock):
+    """
+    Generation locks shared by the extractions of one process. The sync API runs each
+    extraction in its own event loop, so the waiters are woken up thread-safely in
+    whichever loop they wait in.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._held: Set[str] = set()
+        self._waiters: Dict[
+            str, List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]]
+        ] = {}
+
+    async def acquire(self, key: str) -> bool:
+        with self._lock:
+            if key in self._held:
+                return False
+            self._held.add(key)
+            return True
+
+    async def release(self, key: str) -> None:
+        with self._lock:
+            self._held.discard(key)
+            waiters = self._waiters.pop(key, [])
+
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_set_done, future)
+            except RuntimeError:
+                # The loop of the waiter was closed
+                pass
+
+    async def wait(self, key: str, timeout: float) -> bool:
+        loop = asyncio.get_running_loop()
+        waiter = (loop, loop.create_future())
+        with self._lock:
+            if key not in self._held:
+                return True
+            self._waiters.setdefault(key, []).append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter[1], timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(key, [])
+                if waiter in waiters:
+                    waiters.remove(waiter)
+                    if not waiters:
+                        del self._waiters[key]
+
+
+def _set_done(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class FileGenerationLock(GenerationLock):
+    """
+    Generation locks shared by the processes of one host, as locks on files in a
+    directory. The operating system releases the locks of a process that dies, so a
+    crashed extraction never blocks the others.
+
+    Attributes:
+        lock_dir (Path): The directory of the lock files.
+        poll_interval (float): The seconds between checks of a lock while waiting for it.
+    """
+
+    def __init__(
+        self,
+        lock_dir: Union[str, Path] = ".dendrite/locks",
+        poll_interval: float = 0.5,
+    ):
+        self.lock_dir = Path(lock_dir)
+        self.poll_interval = poll_interval
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # The open lock files of the locks held by this process
+        self._held: Dict[str, int] = {}
+
+    async def acquire(self, key: str) -> bool:
+        fd = self._open(key)
+        if not _try_lock_file(fd, exclusive=True):
+            os.close(fd)
+            return False
+
+        with self._lock:
+            self._held[key] = fd
+        return True
+
+    async def release(self, key: str) -> None:
+        with self._lock:
+            fd = self._held.pop(key, None)
+        if fd is None:
+            return
+
+        # The file is kept, removing it would race with the processes opening it
+        _unlock_file(fd)
+        os.close(fd)
+
+    async def wait(self, key: str, timeout: float) -> bool:
+        deadline = time.time() + timeout
+        while True:
+            fd = self._open(key)
+            try:
+                if _try_lock_file(fd, exclusive=False):
+                    _unlock_file(fd)
+                    return True
+            finally:
+                os.close(fd)
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    def _open(self, key: str) -> int:
+        return os.open(self.lock_dir / f"{key}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+
+
+def _try_lock_file(fd: int, exclusive: bool) -> bool:
+    try:
+        if fcntl is not None:
+            operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            fcntl.flock(fd, operation | fcntl.LOCK_NB)
+        else:
+            # msvcrt only has exclusive locks
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock_file(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class SocketGenerationLock(GenerationLock):
+    """
+    Generation locks held by a `GenerationLockCoordinator`, shared by every process
+    that can connect to it. A lock is held for as long as the connection that took it,
+    so the locks of a process that dies are released.
+
+    Only the locks go through the coordinator, not the scripts, so the processes must
+    also share the directory of the extract cache to pick up the scripts of each other.
+
+    If the coordinator can't be reached, scripts are generated without coordination.
+
+    Attributes:
+        host (str): The host of the coordinator.
+        port (int): The port of the coordinator.
+        connect_timeout (float): The seconds to wait for a connection to the coordinator.
+    """
+
+    def __init__(self, host: str, port: int, connect_timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self._held: Dict[str, Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = {}
+
+    async def acquire(self, key: str) -> bool:
+        try:
+            reader, writer = await self._connect()
+            reply = await _request(reader, writer, f"ACQUIRE {key}")
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.warning(
+                f"Generation lock coordinator unreachable, generating without it: {e}"
+            )
+            return True
+
+        if reply != "OK":
+            writer.close()
+            return False
+
+        self._held[key] = (reader, writer)
+        return True
+
+    async def release(self, key: str) -> None:
+        connection = self._held.pop(key, None)
+        if connection is None:
+            return
+
+        reader, writer = connection
+        try:
+            await _request(reader, writer, f"RELEASE {key}")
+        except (OSError, asyncio.TimeoutError):
+            # Closing the connection releases the lock as well
+            pass
+        finally:
+            writer.close()
+
+    async def wait(self, key: str, timeout: float) -> bool:
+        try:
+            reader, writer = await self._connect()
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.warning(f"Generation lock coordinator unreachable: {e}")
+            return False
+
+        try:
+            writer.write(f"WAIT {key}\n".encode())
+            await writer.drain()
+            reply = await asyncio.wait_for(reader.readline(), timeout)
+            return reply.decode().strip() == "DONE"
+        except (OSError, asyncio.TimeoutError):
+            return False
+        finally:
+            writer.close()
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.connect_timeout
+        )
+
+
+async def _request(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, command: str
+) -> str:
+    writer.write(f"{command}\n".encode())
+    await writer.drain()
+    reply = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+    return reply.decode().strip()
+
+
+class GenerationLockCoordinator:
+    """
+    A small TCP server holding the generation locks of `SocketGenerationLock` clients,
+    as a stand-in for a shared lock service.
+
+    Each request is a line with a command and a key:
+        "ACQUIRE <key>" answers "OK" if the lock was taken for the connection, or "BUSY".
+        "RELEASE <key>" releases a lock taken by the connection and answers "OK".
+        "WAIT <key>" answers "DONE" once the lock isn't held.
+
+    Start it in the background with `start()`, or run it with `await serve()`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the coordinator.
+
+        Args:
+            host (str): The host to listen on. Defaults to "127.0.0.1".
+            port (int): The port to listen on. Defaults to 0, for any free port.
+        """
+        self.host = host
+        self.port = port
+
+        self._holders: Dict[str, asyncio.StreamWriter] = {}
+        self._waiters: Dict[str, List["asyncio.Future[None]"]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def serve(self) -> None:
+        """Runs the coordinator until it is stopped."""
+        await self._listen()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> "GenerationLockCoordinator":
+        """
+        Starts the coordinator in a background thread.
+
+        Returns:
+            GenerationLockCoordinator: The coordinator, listening on `port` once this returns.
+        """
+        started = threading.Event()
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._listen())
+            started.set()
+            try:
+                self._loop.run_forever()
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self) -> None:
+        """Stops a coordinator started with `start`."""
+        if self._loop is None or self._thread is None:
+            return
+
+        async def close() -> None:
+            if self._server is not None:
+                self._server.close()
+            self._loop.stop()  # type: ignore
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop)
+        self._thread.join()
+        self._thread = None
+
+    async def _listen(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Generation lock coordinator listening on {self.host}:{self.port}")
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        held: Set[str] = set()
+        try:
+            while line := await reader.readline():
+                command, _, key = line.decode().strip().partition(" ")
+                if command == "ACQUIRE":
+                    if key in self._holders:
+                        reply = "BUSY"
+                    else:
+                        self._holders[key] = writer
+                        held.add(key)
+                        reply = "OK"
+                elif command == "RELEASE":
+                    if key in held:
+                        held.discard(key)
+                        self._release(key)
+                    reply = "OK"
+                elif command == "WAIT":
+                    if key in self._holders:
+                        future = asyncio.get_running_loop().create_future()
+                        self._waiters.setdefault(key, []).append(future)
+                        await future
+                    reply = "DONE"
+                else:
+                    reply = "ERROR"
+
+                writer.write(f"{reply}\n".encode())
+                await writer.drain()
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # The locks of a client that disconnected, e.g. because it crashed
+            for key in held:
+                self._release(key)
+            writer.close()
+
+    def _release(self, key: str) -> None:
+        self._holders.pop(key, None)
+        for future in self._waiters.pop(key, []):
+            _set_done(future)
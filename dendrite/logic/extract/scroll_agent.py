@@ -9,6 +9,7 @@ from openai.types.chat.chat_completion_content_part_param import (
     ChatCompletionContentPartParam,
 )
 
+from dendrite.logic.ask.image import ImageSegments
 from dendrite.logic.llm.agent import Agent, Message
 from dendrite.logic.llm.config import LLMConfig
 from dendrite.models.page_information import PageInformation
@@ -65,7 +66,11 @@ class ErrorRes(ScrollRes):
 
 class ScrollAgent(Agent):
     def __init__(self, page_information: PageInformation, llm_config: LLMConfig):
-        super().__init__(llm_config.get("scroll_agent"))
+        super().__init__(
+            llm_config.get("scroll_agent"),
+            priority="background",
+            response_cache=llm_config.get_response_cache("scroll_agent"),
+        )
         self.page_information = page_information
         self.choices: List[ScrollRes] = [
             ElementPromptsAction(),
@@ -78,9 +83,11 @@ class ScrollAgent(Agent):
     async def scroll_through_page(
         self,
         combined_prompt: str,
-        image_segments: List[str],
+        image_segments: ImageSegments,
     ) -> ScrollResult:
-        messages = [self.create_initial_message(combined_prompt, image_segments[0])]
+        messages = [
+            self.create_initial_message(combined_prompt, await image_segments.get(0))
+        ]
         all_elements_to_inspect_html = []
         current_segment = 0
 
@@ -106,7 +113,7 @@ class ScrollAgent(Agent):
             ):
                 current_segment += 1
                 scroll_message = self.create_scroll_message(
-                    image_segments[current_segment]
+                    await image_segments.get(current_segment)
                 )
                 messages.append(scroll_message)
             else:
@@ -129,7 +136,9 @@ class ScrollAgent(Agent):
             messages.append({"role": "user", "content": error_message})
             raise Exception(error_message)
         elif json_matches:
-            return json.loads(json_matches[0].strip())
+            data_dict = json.loads(json_matches[0].strip())
+            self.cache_response()
+            return data_dict
 
         error_message = "No valid JSON found in the response"
         logger.error(error_message)
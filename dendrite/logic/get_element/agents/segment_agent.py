@@ -1,6 +1,6 @@
 import json
 import re
-from typing import Annotated, List, Literal, Union
+from typing import Annotated, Any, Dict, List, Literal, Union
 
 from annotated_types import Len
 from loguru import logger
@@ -32,7 +32,6 @@ SegmentAgentReponseType = Union[
 
 def parse_segment_output(text: str, index: int) -> SegmentAgentReponseType:
     json_pattern = r"```json(.*?)```"
-    res = None
 
     if text is None:
         return SegmentAgentFailureResponse(
@@ -49,29 +48,79 @@ def parse_segment_output(text: str, index: int) -> SegmentAgentReponseType:
     json_match = json_matches[0]
     try:
         json_data = json.loads(json_match)
-        if "d_id" in json_data and "reason" in json_data:
-            ids = json_data["d_id"]
-            if len(ids) == 0:
-                logger.warning(
-                    f"Success message was output, but no d_ids provided: {json_data}"
-                )
-                return SegmentAgentFailureResponse(
-                    reason="No d_ids provided", status="failed", index=index
-                )
-
-            res = SegmentAgentSuccessResponse(
-                reason=json_data["reason"],
-                status="success",
-                d_id=json_data["d_id"],
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Failed to decode JSON: {e}")
+
+    return segment_response_from_json(json_data, index)
+
+
+def parse_segment_output_for_prompts(
+    text: str, names: List[str], index: int
+) -> Dict[str, SegmentAgentReponseType]:
+    json_pattern = r"```json(.*?)```"
+
+    if text is None:
+        return {
+            name: SegmentAgentFailureResponse(
+                reason="No content", status="failed", index=index
+            )
+            for name in names
+        }
+
+    json_matches = re.findall(json_pattern, text, re.DOTALL)
+
+    if not json_matches:
+        return {
+            name: SegmentAgentFailureResponse(
+                reason="No JSON matches", status="failed", index=index
             )
+            for name in names
+        }
+
+    try:
+        json_data = json.loads(json_matches[0])
     except json.JSONDecodeError as e:
         raise ValueError(f"Failed to decode JSON: {e}")
 
+    if not isinstance(json_data, dict):
+        raise ValueError("Expected a JSON object with one key per description")
+
+    res: Dict[str, SegmentAgentReponseType] = {}
+    for name in names:
+        if name not in json_data:
+            res[name] = SegmentAgentFailureResponse(
+                reason="No answer for this description", status="failed", index=index
+            )
+        else:
+            res[name] = segment_response_from_json(json_data[name], index)
+
+    return res
+
+
+def segment_response_from_json(json_data: Any, index: int) -> SegmentAgentReponseType:
+    res = None
+
+    if isinstance(json_data, dict) and "d_id" in json_data and "reason" in json_data:
+        ids = json_data["d_id"]
+        if len(ids) == 0:
+            logger.warning(
+                f"Success message was output, but no d_ids provided: {json_data}"
+            )
+            return SegmentAgentFailureResponse(
+                reason="No d_ids provided", status="failed", index=index
+            )
+
+        res = SegmentAgentSuccessResponse(
+            reason=json_data["reason"],
+            status="success",
+            d_id=json_data["d_id"],
+        )
+
     if res is None:
         try:
-            res = SegmentAgentFailureResponse.model_validate_json(json_matches[0])
+            res = SegmentAgentFailureResponse.model_validate(json_data)
         except ValidationError as e:
-            logger.bind(json=json_matches[0]).error(
+            logger.bind(json=json_data).error(
                 f"Failed to parse JSON: {e}",
             )
             res = SegmentAgentFailureResponse(
@@ -85,7 +134,11 @@ def parse_segment_output(text: str, index: int) -> SegmentAgentReponseType:
 async def extract_relevant_d_ids(
     prompt: str, segments: List[str], index: int, llm_config: LLMConfig
 ) -> SegmentAgentReponseType:
-    agent = Agent(llm_config.get("segment_agent"), system_prompt=SEGMENT_PROMPT)
+    agent = Agent(
+        llm_config.get("segment_agent"),
+        system_prompt=SEGMENT_PROMPT,
+        response_cache=llm_config.get_response_cache("segment_agent"),
+    )
     message = ""
     for segment in segments:
         message += (
@@ -104,6 +157,9 @@ async def extract_relevant_d_ids(
 
         try:
             parsed_res = parse_segment_output(res, index)
+            # Failures aren't cached, so a retry on the same segment asks again
+            if isinstance(parsed_res, SegmentAgentSuccessResponse):
+                agent.cache_response()
             # If we successfully parsed the result, return it
             return parsed_res
         except Exception as e:
@@ -117,3 +173,65 @@ async def extract_relevant_d_ids(
         status="failed",
         index=index,
     )
+
+
+async def extract_relevant_d_ids_for_prompts(
+    prompts: Dict[str, str], segments: List[str], index: int, llm_config: LLMConfig
+) -> Dict[str, SegmentAgentReponseType]:
+    """
+    Asks the segment agent for the relevant d-ids of several element descriptions in one call.
+
+    Args:
+        prompts (Dict[str, str]): The element descriptions, keyed by name.
+        segments (List[str]): The html of the segment.
+        index (int): The index of the segment.
+        llm_config (LLMConfig): The LLM configuration for the segment agent.
+
+    Returns:
+        Dict[str, SegmentAgentReponseType]: The response for each description, keyed by name.
+    """
+    agent = Agent(
+        llm_config.get("segment_agent"),
+        system_prompt=SEGMENT_PROMPT,
+        response_cache=llm_config.get_response_cache("segment_agent"),
+    )
+    message = ""
+    for segment in segments:
+        message += (
+            f"""###### SEGMENT ######\n\n{segment}\n\n###### SEGMENT END ######\n\n"""
+        )
+
+    descriptions = "\n".join(
+        f'- "{name}": {prompt} element' for name, prompt in prompts.items()
+    )
+    message += f"Can you get the d_id of the elements that match each of the following descriptions, listed by name:\n\n{descriptions}\n\nIf you've selected an element you should NOT select another element that is a child of the element you've selected. It is important that you follow this."
+    message += """\nOutput how you think. Think step by step. if there are multiple candidate elements for a description return all of them. Don't make up d-id for elements if they are not present/don't match the description. Limit your reasoning to 2-3 sentences per description.\nOnly include ONE json block containing ONE object with the names as keys, where each value is the object you would output for that description alone, e.g. {"name": {"reason": ..., "d_id": [...], "status": "success"}}."""
+
+    names = list(prompts.keys())
+    max_retries = 3
+    for attempt in range(max_retries):
+        res = await agent.add_message(message)
+        if res is None:
+            message = "I didn't receive a response. Please try again."
+            continue
+
+        try:
+            parsed = parse_segment_output_for_prompts(res, names, index)
+            if all(
+                isinstance(response, SegmentAgentSuccessResponse)
+                for response in parsed.values()
+            ):
+                agent.cache_response()
+            return parsed
+        except Exception as e:
+            logger.warning(f"Error in segment agent: {e}")
+            message = f"An exception occurred in your output: {e}\n\nPlease correct your output and try again. Ensure you're providing a valid JSON response."
+
+    return {
+        name: SegmentAgentFailureResponse(
+            reason="Max retries reached without successful parsing",
+            status="failed",
+            index=index,
+        )
+        for name in names
+    }
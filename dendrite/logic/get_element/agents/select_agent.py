@@ -28,7 +28,11 @@ async def select_best_tag(
     return_several: bool = False,
 ) -> Tuple[int, int, Optional[SelectAgentResponse]]:
 
-    agent = Agent(llm_config.get("select_agent"), system_prompt=SELECT_PROMPT)
+    agent = Agent(
+        llm_config.get("select_agent"),
+        system_prompt=SELECT_PROMPT,
+        response_cache=llm_config.get_response_cache("select_agent"),
+    )
 
     message = f"<ELEMENT_DESCRIPTION>\n{prompt}\n</ELEMENT_DESCRIPTION>"
 
@@ -49,6 +53,9 @@ async def select_best_tag(
     logger.info(f"Select agent response: {res}")
 
     parsed = await parse_select_output(res)
+    # Failures aren't cached, so a retry on the same page asks again
+    if parsed is not None and parsed.status == "success":
+        agent.cache_response()
 
     # token_usage = res.usage.input_tokens + res.usage.output_tokens
     return (0, 0, parsed)
@@ -3,7 +3,9 @@ from typing import List, Optional
 from urllib.parse import urlparse
 
 from dendrite.logic.cache.file_cache import FileCache
-from dendrite.models.selector import Selector
+from dendrite.logic.cache.candidates import order_candidates, record_candidate_results
+from dendrite.logic.cache.path_template import get_path_template
+from dendrite.models.selector import Selector, SelectorVariant
 
 
 async def get_selector_from_cache(
@@ -11,20 +13,70 @@ async def get_selector_from_cache(
 ) -> Optional[List[Selector]]:
     netloc = urlparse(url).netloc
 
-    return cache.get({"netloc": netloc, "prompt": prompt})
+    selectors = cache.get({"netloc": netloc, "prompt": prompt})
+    if selectors is None:
+        return None
+
+    # Selectors recorded on the same kind of page that keep working are preferred
+    return order_candidates(selectors, url)
 
 
 async def add_selector_to_cache(
-    prompt: str, bs4_selector: str, url: str, cache: FileCache[Selector]
+    prompt: str,
+    variants: List[SelectorVariant],
+    url: str,
+    cache: FileCache[Selector],
 ) -> None:
+    """
+    Caches all the selector variants of an element, so that a later lookup can use any
+    variant that still matches the page.
+
+    Args:
+        prompt (str): The prompt the element was found for.
+        variants (List[SelectorVariant]): The variants, ordered from the least to the most stable.
+        url (str): The URL of the page the element was found on.
+        cache (FileCache[Selector]): The selector cache.
+    """
     created_at = datetime.now().isoformat()
     netloc = urlparse(url).netloc
-    selector: Selector = Selector(
-        prompt=prompt,
-        selector=bs4_selector,
-        url=url,
-        netloc=netloc,
-        created_at=created_at,
-    )
+    path_template = get_path_template(url)
+    key = {"netloc": netloc, "prompt": prompt}
+
+    # The variants share their creation time, so they keep their order when sorted
+    new_selectors = [
+        Selector(
+            prompt=prompt,
+            selector=variant.selector,
+            url=url,
+            netloc=netloc,
+            created_at=created_at,
+            path_template=path_template,
+            strategy=variant.strategy,
+            stability=variant.stability,
+        )
+        for variant in variants
+    ]
+
+    # The cached selectors are read and written back as one step, so the variants other
+    # processes saved in between aren't lost
+    with cache.file_lock():
+        cache.reload()
+        selectors = cache.get(key) or []
+        cache.set(key, selectors + new_selectors)
 
-    cache.append({"netloc": netloc, "prompt": prompt}, selector)
+
+async def record_selector_results(
+    url: str,
+    prompt: str,
+    succeeded: Optional[str],
+    failed: List[str],
+    cache: FileCache[Selector],
+) -> None:
+    netloc = urlparse(url).netloc
+    record_candidate_results(
+        cache,
+        {"netloc": netloc, "prompt": prompt},
+        lambda entry, selector: entry.selector == selector,
+        succeeded,
+        failed,
+    )
@@ -1,21 +1,30 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from bs4 import BeautifulSoup, Tag
 from loguru import logger
 
 from dendrite.logic.config import Config
-from dendrite.logic.dom.css import check_if_selector_successful, find_css_selector
+from dendrite.logic.dom.css import check_if_selector_successful
+from dendrite.logic.dom.selector_variants import get_selector_variants
 from dendrite.logic.dom.strip import remove_hidden_elements
 from dendrite.logic.get_element.cache import (
     add_selector_to_cache,
     get_selector_from_cache,
+    record_selector_results,
+)
+from dendrite.models.dto.cached_selector_dto import (
+    CachedSelectorDTO,
+    CachedSelectorResultDTO,
 )
-from dendrite.models.dto.cached_selector_dto import CachedSelectorDTO
 from dendrite.models.dto.get_elements_dto import GetElementsDTO
-from dendrite.models.response.get_element_response import GetElementResponse
+from dendrite.models.response.get_element_response import (
+    GetElementResponse,
+    GetElementsResponse,
+)
 from dendrite.models.selector import Selector
 
-from .hanifi_search import hanifi_search
+from .hanifi_search import hanifi_search, hanifi_search_many
+from .models import Element
 
 
 async def get_element(dto: GetElementsDTO, config: Config) -> GetElementResponse:
@@ -41,8 +50,55 @@ async def get_new_element(
         config,
         dto.page_information.time_since_frame_navigated,
     )
-    interactable = element[0]
+    return await element_to_response(
+        element[0], prompt, soup, soup_without_hidden_elements, dto, config
+    )
+
+
+async def get_elements(dto: GetElementsDTO, config: Config) -> GetElementsResponse:
+    """
+    Gets the elements of several prompts with a single search of the page,
+    caching the selector of each element under its own prompt.
+
+    Args:
+        dto (GetElementsDTO): The request, with the prompts keyed by name.
+        config (Config): The dendrite configuration.
 
+    Returns:
+        GetElementsResponse: The response for each prompt, keyed by name.
+    """
+    prompts = {dto.prompt: dto.prompt} if isinstance(dto.prompt, str) else dto.prompt
+
+    soup = BeautifulSoup(dto.page_information.raw_html, "lxml")
+    soup_without_hidden_elements = remove_hidden_elements(soup)
+    elements = await hanifi_search_many(
+        soup_without_hidden_elements,
+        prompts,
+        config,
+        dto.page_information.time_since_frame_navigated,
+    )
+
+    responses: Dict[str, GetElementResponse] = {}
+    for name, element in elements.items():
+        responses[name] = await element_to_response(
+            element[0],
+            prompts[name],
+            soup,
+            soup_without_hidden_elements,
+            dto,
+            config,
+        )
+    return GetElementsResponse(elements=responses)
+
+
+async def element_to_response(
+    interactable: Element,
+    prompt: str,
+    soup: BeautifulSoup,
+    soup_without_hidden_elements: BeautifulSoup,
+    dto: GetElementsDTO,
+    config: Config,
+) -> GetElementResponse:
     if interactable.status == "success":
         if interactable.dendrite_id is None:
             interactable.status = "failed"
@@ -52,16 +108,16 @@ async def get_new_element(
             attrs={"d-id": interactable.dendrite_id}
         )
         if isinstance(tag, Tag):
-            selector = find_css_selector(tag, soup)
+            variants = get_selector_variants(tag, soup)
             cache = config.element_cache
             await add_selector_to_cache(
                 prompt,
-                bs4_selector=selector,
+                variants=variants,
                 url=dto.page_information.url,
                 cache=cache,
             )
             return GetElementResponse(
-                selectors=[selector],
+                selectors=[variant.selector for variant in variants],
                 message=interactable.reason,
                 d_id=interactable.dendrite_id,
                 status="success",
@@ -88,6 +144,14 @@ async def get_cached_selector(dto: CachedSelectorDTO, config: Config) -> List[Se
     return db_selectors
 
 
+async def record_cached_selector_results(
+    dto: CachedSelectorResultDTO, config: Config
+) -> None:
+    await record_selector_results(
+        dto.url, dto.prompt, dto.succeeded, dto.failed, config.element_cache
+    )
+
+
 # async def check_cache(
 #     soup: BeautifulSoup, url: str, prompt: str, only_one: bool, config: Config
 # ) -> Optional[GetElementResponse]:
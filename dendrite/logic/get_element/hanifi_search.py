@@ -1,7 +1,8 @@
 import asyncio
-from typing import Any, Coroutine, List, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from bs4 import BeautifulSoup, Tag
+from loguru import logger
 
 from dendrite.logic.config import Config
 from dendrite.logic.dom.strip import strip_soup
@@ -13,25 +14,75 @@ from .agents.segment_agent import (
     SegmentAgentReponseType,
     SegmentAgentSuccessResponse,
     extract_relevant_d_ids,
+    extract_relevant_d_ids_for_prompts,
 )
 from .hanifi_segment import SelectedTag, expand_tags, hanifi_segment
 from .models import Element
+from .segment_ranking import (
+    rank_segments,
+    score_segments,
+    segment_tokens,
+    tokenize,
+)
+
+# The number of segments searched by the segment agent at once, most relevant first
+SEGMENT_WAVE_SIZE = 4
+# The last wave searches all the remaining segments, bounding the round trips of a search
+MAX_SEGMENT_WAVES = 3
+
+# A confident match must be in a segment scoring at least this ratio of the best lexical score
+CONFIDENT_SCORE_RATIO = 0.5
+HEDGING_WORDS = (
+    "might",
+    "maybe",
+    "possibly",
+    "perhaps",
+    "unclear",
+    "not sure",
+    "could be",
+    "uncertain",
+)
+
+# Elements with these attribute values can't be seen or interacted with
+HIDDEN_ATTRIBUTES = {"data-hidden": "true", "aria-hidden": "true"}
+DISABLED_ATTRIBUTES = {"disabled", "inert"}
 
 
 async def get_expanded_dom(
-    soup: BeautifulSoup, prompt: str, llm_config: LLMConfig
-) -> Optional[Tuple[str, List[SegmentAgentReponseType], List[SelectedTag]]]:
+    soup: BeautifulSoup,
+    prompt: str,
+    llm_config: LLMConfig,
+    wave_size: Optional[int] = SEGMENT_WAVE_SIZE,
+    early_exit: bool = False,
+) -> Optional[
+    Tuple[
+        str,
+        List[SegmentAgentReponseType],
+        List[SelectedTag],
+        Optional[SegmentAgentSuccessResponse],
+    ]
+]:
 
     new_nodes = hanifi_segment(soup, 6000, 3)
-    tags = await get_relevant_tags(prompt, new_nodes, llm_config)
+    tags, confident_match = await get_relevant_tags(
+        prompt, new_nodes, llm_config, wave_size=wave_size, early_exit=early_exit
+    )
 
+    flat_list = get_selected_tags(tags)
+    dom = expand_tags(soup, flat_list)
+    if dom is None:
+        return None
+    return dom, tags, flat_list, confident_match
+
+
+def get_selected_tags(tags: List[SegmentAgentReponseType]) -> List[SelectedTag]:
     succesful_d_ids = [
         (tag.d_id, tag.index, tag.reason)
         for tag in tags
         if isinstance(tag, SegmentAgentSuccessResponse)
     ]
 
-    flat_list = [
+    return [
         SelectedTag(
             d_id,
             reason=segment_d_ids[2],
@@ -40,10 +91,6 @@ async def get_expanded_dom(
         for segment_d_ids in succesful_d_ids
         for d_id in segment_d_ids[0]
     ]
-    dom = expand_tags(soup, flat_list)
-    if dom is None:
-        return None
-    return dom, tags, flat_list
 
 
 async def hanifi_search(
@@ -55,12 +102,116 @@ async def hanifi_search(
 ) -> List[Element]:
 
     stripped_soup = strip_soup(soup)
-    expand_res = await get_expanded_dom(stripped_soup, prompt, config.llm_config)
+    expand_res = await get_expanded_dom(
+        stripped_soup,
+        prompt,
+        config.llm_config,
+        early_exit=config.early_exit_segment_search and not return_several,
+    )
 
     if expand_res is None:
         return [Element(status="failed", reason="No element found when expanding HTML")]
 
-    expanded, tags, flat_list = expand_res
+    expanded, tags, flat_list, confident_match = expand_res
+    return await select_element(
+        soup,
+        expanded,
+        tags,
+        flat_list,
+        confident_match,
+        # The search only ends before the last segment on a confident match
+        confident_match is None,
+        prompt,
+        config,
+        time_since_frame_navigated,
+        return_several,
+    )
+
+
+async def hanifi_search_many(
+    soup: BeautifulSoup,
+    prompts: Dict[str, str],
+    config: Config,
+    time_since_frame_navigated: Optional[float] = None,
+) -> Dict[str, List[Element]]:
+    """
+    Searches the elements of several prompts at once. The page is stripped and segmented
+    once and every segment agent call asks about all prompts, then the best element for
+    each prompt is selected in parallel.
+
+    Args:
+        soup (BeautifulSoup): The page to search.
+        prompts (Dict[str, str]): The element descriptions, keyed by name.
+        config (Config): The dendrite configuration.
+        time_since_frame_navigated (Optional[float]): Seconds since the page was loaded.
+
+    Returns:
+        Dict[str, List[Element]]: The found element for each name.
+    """
+    stripped_soup = strip_soup(soup)
+    segments = hanifi_segment(stripped_soup, 6000, 3)
+    tags_per_prompt = await get_relevant_tags_for_prompts(
+        prompts, segments, config.llm_config
+    )
+
+    async def select(name: str) -> List[Element]:
+        tags = tags_per_prompt[name]
+        flat_list = get_selected_tags(tags)
+        expanded = expand_tags(stripped_soup, flat_list)
+        if expanded is None:
+            return [
+                Element(status="failed", reason="No element found when expanding HTML")
+            ]
+
+        return await select_element(
+            soup,
+            expanded,
+            tags,
+            flat_list,
+            None,
+            len(tags) == len(segments),
+            prompts[name],
+            config,
+            time_since_frame_navigated,
+        )
+
+    names = list(prompts.keys())
+    elements = await asyncio.gather(*[select(name) for name in names])
+    return dict(zip(names, elements))
+
+
+async def select_element(
+    soup: BeautifulSoup,
+    expanded: str,
+    tags: List[SegmentAgentReponseType],
+    flat_list: List[SelectedTag],
+    confident_match: Optional[SegmentAgentSuccessResponse],
+    searched_all_segments: bool,
+    prompt: str,
+    config: Config,
+    time_since_frame_navigated: Optional[float] = None,
+    return_several: bool = False,
+) -> List[Element]:
+    """
+    Selects the element from the segment agent results, with the select agent unless
+    the configuration allows a fast path and the results point at a single element.
+
+    Args:
+        soup (BeautifulSoup): The unstripped page, used for the fast path sanity check.
+        expanded (str): The DOM expanded around the tags from the segment agent.
+        tags (List[SegmentAgentReponseType]): The segment agent responses.
+        flat_list (List[SelectedTag]): The selected tags of the successful responses.
+        confident_match (Optional[SegmentAgentSuccessResponse]): The confident match that
+            ended the segment search early, if any.
+        searched_all_segments (bool): Whether the segment agent was asked about every segment.
+        prompt (str): The description of the element to find.
+        config (Config): The dendrite configuration.
+        time_since_frame_navigated (Optional[float]): Seconds since the page was loaded.
+        return_several (bool): Whether to return all matching elements.
+
+    Returns:
+        List[Element]: The selected element(s).
+    """
 
     failed_messages = []
     succesful_tags: List[SegmentAgentSuccessResponse] = []
@@ -73,6 +224,25 @@ async def hanifi_search(
     if len(succesful_tags) == 0:
         return [Element(status="failed", reason="No relevant tags found in DOM")]
 
+    fast_path_match = (
+        None
+        if return_several
+        else get_fast_path_match(
+            soup, tags, confident_match, searched_all_segments, prompt, config
+        )
+    )
+    if fast_path_match is not None:
+        logger.info(
+            f"Skipping the select agent for the unambiguous match {fast_path_match.d_id[0]}"
+        )
+        return [
+            Element(
+                status="success",
+                dendrite_id=fast_path_match.d_id[0],
+                reason=fast_path_match.reason,
+            )
+        ]
+
     (input_token, output_token, res) = await select_agent.select_best_tag(
         expanded,
         flat_list,
@@ -103,22 +273,302 @@ async def get_relevant_tags(
     prompt: str,
     segments: List[List[str]],
     llm_config: LLMConfig,
-) -> List[SegmentAgentReponseType]:
+    wave_size: Optional[int] = SEGMENT_WAVE_SIZE,
+    early_exit: bool = False,
+) -> Tuple[List[SegmentAgentReponseType], Optional[SegmentAgentSuccessResponse]]:
+    """
+    Asks the segment agent for the relevant d-ids in the segments.
+
+    With `early_exit`, the segments ranked most relevant to the prompt by `rank_segments`
+    are searched in waves from `split_into_waves`, and the search ends as soon as one of
+    the results is a confident match according to `is_confident_match`, cancelling the
+    remaining calls. Each wave is sent while the previous one runs, so a match in a lower
+    ranked wave doesn't wait for a round trip per wave. Without it, all segments are
+    searched at once and aren't ranked.
+
+    Args:
+        prompt (str): The description of the element(s) to find.
+        segments (List[List[str]]): The segments from `hanifi_segment`.
+        llm_config (LLMConfig): The LLM configuration for the segment agent.
+        wave_size (Optional[int]): The number of segments sent to the segment agent at once
+            with `early_exit`, or None to send all of them at once.
+        early_exit (bool): Whether to stop searching once a confident match is found, which
+            only suits the search of a single element.
+
+    Returns:
+        Tuple[List[SegmentAgentReponseType], Optional[SegmentAgentSuccessResponse]]: The
+            responses for the searched segments in page order, and the confident match
+            that ended the search early, if any.
+    """
+    if not early_exit or wave_size is None:
+        results = await asyncio.gather(
+            *[
+                extract_relevant_d_ids(prompt, segment, index, llm_config)
+                for index, segment in enumerate(segments)
+            ]
+        )
+        return list(results), None
+
+    scores = score_segments(prompt, segments)
+    waves = split_into_waves(rank_segments(scores), wave_size)
+    started: List[asyncio.Task[SegmentAgentReponseType]] = []
+
+    def send_wave(wave: List[int]) -> List[asyncio.Task[SegmentAgentReponseType]]:
+        tasks = [
+            asyncio.ensure_future(
+                extract_relevant_d_ids(prompt, segments[index], index, llm_config)
+            )
+            for index in wave
+        ]
+        started.extend(tasks)
+        return tasks
+
+    results: List[SegmentAgentReponseType] = []
+    next_tasks = send_wave(waves[0]) if waves else []
+    for wave_number in range(len(waves)):
+        tasks = next_tasks
+        if wave_number + 1 < len(waves):
+            next_tasks = send_wave(waves[wave_number + 1])
+
+        for next_result in asyncio.as_completed(tasks):
+            res = await next_result
+            results.append(res)
+
+            if is_confident_match(res, scores):
+                logger.debug(
+                    f"Confident match in segment {res.index}, cancelling the remaining segment agent calls"
+                )
+                for task in started:
+                    task.cancel()
+                await asyncio.gather(*started, return_exceptions=True)
+                return sorted(results, key=lambda res: res.index), res
+
+        if wave_number + 1 < len(waves):
+            logger.debug(
+                f"No confident match in wave {wave_number + 1} of {len(waves)}, searching the next one"
+            )
+
+    return sorted(results, key=lambda res: res.index), None
+
+
+async def get_relevant_tags_for_prompts(
+    prompts: Dict[str, str],
+    segments: List[List[str]],
+    llm_config: LLMConfig,
+    wave_size: Optional[int] = SEGMENT_WAVE_SIZE,
+) -> Dict[str, List[SegmentAgentReponseType]]:
+    """
+    Like `get_relevant_tags`, but asks the segment agent about all prompts in each call.
+
+    Segments are ranked by their best relative lexical score across the prompts, and the
+    waves after the one already sent are only sent while some prompt has no confident
+    match yet.
+
+    Args:
+        prompts (Dict[str, str]): The element descriptions, keyed by name.
+        segments (List[List[str]]): The segments from `hanifi_segment`.
+        llm_config (LLMConfig): The LLM configuration for the segment agent.
+        wave_size (Optional[int]): The number of segments sent to the segment agent at once,
+            or None to send all of them at once.
+
+    Returns:
+        Dict[str, List[SegmentAgentReponseType]]: The responses for the searched segments
+            of each prompt, in page order.
+    """
+    scores_per_prompt = {
+        name: score_segments(prompt, segments) for name, prompt in prompts.items()
+    }
+    combined_scores = [0.0] * len(segments)
+    for scores in scores_per_prompt.values():
+        best_score = max(scores, default=0.0)
+        if best_score > 0:
+            combined_scores = [
+                max(combined, score / best_score)
+                for combined, score in zip(combined_scores, scores)
+            ]
+
+    ranking = rank_segments(combined_scores)
+    waves = split_into_waves(ranking, wave_size or max(1, len(ranking)))
+    results: Dict[str, List[SegmentAgentReponseType]] = {name: [] for name in prompts}
+
+    def send_wave(
+        wave: List[int],
+    ) -> "asyncio.Future[List[Dict[str, SegmentAgentReponseType]]]":
+        return asyncio.gather(
+            *[
+                extract_relevant_d_ids_for_prompts(
+                    prompts, segments[index], index, llm_config
+                )
+                for index in wave
+            ]
+        )
+
+    next_wave = send_wave(waves[0]) if waves else None
+    for wave_number in range(len(waves)):
+        wave = next_wave
+        next_wave = (
+            send_wave(waves[wave_number + 1]) if wave_number + 1 < len(waves) else None
+        )
+
+        for segment_results in await wave:
+            for name, res in segment_results.items():
+                results[name].append(res)
+
+        if all(
+            any(is_confident_match(res, scores_per_prompt[name]) for res in responses)
+            for name, responses in results.items()
+        ):
+            if next_wave is not None:
+                next_wave.cancel()
+                await asyncio.gather(next_wave, return_exceptions=True)
+            break
+
+    return {
+        name: sorted(responses, key=lambda res: res.index)
+        for name, responses in results.items()
+    }
+
+
+def split_into_waves(
+    ranking: List[int], wave_size: int, max_waves: int = MAX_SEGMENT_WAVES
+) -> List[List[int]]:
+    """
+    Splits the ranked segments into the waves sent to the segment agent, with the last
+    wave holding all the segments beyond `max_waves - 1` waves.
+
+    Args:
+        ranking (List[int]): The indexes of the segments, ordered by relevance.
+        wave_size (int): The number of segments in a wave.
+        max_waves (int): The maximum number of waves.
+
+    Returns:
+        List[List[int]]: The indexes of the segments of each wave.
+    """
+    waves = [
+        ranking[start : start + wave_size]
+        for start in range(0, len(ranking), wave_size)
+    ]
+    if len(waves) > max_waves:
+        waves = waves[: max_waves - 1] + [ranking[(max_waves - 1) * wave_size :]]
+    return waves
+
+
+def is_confident_match(response: SegmentAgentReponseType, scores: List[float]) -> bool:
+    """
+    Decides whether a segment agent response can end the segment search early.
+
+    A response is confident if it is a success with a single d-id, its reason doesn't
+    hedge, and its segment is among the best lexical matches for the prompt.
+
+    Args:
+        response (SegmentAgentReponseType): The response of the segment agent.
+        scores (List[float]): The lexical scores of all segments from `score_segments`.
 
-    tasks: List[Coroutine[Any, Any, SegmentAgentReponseType]] = []
+    Returns:
+        bool: True if the response is a confident match.
+    """
+    if not isinstance(response, SegmentAgentSuccessResponse):
+        return False
 
-    for index, segment in enumerate(segments):
-        tasks.append(extract_relevant_d_ids(prompt, segment, index, llm_config))
+    if len(response.d_id) != 1:
+        return False
 
-    results: List[SegmentAgentReponseType] = await asyncio.gather(*tasks)
-    if results is None:
-        return []
+    reason = response.reason.lower()
+    if any(word in reason for word in HEDGING_WORDS):
+        return False
 
-    return results
+    best_score = max(scores, default=0.0)
+    score = scores[response.index] if 0 <= response.index < len(scores) else 0.0
+    return score > 0 and score >= best_score * CONFIDENT_SCORE_RATIO
+
+
+def get_fast_path_match(
+    soup: BeautifulSoup,
+    tags: List[SegmentAgentReponseType],
+    confident_match: Optional[SegmentAgentSuccessResponse],
+    searched_all_segments: bool,
+    prompt: str,
+    config: Config,
+) -> Optional[SegmentAgentSuccessResponse]:
+    """
+    Gets the segment agent response that can be accepted without the select agent, if
+    the configuration allows it.
+
+    A confident match that ended the search early is accepted with
+    `skip_select_agent_when_confident`, and a single response with a single d-id across
+    all segments with `skip_select_agent_when_unambiguous`. The latter is only checked
+    when every segment was searched, since the segments skipped after an early exit
+    could hold other matches. With `check_fast_path_match`, the element must also pass
+    `is_plausible_element`.
+
+    Args:
+        soup (BeautifulSoup): The unstripped page.
+        tags (List[SegmentAgentReponseType]): The segment agent responses.
+        confident_match (Optional[SegmentAgentSuccessResponse]): The confident match, if any.
+        searched_all_segments (bool): Whether the segment agent was asked about every segment.
+        prompt (str): The description of the element to find.
+        config (Config): The dendrite configuration.
+
+    Returns:
+        Optional[SegmentAgentSuccessResponse]: The accepted response, or None to use the select agent.
+    """
+    match = None
+    if confident_match is not None and config.skip_select_agent_when_confident:
+        match = confident_match
+    elif searched_all_segments and config.skip_select_agent_when_unambiguous:
+        match = get_if_one_tag(tags)
+
+    if match is None or not config.check_fast_path_match:
+        return match
+
+    tag = soup.find(attrs={"d-id": match.d_id[0]})
+    if not isinstance(tag, Tag) or not is_plausible_element(tag, prompt):
+        logger.debug(
+            f"The unambiguous match {match.d_id[0]} failed the sanity check, using the select agent"
+        )
+        return None
+    return match
+
+
+def is_plausible_element(tag: Tag, prompt: str) -> bool:
+    """
+    Cheaply checks that an element could be the one described by the prompt: it is
+    visible, it isn't disabled and it shares a word with the prompt.
+
+    Args:
+        tag (Tag): The element, from the unstripped soup.
+        prompt (str): The description of the element.
+
+    Returns:
+        bool: True if the element passes the checks.
+    """
+    for element in [tag, *tag.parents]:
+        if not isinstance(element, Tag):
+            continue
+        if element.has_attr("hidden") or any(
+            element.get(attr) == value for attr, value in HIDDEN_ATTRIBUTES.items()
+        ):
+            return False
+
+    if any(tag.has_attr(attr) for attr in DISABLED_ATTRIBUTES):
+        return False
+    if tag.get("aria-disabled") == "true" or tag.get("type") == "hidden":
+        return False
+
+    prompt_tokens = set(tokenize(prompt))
+    if len(prompt_tokens) == 0:
+        return True
+
+    # The labels of form fields are usually in their parent, e.g. <label>Email <input></label>
+    context = tag.parent if isinstance(tag.parent, Tag) else tag
+    element_tokens = set(segment_tokens([str(tag)])) | set(
+        tokenize(context.get_text(" "))
+    )
+    return len(prompt_tokens & element_tokens) > 0
 
 
 def get_if_one_tag(
-    lst: List[SegmentAgentSuccessResponse],
+    lst: List[SegmentAgentReponseType],
 ) -> Optional[SegmentAgentSuccessResponse]:
     curr_item = None
     for item in lst:
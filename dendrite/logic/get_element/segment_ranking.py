@@ -0,0 +1,158 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List
+
+# Attributes that usually describe what an element is or does, weighted higher than text
+DESCRIPTIVE_ATTRIBUTES = {
+    "aria-label",
+    "aria-labelledby",
+    "aria-describedby",
+    "alt",
+    "title",
+    "placeholder",
+    "name",
+    "role",
+    "type",
+    "id",
+    "value",
+    "for",
+    "label",
+}
+DESCRIPTIVE_ATTRIBUTE_WEIGHT = 2
+
+# Attributes that are either added by dendrite or only add noise to the scores
+IGNORED_ATTRIBUTES = {"d-id", "iframe-path", "data-hidden", "style", "src", "srcset"}
+
+STOP_WORDS = {
+    "a",
+    "an",
+    "and",
+    "at",
+    "by",
+    "for",
+    "from",
+    "in",
+    "is",
+    "it",
+    "of",
+    "on",
+    "or",
+    "that",
+    "the",
+    "this",
+    "to",
+    "with",
+    "element",
+    "get",
+    "find",
+}
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+TAG_PATTERN = re.compile(r"<([a-zA-Z][\w-]*)([^>]*)>")
+ATTRIBUTE_PATTERN = re.compile(r'([\w:-]+)="([^"]*)"')
+MARKUP_PATTERN = re.compile(r"<[^>]*>")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+CAMEL_CASE_PATTERN = re.compile(r"([a-z])([A-Z])")
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into lowercase word tokens, also splitting camelCase and kebab-case words."""
+    text = CAMEL_CASE_PATTERN.sub(r"\1 \2", text).lower()
+    return [token for token in TOKEN_PATTERN.findall(text) if token not in STOP_WORDS]
+
+
+def segment_tokens(segment: List[str]) -> List[str]:
+    """
+    Gets the tokens of a segment from its text, tag names and attribute values.
+
+    The segments are the html strings built by `hanifi_segment`, so they are tokenized
+    with regular expressions instead of being parsed again.
+
+    Args:
+        segment (List[str]): The html strings of the segment.
+
+    Returns:
+        List[str]: The tokens of the segment, with descriptive attributes repeated by their weight.
+    """
+    tokens: List[str] = []
+    for html in segment:
+        for tag_name, attributes in TAG_PATTERN.findall(html):
+            # Tag names act as role hints, e.g. "button" or "input"
+            tokens.append(tag_name.lower())
+            for name, value in ATTRIBUTE_PATTERN.findall(attributes):
+                name = name.lower()
+                if name in IGNORED_ATTRIBUTES:
+                    continue
+                value_tokens = tokenize(value)
+                if name in DESCRIPTIVE_ATTRIBUTES:
+                    value_tokens = value_tokens * DESCRIPTIVE_ATTRIBUTE_WEIGHT
+                tokens.extend(value_tokens)
+
+        tokens.extend(tokenize(MARKUP_PATTERN.sub(" ", html)))
+    return tokens
+
+
+def score_segments(prompt: str, segments: List[List[str]]) -> List[float]:
+    """
+    Scores how relevant each segment is to the prompt with BM25.
+
+    Args:
+        prompt (str): The description of the element(s) to find.
+        segments (List[List[str]]): The segments from `hanifi_segment`.
+
+    Returns:
+        List[float]: The score of each segment, in the same order as the segments.
+    """
+    query = set(tokenize(prompt))
+    documents = [Counter(segment_tokens(segment)) for segment in segments]
+    if not query or not documents:
+        return [0.0] * len(segments)
+
+    lengths = [sum(document.values()) for document in documents]
+    average_length = sum(lengths) / len(lengths) or 1
+
+    document_frequency: Dict[str, int] = {
+        token: sum(1 for document in documents if token in document) for token in query
+    }
+
+    scores: List[float] = []
+    for document, length in zip(documents, lengths):
+        score = 0.0
+        for token in query:
+            frequency = document.get(token, 0)
+            if frequency == 0:
+                continue
+            idf = math.log(
+                1
+                + (len(documents) - document_frequency[token] + 0.5)
+                / (document_frequency[token] + 0.5)
+            )
+            score += (
+                idf
+                * frequency
+                * (BM25_K1 + 1)
+                / (
+                    frequency
+                    + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                )
+            )
+        scores.append(score)
+
+    return scores
+
+
+def rank_segments(scores: List[float]) -> List[int]:
+    """
+    Ranks the segments by their score from `score_segments`, most relevant first.
+    Segments with equal scores keep their order on the page.
+
+    Args:
+        scores (List[float]): The score of each segment.
+
+    Returns:
+        List[int]: The indexes of the segments, ordered by relevance.
+    """
+    return sorted(range(len(scores)), key=lambda index: -scores[index])
@@ -1,11 +1,14 @@
 import json
-from typing import Any, Dict, List, Optional, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 import litellm
 from litellm.files.main import ModelResponse
 from loguru import logger
 from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
 
+from dendrite.logic.llm.response_cache import LLMResponseCache
+from dendrite.logic.llm.scheduler import Priority, estimate_tokens, get_scheduler
+
 Message = ChatCompletionMessageParam
 
 
@@ -87,6 +90,10 @@ class LLM:
         api_version: Optional[str] = None,
         api_key: Optional[str] = None,
         callbacks: List[Any] = [],
+        max_in_flight: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        image_max_width: Optional[int] = None,
+        image_quality: Optional[int] = None,
         **kwargs,
     ):
         self.model = model
@@ -110,35 +117,56 @@ class LLM:
         self.callbacks = callbacks
         self.kwargs = kwargs
 
+        # The screenshots sent to the model are downscaled and compressed with these
+        self.image_max_width = image_max_width
+        self.image_quality = image_quality
+
+        # The limits are shared by every LLM using the same model
+        self.scheduler = get_scheduler(model)
+        if max_in_flight is not None or tokens_per_minute is not None:
+            self.scheduler.configure(max_in_flight, tokens_per_minute)
+
         litellm.drop_params = True
 
+    def get_params(self, messages: Any) -> Dict[str, Any]:
+        """
+        Gets the LiteLLM completion parameters for the messages, leaving out unset ones.
+
+        Args:
+            messages (Any): The messages to send to the model.
+
+        Returns:
+            Dict[str, Any]: The completion parameters.
+        """
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "timeout": self.timeout,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "n": self.n,
+            "stop": self.stop,
+            "max_tokens": self.max_tokens or self.max_completion_tokens,
+            "presence_penalty": self.presence_penalty,
+            "frequency_penalty": self.frequency_penalty,
+            "logit_bias": self.logit_bias,
+            "response_format": self.response_format,
+            "seed": self.seed,
+            "logprobs": self.logprobs,
+            "top_logprobs": self.top_logprobs,
+            "api_base": self.base_url,
+            "api_version": self.api_version,
+            "api_key": self.api_key,
+            "stream": False,
+            **self.kwargs,
+        }
+
+        return {k: v for k, v in params.items() if v is not None}
+
     def call(self, messages: Message) -> str:
 
         try:
-            params = {
-                "model": self.model,
-                "messages": messages,
-                "timeout": self.timeout,
-                "temperature": self.temperature,
-                "top_p": self.top_p,
-                "n": self.n,
-                "stop": self.stop,
-                "max_tokens": self.max_tokens or self.max_completion_tokens,
-                "presence_penalty": self.presence_penalty,
-                "frequency_penalty": self.frequency_penalty,
-                "logit_bias": self.logit_bias,
-                "response_format": self.response_format,
-                "seed": self.seed,
-                "logprobs": self.logprobs,
-                "top_logprobs": self.top_logprobs,
-                "api_base": self.base_url,
-                "api_version": self.api_version,
-                "api_key": self.api_key,
-                "stream": False,
-                **self.kwargs,
-            }
-
-            params = {k: v for k, v in params.items() if v is not None}
+            params = self.get_params(messages)
 
             response = litellm.completion(**params)
             response = cast(ModelResponse, response)
@@ -151,36 +179,24 @@ class LLM:
 
             raise  # Re-raise the exception after logging
 
-    async def acall(self, messages: List[Message]) -> ModelResponse:
+    async def acall(
+        self, messages: List[Message], priority: Priority = "interactive"
+    ) -> ModelResponse:
 
         try:
-            params = {
-                "model": self.model,
-                "messages": messages,
-                "timeout": self.timeout,
-                "temperature": self.temperature,
-                "top_p": self.top_p,
-                "n": self.n,
-                "stop": self.stop,
-                "max_tokens": self.max_tokens or self.max_completion_tokens,
-                "presence_penalty": self.presence_penalty,
-                "frequency_penalty": self.frequency_penalty,
-                "logit_bias": self.logit_bias,
-                "response_format": self.response_format,
-                "seed": self.seed,
-                "logprobs": self.logprobs,
-                "top_logprobs": self.top_logprobs,
-                "api_base": self.base_url,
-                "api_version": self.api_version,
-                "api_key": self.api_key,
-                "stream": False,
-                **self.kwargs,
-            }
-
-            params = {k: v for k, v in params.items() if v is not None}
-
-            response = await litellm.acompletion(**params)
-            response = cast(ModelResponse, response)
+            params = self.get_params(messages)
+
+            reservation = await self.scheduler.acquire(
+                estimate_tokens(messages, params.get("max_tokens")), priority
+            )
+            used_tokens = None
+            try:
+                response = await litellm.acompletion(**params)
+                response = cast(ModelResponse, response)
+                usage = getattr(response, "usage", None)
+                used_tokens = getattr(usage, "total_tokens", None)
+            finally:
+                self.scheduler.release(reservation, used_tokens)
             return response
         except Exception as e:
             if not LLMContextLengthExceededException(str(e))._is_context_limit_error(
@@ -199,6 +215,8 @@ class Agent:
         self,
         model: Union[LLM, str],
         system_prompt: Optional[str] = None,
+        priority: Priority = "interactive",
+        response_cache: Optional[LLMResponseCache] = None,
     ):
         self.messages: List[Message] = (
             [] if not system_prompt else [{"role": "system", "content": system_prompt}]
@@ -209,6 +227,11 @@ class Agent:
         else:
             self.llm = model
 
+        self.priority: Priority = priority
+        self.response_cache = response_cache
+        # The key and text of the last response of the model, until it is cached
+        self._uncached_response: Optional[Tuple[str, str]] = None
+
     async def add_message(self, message: str) -> str:
         self.messages.append({"role": "user", "content": message})
 
@@ -219,7 +242,21 @@ class Agent:
         return text
 
     async def call_llm(self, messages: List[Message]) -> str:
-        res = await self.llm.acall(messages)
+        """
+        Gets the response of the model to the messages, from the response cache if enabled.
+
+        A response of the model isn't cached until the caller accepts it with
+        `cache_response`, so that malformed responses aren't replayed to every retry.
+        """
+        self._uncached_response = None
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.key(self.llm.get_params(messages))
+            cached_text = self.response_cache.get(cache_key)
+            if cached_text is not None:
+                return cached_text
+
+        res = await self.llm.acall(messages, priority=self.priority)
 
         if len(res.choices) == 0:
             logger.error("No choices outputed: ", res)
@@ -233,4 +270,17 @@ class Agent:
                 f"No text content in the response | response: {res} ",
             )
             raise Exception("No text content in the response")
+
+        if cache_key is not None:
+            self._uncached_response = (cache_key, text)
         return text
+
+    def cache_response(self) -> None:
+        """
+        Stores the last response of the model in the response cache. Call it once the
+        response has been parsed and is worth reusing, e.g. not a failure that a retry
+        should ask about again.
+        """
+        if self._uncached_response is not None and self.response_cache is not None:
+            self.response_cache.set(*self._uncached_response)
+        self._uncached_response = None
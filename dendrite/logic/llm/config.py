@@ -1,6 +1,7 @@
-from typing import Dict, Literal, Optional, overload
+from typing import Dict, Iterable, Literal, Optional, Set, overload
 
 from dendrite.logic.llm.agent import LLM
+from dendrite.logic.llm.response_cache import LLMResponseCache
 
 AGENTS = Literal[
     "extract_agent",
@@ -26,6 +27,9 @@ DEFAULT_LLM: Dict[str, LLM] = {
     ),
 }
 
+# The default agents run at temperature 0, so identical requests can share a response
+DEFAULT_CACHED_AGENTS = {"segment_agent", "select_agent"}
+
 
 class LLMConfig:
     """
@@ -38,12 +42,16 @@ class LLMConfig:
     Attributes:
         registered_llms (Dict[str, LLM]): Dictionary mapping agent names to their LLM configurations
         default_llm (LLM): Default LLM configuration used when no specific agent is found
+        response_cache (Optional[LLMResponseCache]): Cache for the responses of the cached agents
+        cached_agents (Set[str]): Names of the agents whose responses are cached
     """
 
     def __init__(
         self,
         default_agents: Optional[Dict[str, LLM]] = None,
         default_llm: Optional[LLM] = None,
+        response_cache: Optional[LLMResponseCache] = None,
+        cached_agents: Optional[Iterable[str]] = None,
     ):
         """
         Initialize the LLMConfig with optional default configurations.
@@ -53,6 +61,10 @@ class LLMConfig:
                 configurations to override the default agents. Defaults to None.
             default_llm (Optional[LLM]): Default LLM configuration to use when no
                 specific agent is found. If None, uses Claude 3 Sonnet with default settings.
+            response_cache (Optional[LLMResponseCache]): Cache to reuse the responses of
+                identical requests from the cached agents. Defaults to None, i.e. no caching.
+            cached_agents (Optional[Iterable[str]]): Names of the agents to cache the
+                responses of. Defaults to the segment and select agents.
         """
         self.registered_llms: Dict[str, LLM] = DEFAULT_LLM.copy()
         if default_agents:
@@ -62,6 +74,11 @@ class LLMConfig:
             "claude-3-5-sonnet-20241022", temperature=0.3, max_tokens=1500
         )
 
+        self.response_cache = response_cache
+        self.cached_agents: Set[str] = set(
+            cached_agents if cached_agents is not None else DEFAULT_CACHED_AGENTS
+        )
+
     async def register_agent(self, agent: str, llm: LLM) -> None:
         """
         Register a single LLM agent configuration.
@@ -133,3 +150,18 @@ class LLMConfig:
             return self.default_llm
 
         return None
+
+    def get_response_cache(self, agent: str) -> Optional[LLMResponseCache]:
+        """
+        Get the response cache to use for an agent.
+
+        Args:
+            agent (str): The name of the agent
+
+        Returns:
+            Optional[LLMResponseCache]: The response cache if caching is enabled for the agent,
+                otherwise None.
+        """
+        if agent in self.cached_agents:
+            return self.response_cache
+        return None
@@ -0,0 +1,187 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from loguru import logger
+
+# Parameters that don't change the response of the model
+IGNORED_PARAMS = {"api_key", "timeout", "stream"}
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of LLM responses persisted on disk, one file per response.
+
+    Responses are keyed by the hash of the model, its parameters and the messages, so only
+    identical requests share a response. It is meant for deterministic agents, e.g. those
+    running at temperature 0, and is enabled per agent in `LLMConfig`.
+
+    Attributes:
+        cache_dir (Path): The directory the responses are stored in.
+        ttl (Optional[float]): The number of seconds a response stays valid, or None to keep it forever.
+        max_entries (int): The maximum number of responses kept, the least recently used are evicted first.
+        hits (int): The number of requests answered from the cache.
+        misses (int): The number of requests that had to call the model.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path] = ".dendrite/cache/llm",
+        ttl: Optional[float] = 7 * 24 * 60 * 60,
+        max_entries: int = 10000,
+    ):
+        """
+        Initialize the cache, indexing the responses already stored in `cache_dir`.
+
+        Args:
+            cache_dir (Union[str, Path]): The directory to store the responses in.
+                Defaults to ".dendrite/cache/llm".
+            ttl (Optional[float]): The number of seconds a response stays valid, or None
+                to keep responses forever. Defaults to 7 days.
+            max_entries (int): The maximum number of responses to keep. Defaults to 10000.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # Keys ordered from least to most recently used
+        self._index: "OrderedDict[str, None]" = OrderedDict()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entries = sorted(self.cache_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for entry in entries:
+            self._index[entry.stem] = None
+
+    def key(self, params: Dict[str, Any]) -> str:
+        """
+        Creates the key of a request.
+
+        Args:
+            params (Dict[str, Any]): The completion parameters, including the model and messages.
+
+        Returns:
+            str: The sha256 hash of the parameters that affect the response.
+        """
+        relevant = {k: v for k, v in params.items() if k not in IGNORED_PARAMS}
+        serialized = json.dumps(relevant, sort_keys=True, default=str)
+        return sha256(serialized.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Gets a cached response, counting the lookup as a hit or a miss.
+
+        Args:
+            key (str): The key from `key`.
+
+        Returns:
+            Optional[str]: The cached response, or None if it isn't cached or has expired.
+        """
+        text = self._read(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if key in self._index:
+                    self._index.move_to_end(key)
+
+        if text is not None:
+            logger.debug(
+                f"LLM response cache hit, hit rate: {self.hit_rate:.0%} of {self.hits + self.misses} requests"
+            )
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        """
+        Stores a response, evicting the least recently used ones above `max_entries`.
+
+        Args:
+            key (str): The key from `key`.
+            text (str): The response of the model.
+        """
+        path = self._path(key)
+        with self._lock:
+            # Replace the file at once, so other processes never read a partial response
+            tmp_path = path.with_name(
+                f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            tmp_path.write_text(json.dumps({"text": text, "created_at": time.time()}))
+            os.replace(tmp_path, path)
+            self._index[key] = None
+            self._index.move_to_end(key)
+
+            while len(self._index) > self.max_entries:
+                evicted, _ = self._index.popitem(last=False)
+                self._remove(evicted)
+
+    def clear(self) -> None:
+        """Removes all cached responses and resets the hit and miss counters."""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._index.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of requests answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Gets the usage statistics of the cache.
+
+        Returns:
+            Dict[str, Union[int, float]]: The hits, misses, hit rate and number of entries.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "entries": len(self._index),
+        }
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[str]:
+        # The file is read even for keys missing from the index, since other processes
+        # sharing the directory may have stored them after this cache was created
+        try:
+            entry = json.loads(self._path(key).read_text())
+        except (OSError, json.JSONDecodeError):
+            with self._lock:
+                self._index.pop(key, None)
+            return None
+
+        if self.ttl is not None and time.time() - entry["created_at"] > self.ttl:
+            with self._lock:
+                self._index.pop(key, None)
+                self._remove(key)
+            return None
+
+        with self._lock:
+            self._index[key] = None
+
+        # Keep the modification time in line with the recency used for eviction
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return entry["text"]
+
+    def _remove(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
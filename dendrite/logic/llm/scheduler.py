@@ -0,0 +1,252 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Literal, Optional, Tuple
+
+from loguru import logger
+
+Priority = Literal["interactive", "background"]
+
+# Lower values are scheduled first
+PRIORITY_ORDER: Dict[str, int] = {"interactive": 0, "background": 1}
+
+DEFAULT_MAX_IN_FLIGHT = 10
+TOKEN_WINDOW_SECONDS = 60.0
+IMAGE_TOKEN_ESTIMATE = 1500
+
+
+class Reservation:
+    """A slot reserved in an `LLMScheduler`, to be released once the request is done."""
+
+    def __init__(self, tokens: int, future: "asyncio.Future[None]"):
+        self.tokens = tokens
+        self.future = future
+        self.granted = False
+        self.usage: Optional[List[float]] = None
+
+
+class LLMScheduler:
+    """
+    Schedules the requests to a model so that at most `max_in_flight` of them run at once
+    and at most `tokens_per_minute` tokens are used in any 60 second window.
+
+    Waiting requests are started by priority, then in the order they were made. The
+    scheduler is shared between threads and event loops, since the sync logic engine runs
+    its coroutines in their own loops.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = DEFAULT_MAX_IN_FLIGHT,
+        tokens_per_minute: Optional[int] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.tokens_per_minute = tokens_per_minute
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queue: List[Tuple[int, int, Reservation]] = []
+        self._sequence = itertools.count()
+        self._usage: Deque[List[float]] = deque()
+        # Dispatches the queue again once the token budget frees up
+        self._timer: Optional[threading.Timer] = None
+        self._timer_due = 0.0
+
+    def configure(
+        self,
+        max_in_flight: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+    ) -> None:
+        """
+        Updates the limits of the scheduler. Limits that are None are left unchanged.
+
+        Args:
+            max_in_flight (Optional[int]): The maximum number of concurrent requests.
+            tokens_per_minute (Optional[int]): The maximum number of tokens per minute.
+        """
+        with self._lock:
+            if max_in_flight is not None:
+                self.max_in_flight = max_in_flight
+            if tokens_per_minute is not None:
+                self.tokens_per_minute = tokens_per_minute
+            self._dispatch()
+
+    async def acquire(
+        self, tokens: int, priority: Priority = "interactive"
+    ) -> Reservation:
+        """
+        Waits until a request of the given size can be made to the model.
+
+        Args:
+            tokens (int): The estimated number of tokens of the request and its response.
+            priority (Priority): "interactive" requests are started before "background" ones.
+
+        Returns:
+            Reservation: The reservation to pass to `release` once the request is done.
+        """
+        reservation = Reservation(tokens, asyncio.get_running_loop().create_future())
+
+        with self._lock:
+            heapq.heappush(
+                self._queue,
+                (PRIORITY_ORDER[priority], next(self._sequence), reservation),
+            )
+            retry_after = self._dispatch()
+
+        try:
+            while not reservation.future.done():
+                await asyncio.wait({reservation.future}, timeout=retry_after)
+                if not reservation.future.done():
+                    with self._lock:
+                        retry_after = self._dispatch()
+        except BaseException:
+            with self._lock:
+                if reservation.granted:
+                    self._release(reservation, None)
+                else:
+                    self._queue = [
+                        item for item in self._queue if item[2] is not reservation
+                    ]
+                    heapq.heapify(self._queue)
+                    self._dispatch()
+            raise
+
+        return reservation
+
+    def release(self, reservation: Reservation, used_tokens: Optional[int]) -> None:
+        """
+        Releases a reservation and starts the next waiting requests.
+
+        Args:
+            reservation (Reservation): The reservation returned by `acquire`.
+            used_tokens (Optional[int]): The number of tokens the request actually used,
+                replacing the estimate in the token budget if known.
+        """
+        with self._lock:
+            self._release(reservation, used_tokens)
+
+    def _release(self, reservation: Reservation, used_tokens: Optional[int]) -> None:
+        self._in_flight -= 1
+        if used_tokens is not None and reservation.usage is not None:
+            reservation.usage[1] = used_tokens
+        self._dispatch()
+
+    def _dispatch(self) -> Optional[float]:
+        """
+        Grants the waiting reservations that fit within the limits. Must be called with the lock held.
+
+        Returns:
+            Optional[float]: The seconds until the token budget frees up if it blocks the next
+                request, otherwise None.
+        """
+        now = time.monotonic()
+        while self._usage and self._usage[0][0] <= now - TOKEN_WINDOW_SECONDS:
+            self._usage.popleft()
+
+        while self._queue:
+            reservation = self._queue[0][2]
+
+            if self.max_in_flight is not None and self._in_flight >= self.max_in_flight:
+                return None
+
+            if self.tokens_per_minute is not None and self._usage:
+                used = sum(tokens for _, tokens in self._usage)
+                # A request larger than the whole budget still runs once the window is empty
+                if used + reservation.tokens > self.tokens_per_minute:
+                    delay = max(0.0, self._usage[0][0] + TOKEN_WINDOW_SECONDS - now)
+                    # Nothing else may call dispatch before then, e.g. after a release
+                    self._schedule_dispatch(delay)
+                    return delay
+
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            reservation.granted = True
+            reservation.usage = [now, reservation.tokens]
+            self._usage.append(reservation.usage)
+
+            try:
+                reservation.future.get_loop().call_soon_threadsafe(
+                    _resolve, reservation.future
+                )
+            except RuntimeError:
+                # The loop of the waiting request was closed
+                logger.debug("Dropping a reservation of a closed event loop")
+                self._in_flight -= 1
+
+        return None
+
+    def _schedule_dispatch(self, delay: float) -> None:
+        """
+        Makes sure the queue is dispatched again in `delay` seconds, unless it already will
+        be sooner. Must be called with the lock held.
+        """
+        due = time.monotonic() + delay
+        if self._timer is not None:
+            if self._timer_due <= due:
+                return
+            self._timer.cancel()
+
+        def on_timer() -> None:
+            with self._lock:
+                if self._timer is timer:
+                    self._timer = None
+                self._dispatch()
+
+        timer = threading.Timer(delay, on_timer)
+        timer.daemon = True
+        self._timer = timer
+        self._timer_due = due
+        timer.start()
+
+
+def _resolve(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_schedulers: Dict[str, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model: str) -> LLMScheduler:
+    """
+    Gets the scheduler shared by all requests to a model, creating it on first use.
+
+    Args:
+        model (str): The model name.
+
+    Returns:
+        LLMScheduler: The scheduler of the model.
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(model)
+        if scheduler is None:
+            scheduler = LLMScheduler()
+            _schedulers[model] = scheduler
+        return scheduler
+
+
+def estimate_tokens(messages: List[Any], max_tokens: Optional[int]) -> int:
+    """
+    Roughly estimates the tokens of a request from its messages, assuming ~4 characters per
+    token, plus the maximum number of tokens of its response.
+    """
+    characters = 0
+    images = 0
+    for message in messages:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, str):
+            characters += len(content)
+        elif isinstance(content, list):
+            for part in content:
+                if not isinstance(part, dict):
+                    continue
+                if part.get("type") == "text":
+                    characters += len(part.get("text", ""))
+                elif part.get("type") == "image_url":
+                    images += 1
+
+    return characters // 4 + images * IMAGE_TOKEN_ESTIMATE + (max_tokens or 0)
@@ -1,22 +1,37 @@
 import asyncio
 import threading
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Coroutine, List, TypeVar
+from typing import Any, Coroutine, List, Optional, TypeVar
 
 from dendrite.logic.ask import ask
+from dendrite.logic.cache.result_cache import cache_result, get_cached_result
 from dendrite.logic.config import Config
 from dendrite.logic.extract import extract
 from dendrite.logic.get_element import get_element
 from dendrite.logic.verify_interaction import verify_interaction
 from dendrite.models.dto.ask_page_dto import AskPageDTO
-from dendrite.models.dto.cached_extract_dto import CachedExtractDTO
-from dendrite.models.dto.cached_selector_dto import CachedSelectorDTO
+from dendrite.models.dto.cached_extract_dto import (
+    CachedExtractDTO,
+    CachedScriptResultDTO,
+    RunCachedScriptsDTO,
+)
+from dendrite.models.dto.cached_result_dto import CachedResultDTO
+from dendrite.models.dto.cached_selector_dto import (
+    CachedSelectorDTO,
+    CachedSelectorResultDTO,
+)
 from dendrite.models.dto.extract_dto import ExtractDTO
 from dendrite.models.dto.get_elements_dto import GetElementsDTO
 from dendrite.models.dto.make_interaction_dto import VerifyActionDTO
 from dendrite.models.response.ask_page_response import AskPageResponse
-from dendrite.models.response.extract_response import ExtractResponse
-from dendrite.models.response.get_element_response import GetElementResponse
+from dendrite.models.response.extract_response import (
+    ExtractResponse,
+    RunCachedScriptsResponse,
+)
+from dendrite.models.response.get_element_response import (
+    GetElementResponse,
+    GetElementsResponse,
+)
 from dendrite.models.response.interaction_response import InteractionResponse
 from dendrite.models.scripts import Script
 from dendrite.models.selector import Selector
@@ -57,17 +72,43 @@ class LogicEngine:
     def get_element(self, dto: GetElementsDTO) -> GetElementResponse:
         return run_coroutine_sync(get_element.get_element(dto, self._config))
 
+    def get_elements(self, dto: GetElementsDTO) -> GetElementsResponse:
+        return run_coroutine_sync(get_element.get_elements(dto, self._config))
+
     def get_cached_selectors(self, dto: CachedSelectorDTO) -> List[Selector]:
         return run_coroutine_sync(get_element.get_cached_selector(dto, self._config))
 
     def get_cached_scripts(self, dto: CachedExtractDTO) -> List[Script]:
         return run_coroutine_sync(extract.get_cached_scripts(dto, self._config))
 
+    def record_cached_selector_results(self, dto: CachedSelectorResultDTO) -> None:
+        run_coroutine_sync(
+            get_element.record_cached_selector_results(dto, self._config)
+        )
+
+    def record_cached_script_results(self, dto: CachedScriptResultDTO) -> None:
+        run_coroutine_sync(extract.record_cached_script_results(dto, self._config))
+
+    def run_cached_scripts(self, dto: RunCachedScriptsDTO) -> RunCachedScriptsResponse:
+        return run_coroutine_sync(extract.run_cached_scripts(dto, self._config))
+
+    @property
+    def result_cache_enabled(self) -> bool:
+        return self._config.result_cache is not None
+
+    def get_cached_result(self, dto: CachedResultDTO) -> Optional[Any]:
+        return get_cached_result(dto, self._config.result_cache)
+
+    def cache_result(self, dto: CachedResultDTO) -> None:
+        cache_result(dto, self._config.result_cache)
+
     def extract(self, dto: ExtractDTO) -> ExtractResponse:
+        dto.page_information.take_deferred_screenshot()
         return run_coroutine_sync(extract.extract(dto, self._config))
 
     def verify_action(self, dto: VerifyActionDTO) -> InteractionResponse:
         return run_coroutine_sync(verify_interaction.verify_action(dto, self._config))
 
     def ask_page(self, dto: AskPageDTO) -> AskPageResponse:
+        dto.page_information.take_deferred_screenshot()
         return run_coroutine_sync(ask.ask_page_action(dto, self._config))
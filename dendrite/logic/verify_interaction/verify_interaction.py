@@ -77,15 +77,20 @@ async def verify_action(
     ]
 
     default = LLM(model="gpt-4o", max_tokens=150)
-    llm = Agent(config.llm_config.get("verify_action", default))
+    llm = Agent(
+        config.llm_config.get("verify_action", default),
+        response_cache=config.llm_config.get_response_cache("verify_action"),
+    )
 
     res = await llm.call_llm(messages)
     try:
         dict_res = json.loads(res)
-        return InteractionResponse(
+        response = InteractionResponse(
             message=dict_res["message"],
             status=dict_res["status"],
         )
+        llm.cache_response()
+        return response
     except:
         pass
 
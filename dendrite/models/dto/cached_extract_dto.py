@@ -1,6 +1,23 @@
+from typing import Any, List, Optional
+
 from pydantic import BaseModel
 
+from dendrite.models.scripts import Script
+
 
 class CachedExtractDTO(BaseModel):
     url: str
     prompt: str
+
+
+class CachedScriptResultDTO(BaseModel):
+    url: str
+    prompt: str
+    succeeded: Optional[str] = None
+    failed: List[str] = []
+
+
+class RunCachedScriptsDTO(BaseModel):
+    scripts: List[Script]
+    raw_html: str
+    return_data_json_schema: Any = None
@@ -0,0 +1,14 @@
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+ResultOperation = Literal["ask", "extract"]
+
+
+class CachedResultDTO(BaseModel):
+    url: str
+    operation: ResultOperation
+    prompt: str
+    dom_fingerprint: str
+    return_data_json_schema: Any = None
+    return_data: Any = None
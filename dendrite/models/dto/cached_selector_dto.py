@@ -1,6 +1,15 @@
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 
 class CachedSelectorDTO(BaseModel):
     url: str
     prompt: str
+
+
+class CachedSelectorResultDTO(BaseModel):
+    url: str
+    prompt: str
+    succeeded: Optional[str] = None
+    failed: List[str] = []
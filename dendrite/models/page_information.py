@@ -1,12 +1,84 @@
-from pydantic import BaseModel
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Optional, Union, cast
+
+from pydantic import BaseModel, PrivateAttr
+
+ScreenshotSource = Callable[[], Union[str, Awaitable[str]]]
 
 
 class PageInformation(BaseModel):
     url: str
     raw_html: str
-    screenshot_base64: str
+    screenshot_base64: Optional[str] = None
     time_since_frame_navigated: float
 
+    _screenshot_source: Optional[ScreenshotSource] = PrivateAttr(default=None)
+    # The screenshot being taken, shared by the consumers reading it at the same time
+    _screenshot_task: Optional["asyncio.Future[Any]"] = PrivateAttr(default=None)
+
+    def defer_screenshot(self, source: ScreenshotSource) -> None:
+        """
+        Sets the function used to take the screenshot the first time it is read,
+        instead of taking it when the page information is created.
+
+        Args:
+            source (ScreenshotSource): Function returning the base64 screenshot, either sync or async.
+        """
+        self._screenshot_source = source
+
+    async def get_screenshot(self) -> str:
+        """
+        Gets the screenshot of the page, taking it on first access if it was deferred.
+        Consumers reading a deferred screenshot at the same time share a single capture.
+
+        Returns:
+            str: The base64 encoded screenshot.
+
+        Raises:
+            ValueError: If the page information was created without a screenshot.
+        """
+        if self.screenshot_base64 is None:
+            if self._screenshot_source is None:
+                raise ValueError(
+                    f"No screenshot was requested for the page information of {self.url}"
+                )
+
+            if self._screenshot_task is None:
+                self._screenshot_task = asyncio.ensure_future(self._take_screenshot())
+            task = self._screenshot_task
+            try:
+                # Shielded, so a consumer being cancelled doesn't cancel the others
+                self.screenshot_base64 = await asyncio.shield(task)
+            except Exception:
+                # The next read tries again
+                if self._screenshot_task is task:
+                    self._screenshot_task = None
+                raise
+
+        return self.screenshot_base64
+
+    async def _take_screenshot(self) -> str:
+        assert self._screenshot_source is not None
+        screenshot = self._screenshot_source()
+        if inspect.isawaitable(screenshot):
+            screenshot = await screenshot
+        return cast(str, screenshot)
+
+    def take_deferred_screenshot(self) -> None:
+        """
+        Takes a deferred screenshot right away if its source is synchronous.
+
+        Synchronous sources, like the Playwright sync API, can't be called from the thread
+        the logic engine runs its coroutines in, so they have to be resolved beforehand.
+        """
+        if (
+            self.screenshot_base64 is None
+            and self._screenshot_source is not None
+            and not inspect.iscoroutinefunction(self._screenshot_source)
+        ):
+            self.screenshot_base64 = cast(str, self._screenshot_source())
+
 
 class PageDiffInformation(BaseModel):
     screenshot_before: str
@@ -0,0 +1,20 @@
+from typing import Any, List, Literal, Optional
+
+from pydantic import BaseModel
+
+PageType = Literal["list", "detail"]
+
+
+class CrawlResult(BaseModel):
+    """A page visited by `crawl`."""
+
+    url: str
+    page_type: Optional[PageType] = None
+    data: Any = None
+    links: List[str] = []
+    next_page: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
@@ -1,8 +1,9 @@
-from typing import Generic, Optional, TypeVar
+from typing import Any, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 
 from dendrite.browser._common.types import Status
+from dendrite.models.scripts import Script
 
 T = TypeVar("T")
 
@@ -12,3 +13,21 @@ class ExtractResponse(BaseModel, Generic[T]):
     message: str
     return_data: Optional[T] = None
     created_script: Optional[str] = None
+
+
+class RunCachedScriptsResponse(BaseModel):
+    script: Optional[Script] = None
+    return_data: Any = None
+    failed: List[str] = []
+
+
+class ExtractManyResult(BaseModel):
+    """The outcome of extracting from one of the URLs passed to `extract_many`."""
+
+    url: str
+    data: Any = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
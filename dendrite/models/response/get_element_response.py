@@ -10,3 +10,7 @@ class GetElementResponse(BaseModel):
     d_id: Optional[str] = None
     selectors: Optional[List[str]] = None
     message: str = ""
+
+
+class GetElementsResponse(BaseModel):
+    elements: Dict[str, GetElementResponse]
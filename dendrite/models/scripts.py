@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -6,3 +8,8 @@ class Script(BaseModel):
     domain: str
     script: str
     created_at: str
+    path_template: Optional[str] = None
+    success_count: int = 0
+    failure_count: int = 0
+    consecutive_failures: int = 0
+    last_success_at: Optional[str] = None
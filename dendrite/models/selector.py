@@ -1,5 +1,15 @@
+from typing import Literal, Optional
+
 from pydantic import BaseModel
 
+SelectorStrategy = Literal["attribute", "text", "structural", "xpath"]
+
+
+class SelectorVariant(BaseModel):
+    selector: str
+    strategy: SelectorStrategy
+    stability: float
+
 
 class Selector(BaseModel):
     selector: str
@@ -7,3 +17,10 @@ class Selector(BaseModel):
     url: str
     netloc: str
     created_at: str
+    path_template: Optional[str] = None
+    strategy: Optional[SelectorStrategy] = None
+    stability: Optional[float] = None
+    success_count: int = 0
+    failure_count: int = 0
+    consecutive_failures: int = 0
+    last_success_at: Optional[str] = None
@@ -0,0 +1,115 @@
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dendrite import AsyncDendrite
+
+pytest_plugins = ("pytest_asyncio",)
+
+ITEMS_PER_PAGE = 10
+CATEGORIES = 20
+
+
+def _list_page(page: int, item_ids, next_page=None) -> str:
+    items = "".join(
+        f"""
+        <li class="product">
+          <h2>Product {i}</h2>
+          <a href="/products/{i}.html">View the details of product {i}</a>
+          <p>A short description of product {i}, long enough to be collapsed.</p>
+        </li>"""
+        for i in item_ids
+    )
+    next_link = (
+        f'<a rel="next" href="/list/{next_page}.html">Next</a>' if next_page else ""
+    )
+    return f"""
+<html>
+  <body>
+    <nav><a href="/">Home</a> <a href="https://example.com/">External</a></nav>
+    <h1>Products, page {page}</h1>
+    <ul>{items}</ul>
+    {next_link}
+  </body>
+</html>
+"""
+
+
+def _detail_page(i: int) -> str:
+    # A long category menu, which mustn't make the page look like a list page
+    categories = "".join(
+        f'<li><a href="/categories/{category}.html">Category {category}</a></li>'
+        for category in range(CATEGORIES)
+    )
+    return f"""
+<html>
+  <body>
+    <nav><ul>{categories}</ul></nav>
+    <h1>Product {i}</h1>
+    <p>Price: {i}.99</p>
+  </body>
+</html>
+"""
+
+
+@pytest.fixture(scope="module")
+def static_site(tmp_path_factory):
+    """Serves two pages of a product list and a page per product, with a category menu, on localhost."""
+    root = tmp_path_factory.mktemp("site")
+    (root / "list").mkdir()
+    (root / "products").mkdir()
+
+    first_page = list(range(ITEMS_PER_PAGE))
+    # The second page repeats the first product, which must only be visited once
+    second_page = [0] + list(range(ITEMS_PER_PAGE, 2 * ITEMS_PER_PAGE))
+    (root / "list" / "1.html").write_text(_list_page(1, first_page, next_page=2))
+    (root / "list" / "2.html").write_text(_list_page(2, second_page))
+    for i in range(2 * ITEMS_PER_PAGE):
+        (root / "products" / f"{i}.html").write_text(_detail_page(i))
+
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_crawl_visits_list_and_detail_pages_once(static_site):
+    """The crawl should follow the pagination and visit every product once, without following the category menu."""
+    async with AsyncDendrite(playwright_options={"headless": True}) as browser:
+        results = [
+            result
+            async for result in browser.crawl(
+                f"{static_site}/list/1.html", concurrency=3
+            )
+        ]
+
+    assert all(result.ok for result in results)
+    urls = [result.url for result in results]
+    assert len(urls) == len(set(urls))
+
+    list_pages = {result.url for result in results if result.page_type == "list"}
+    detail_pages = {result.url for result in results if result.page_type == "detail"}
+    assert list_pages == {f"{static_site}/list/1.html", f"{static_site}/list/2.html"}
+    assert detail_pages == {
+        f"{static_site}/products/{i}.html" for i in range(2 * ITEMS_PER_PAGE)
+    }
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_crawl_stops_at_max_pages(static_site):
+    """The crawl should visit no more than `max_pages` pages."""
+    async with AsyncDendrite(playwright_options={"headless": True}) as browser:
+        results = [
+            result
+            async for result in browser.crawl(
+                f"{static_site}/list/1.html", max_pages=5, concurrency=2
+            )
+        ]
+
+    assert len(results) == 5
+    assert results[0].page_type == "list"
@@ -0,0 +1,279 @@
+import functools
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dendrite import AsyncDendrite
+from dendrite.browser.async_api._utils import (
+    _attempt_on_dom_change_helper,
+    elements_from_query_results,
+    query_selectors_in_page,
+)
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+async def _get_elements_from_selectors(page, selectors, only_one):
+    """Tests cached selectors against the live page, like `get_element` does."""
+    results = await query_selectors_in_page(page, selectors)
+    return elements_from_query_results(page, results, only_one)
+
+
+PAGE_HTML = """
+<html>
+  <body>
+    <h1 id="title">Snapshot test</h1>
+    <div class="hidden" style="display: none">Hidden text</div>
+    <ul>
+      <li>First</li>
+      <li>Second</li>
+    </ul>
+    <iframe srcdoc="<html><body><button>Inside iframe</button></body></html>"></iframe>
+  </body>
+</html>
+"""
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_cdp_snapshot_matches_content_capture():
+    """The CDP snapshot capture should produce the same d-ids as the content() capture."""
+    async with AsyncDendrite(
+        playwright_options={"headless": True},
+        capture_mode="cdp_snapshot",
+    ) as browser:
+        page = await browser.get_active_page()
+        await page.playwright_page.set_content(PAGE_HTML)
+        await page.playwright_page.frames[-1].wait_for_load_state()
+
+        snapshot_soup = await page._get_soup()
+
+        browser._capture_mode = "content"
+        page._previous_soup = None
+        content_soup = await page._get_soup()
+
+    snapshot_ids = [tag["d-id"] for tag in snapshot_soup.find_all(attrs={"d-id": True})]
+    content_ids = [tag["d-id"] for tag in content_soup.find_all(attrs={"d-id": True})]
+    assert snapshot_ids == content_ids
+
+    button = snapshot_soup.find("button")
+    assert button is not None
+    assert button.get("iframe-path")
+    assert snapshot_soup.find("div", attrs={"data-hidden": "true"}) is not None
+
+
+@pytest.fixture(scope="module")
+def cross_origin_frame(tmp_path_factory):
+    """Serves a page on 127.0.0.1, which is cross-origin to pages set with `set_content`."""
+    root = tmp_path_factory.mktemp("frame")
+    (root / "frame.html").write_text(
+        "<html><body><button>Cross-origin button</button></body></html>"
+    )
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/frame.html"
+    server.shutdown()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_cdp_snapshot_expands_cross_origin_iframes(cross_origin_frame):
+    """Iframes left out of the CDP snapshot should still be expanded from their content."""
+    async with AsyncDendrite(
+        playwright_options={"headless": True},
+        capture_mode="cdp_snapshot",
+    ) as browser:
+        page = await browser.get_active_page()
+        await page.playwright_page.set_content(
+            f'<html><body><h1>Host</h1><iframe src="{cross_origin_frame}"></iframe></body></html>'
+        )
+        await page.playwright_page.frames[-1].wait_for_load_state()
+
+        soup = await page._get_soup()
+
+    button = soup.find("button")
+    assert button is not None
+    assert button.get("d-id")
+    assert button.get("iframe-path")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_soup_reuses_unchanged_dom(dendrite_browser: AsyncDendrite):
+    """The previous soup should be reused until the DOM is mutated."""
+    page = await dendrite_browser.get_active_page()
+    await page.playwright_page.set_content(PAGE_HTML)
+
+    first_soup = await page._get_soup()
+    assert await page._get_soup() is first_soup
+
+    await page.playwright_page.evaluate(
+        "document.querySelector('ul').appendChild(document.createElement('li'))"
+    )
+    changed_soup = await page._get_soup()
+    assert changed_soup is not first_soup
+    assert len(changed_soup.find_all("li")) == 3
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_get_soup_recaptures_on_visibility_change(
+    dendrite_browser: AsyncDendrite,
+):
+    """The previous soup shouldn't be reused once an element is revealed without a mutation."""
+    page = await dendrite_browser.get_active_page()
+    await page.playwright_page.set_content(
+        PAGE_HTML.replace(
+            '<div class="hidden" style="display: none">',
+            '<style>@media (min-width: 700px) { .hidden { display: none } }</style><div class="hidden">',
+        )
+    )
+    await page.playwright_page.set_viewport_size({"width": 1280, "height": 720})
+
+    first_soup = await page._get_soup()
+    assert first_soup.find(class_="hidden").get("data-hidden") == "true"
+
+    await page.playwright_page.set_viewport_size({"width": 600, "height": 720})
+    changed_soup = await page._get_soup()
+    assert changed_soup is not first_soup
+    assert changed_soup.find(class_="hidden").get("data-hidden") is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_selectors_are_tested_in_page(dendrite_browser: AsyncDendrite):
+    """Cached selectors should be matched in the browser, including inside iframes."""
+    page = await dendrite_browser.get_active_page()
+    await page.playwright_page.set_content(PAGE_HTML)
+    await page.playwright_page.frames[-1].wait_for_load_state()
+
+    items = await _get_elements_from_selectors(
+        page, ["#missing", "ul > li"], only_one=False
+    )
+    assert isinstance(items, list) and len(items) == 2
+    assert await items[1].locator.inner_text() == "Second"
+
+    button = await _get_elements_from_selectors(
+        page, ["button", "#missing", "p:::invalid"], only_one=True
+    )
+    assert button is not None
+    assert await button.locator.inner_text() == "Inside iframe"
+
+    heading = await _get_elements_from_selectors(
+        page, ["xpath=//h1[normalize-space(.)='Snapshot test']"], only_one=True
+    )
+    assert heading is not None
+    assert await heading.locator.get_attribute("id") == "title"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_selectors_are_tested_in_cross_origin_iframes(
+    dendrite_browser: AsyncDendrite, cross_origin_frame
+):
+    """Cached selectors should also match inside iframes the main frame can't reach."""
+    page = await dendrite_browser.get_active_page()
+    await page.playwright_page.set_content(
+        f'<html><body><h1>Host</h1><iframe src="{cross_origin_frame}"></iframe></body></html>'
+    )
+    await page.playwright_page.frames[-1].wait_for_load_state()
+
+    button = await _get_elements_from_selectors(page, ["button"], only_one=True)
+    assert button is not None
+    assert await button.locator.inner_text() == "Cross-origin button"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_wait_for_dom_change(dendrite_browser: AsyncDendrite):
+    """Waiting should end as soon as the DOM is mutated and time out on a static page."""
+    page = await dendrite_browser.get_active_page()
+    await page.playwright_page.set_content(PAGE_HTML)
+
+    dom_version = await page._get_dom_version()
+    assert not await page._wait_for_dom_change(dom_version, 0.3)
+
+    await page.playwright_page.evaluate(
+        "setTimeout(() => document.querySelector('ul').appendChild(document.createElement('li')), 100)"
+    )
+    assert await page._wait_for_dom_change(dom_version, 5)
+    assert await page._get_dom_version() != dom_version
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_element_locators_are_reused_until_navigation(
+    dendrite_browser: AsyncDendrite,
+):
+    """Element locators should be reused for the same d-id and dropped on navigation."""
+    page = await dendrite_browser.get_active_page()
+    await page.playwright_page.set_content(PAGE_HTML)
+
+    first = await _get_elements_from_selectors(page, ["#title"], only_one=True)
+    second = await _get_elements_from_selectors(page, ["#title"], only_one=True)
+    assert first is not None and second is not None
+    assert first.locator is second.locator
+    assert await first.locator.inner_text() == "Snapshot test"
+
+    await page.playwright_page.goto("about:blank")
+    assert page._element_locators == {}
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_content_fingerprint_only_changes_with_content(
+    dendrite_browser: AsyncDendrite,
+):
+    """The fingerprint should ignore dendrite ids and reloads, but not changes to the content."""
+    page = await dendrite_browser.get_active_page()
+    await page.playwright_page.set_content(PAGE_HTML)
+    await page.playwright_page.frames[-1].wait_for_load_state()
+
+    fingerprint = await page._get_content_fingerprint()
+    assert fingerprint is not None
+
+    await page._get_soup()
+    assert await page._get_content_fingerprint() == fingerprint
+
+    await page.playwright_page.set_content(PAGE_HTML)
+    await page.playwright_page.frames[-1].wait_for_load_state()
+    assert await page._get_content_fingerprint() == fingerprint
+
+    await page.playwright_page.evaluate(
+        "document.querySelector('h1').textContent = 'Changed'"
+    )
+    assert await page._get_content_fingerprint() != fingerprint
+
+
+class _ConstantlyChangingPage:
+    """Stands in for a page whose DOM changes all the time, e.g. with a ticker."""
+
+    def __init__(self):
+        self.version = 0
+
+    async def _get_dom_version(self):
+        self.version += 1
+        return str(self.version)
+
+    async def _wait_for_dom_change(self, dom_version, timeout):
+        return True
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_attempts_on_dom_change_are_spaced_and_capped():
+    """A page that changes constantly shouldn't be retried in a tight loop."""
+    attempts = []
+
+    async def operation():
+        attempts.append(time.time())
+        return None
+
+    result = await _attempt_on_dom_change_helper(
+        _ConstantlyChangingPage(),
+        "Test",
+        operation,
+        timeout=5,
+        min_intervals=[0.1, 0.2],
+        max_attempts=4,
+    )
+
+    assert result is None
+    assert len(attempts) == 4
+    intervals = [b - a for a, b in zip(attempts, attempts[1:])]
+    assert intervals[0] >= 0.1
+    assert all(interval >= 0.2 for interval in intervals[1:])
@@ -0,0 +1,39 @@
+from typing import Any, List, Optional
+
+import pytest
+
+from dendrite.browser.async_api.mixin.extract import ExtractionMixin
+from dendrite.models.response.extract_response import ExtractResponse
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+class _StubPage(ExtractionMixin):
+    """Returns a fixed list for each step instead of extracting it from a page."""
+
+    def __init__(self, steps: List[List[Any]]):
+        self.steps = steps
+        self.step = 0
+
+    async def _get_extract_response(self, *args, **kwargs) -> Optional[ExtractResponse]:
+        if self.step >= len(self.steps):
+            return None
+        return ExtractResponse(
+            status="success", message="", return_data=self.steps[self.step]
+        )
+
+    async def _load_more_items(self, next_page: Optional[str]) -> bool:
+        self.step += 1
+        return True
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_extract_iter_keeps_duplicates_within_a_step():
+    """Identical rows of one step should all be yielded, while rows of earlier steps are skipped."""
+    row = {"name": "Widget", "price": 10}
+    other = {"name": "Gadget", "price": 20}
+    page = _StubPage([[row, row], [row, row, other], [row, row, other, row]])
+
+    items = [item async for item in page.extract_iter("Get the rows")]
+
+    assert items == [row, row, other, row]
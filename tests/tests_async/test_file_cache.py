@@ -0,0 +1,81 @@
+import asyncio
+import multiprocessing
+import threading
+
+from dendrite.logic.cache.file_cache import FileCache
+from dendrite.logic.get_element.cache import add_selector_to_cache
+from dendrite.models.selector import Selector, SelectorVariant
+
+SELECTORS_PER_PROCESS = 10
+
+
+def test_writes_of_two_caches_on_the_same_file_are_kept(tmp_path):
+    """A cache should keep the entries another cache saved to its file since it was loaded."""
+    path = tmp_path / "cache.json"
+    first, second = FileCache(dict, path), FileCache(dict, path)
+
+    first.append("key", {"value": 1})
+    second.append("key", {"value": 2})
+    first.set("other-key", {"value": 3})
+
+    cache = FileCache(dict, path)
+    assert cache.get("key") == [{"value": 1}, {"value": 2}]
+    assert cache.get("other-key") == [{"value": 3}]
+
+
+def test_concurrent_appends_are_all_saved(tmp_path):
+    """Appends from several caches on the same file at once should all be saved."""
+    path = tmp_path / "cache.json"
+    caches = [FileCache(dict, path) for _ in range(4)]
+
+    def append_all(cache: FileCache, worker: int) -> None:
+        for i in range(20):
+            cache.append("key", {"worker": worker, "value": i})
+
+    threads = [
+        threading.Thread(target=append_all, args=(cache, worker))
+        for worker, cache in enumerate(caches)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(FileCache(dict, path).get("key") or []) == 4 * 20
+
+
+def _add_selectors(path, worker: int, barrier) -> None:
+    cache = FileCache(Selector, path)
+    barrier.wait()
+
+    async def add_all() -> None:
+        for i in range(SELECTORS_PER_PROCESS):
+            variant = SelectorVariant(
+                selector=f"#worker-{worker}-{i}", strategy="attribute", stability=0.9
+            )
+            await add_selector_to_cache(
+                "The button", [variant], "https://example.com/page", cache
+            )
+
+    asyncio.run(add_all())
+
+
+def test_selectors_added_by_two_processes_are_kept(tmp_path):
+    """Selectors cached by several processes sharing the cache file should all be saved."""
+    path = tmp_path / "get_element.json"
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(2)
+    processes = [
+        context.Process(target=_add_selectors, args=(path, worker, barrier))
+        for worker in range(2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    selectors = FileCache(Selector, path).get(
+        {"netloc": "example.com", "prompt": "The button"}
+    )
+    assert len(selectors or []) == 2 * SELECTORS_PER_PROCESS
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from dendrite.logic.extract.generation_lock import (
+    FileGenerationLock,
+    GenerationLockCoordinator,
+    InMemoryGenerationLock,
+    SocketGenerationLock,
+)
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+@pytest.fixture(scope="module")
+def coordinator():
+    coordinator = GenerationLockCoordinator().start()
+    yield coordinator
+    coordinator.stop()
+
+
+@pytest.fixture(params=["memory", "file", "socket"])
+def make_lock(request, tmp_path, coordinator):
+    """Creates locks sharing the same state, like the locks of several processes."""
+    if request.param == "memory":
+        lock = InMemoryGenerationLock()
+        return lambda: lock
+    if request.param == "file":
+        return lambda: FileGenerationLock(tmp_path / "locks", poll_interval=0.05)
+    return lambda: SocketGenerationLock(coordinator.host, coordinator.port)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_only_one_generation_runs_per_key(make_lock):
+    """A single holder should get the lock of a key, and the waiters should wake up once it is released."""
+    first, second = make_lock(), make_lock()
+
+    assert await first.acquire("key")
+    assert not await second.acquire("key")
+    assert await second.acquire("other-key")
+
+    waiter = asyncio.ensure_future(second.wait("key", timeout=5))
+    await asyncio.sleep(0.2)
+    assert not waiter.done()
+
+    await first.release("key")
+    assert await waiter
+    assert await second.acquire("key")
+
+    await second.release("key")
+    await second.release("other-key")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_wait_returns_at_once_when_not_held(make_lock):
+    """Waiting for a lock that was already released shouldn't block."""
+    lock = make_lock()
+    assert await lock.wait("key", timeout=0.5)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_wait_times_out(make_lock):
+    """Waiting should give up after the timeout while the lock is held."""
+    first, second = make_lock(), make_lock()
+    assert await first.acquire("key")
+    assert not await second.wait("key", timeout=0.2)
+    await first.release("key")
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_disconnected_holder_releases_its_locks(coordinator):
+    """The coordinator should release the locks of a client that disconnected, e.g. after crashing."""
+    first = SocketGenerationLock(coordinator.host, coordinator.port)
+    second = SocketGenerationLock(coordinator.host, coordinator.port)
+
+    assert await first.acquire("key")
+    _, writer = first._held.pop("key")
+    writer.close()
+
+    assert await second.wait("key", timeout=5)
+    assert await second.acquire("key")
+    await second.release("key")
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from dendrite.logic.get_element import hanifi_search
+from dendrite.logic.get_element.agents.segment_agent import (
+    SegmentAgentFailureResponse,
+    SegmentAgentSuccessResponse,
+)
+from dendrite.logic.get_element.hanifi_search import get_relevant_tags
+
+pytest_plugins = ("pytest_asyncio",)
+
+PROMPT = "The submit button"
+
+# Only the segment 7 mentions the prompt, so it is ranked first and the others keep their order
+SEGMENTS = [[f'<p d-id="{index}">Paragraph number {index}</p>'] for index in range(10)]
+SEGMENTS[7] = ['<button d-id="7">Submit</button>']
+
+
+@pytest.fixture
+def segment_agent(monkeypatch):
+    calls = []
+    completed = []
+
+    async def extract_relevant_d_ids(prompt, segments, index, llm_config):
+        # Each call records how many calls had completed when it was sent
+        calls.append((index, len(completed)))
+        await asyncio.sleep(0.01)
+        completed.append(index)
+        if "button" in segments[0]:
+            return SegmentAgentSuccessResponse(
+                status="success",
+                reason="The submit button",
+                d_id=[str(index)],
+                index=index,
+            )
+        return SegmentAgentFailureResponse(
+            status="failed", reason="No match", index=index
+        )
+
+    monkeypatch.setattr(hanifi_search, "extract_relevant_d_ids", extract_relevant_d_ids)
+    return calls
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_all_segments_are_sent_at_once_without_early_exit(segment_agent):
+    """Without early exit, every segment should be sent at once in page order."""
+    tags, confident_match = await get_relevant_tags(PROMPT, SEGMENTS, None, wave_size=2)
+
+    assert segment_agent == [(index, 0) for index in range(10)]
+    assert len(tags) == 10
+    assert confident_match is None
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_early_exit_sends_the_next_wave_while_the_first_runs(segment_agent):
+    """A confident match in the first wave should end the search after the second wave was sent."""
+    tags, confident_match = await get_relevant_tags(
+        PROMPT, SEGMENTS, None, wave_size=2, early_exit=True
+    )
+
+    assert segment_agent == [(7, 0), (0, 0), (1, 0), (2, 0)]
+    assert confident_match is not None and confident_match.d_id == ["7"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_waves_without_confident_match_are_capped(segment_agent, monkeypatch):
+    """Without a confident match, the last wave should send all the remaining segments."""
+    monkeypatch.setattr(hanifi_search, "is_confident_match", lambda res, scores: False)
+    tags, confident_match = await get_relevant_tags(
+        PROMPT, SEGMENTS, None, wave_size=2, early_exit=True
+    )
+
+    assert [index for index, _ in segment_agent] == [7, 0, 1, 2, 3, 4, 5, 6, 8, 9]
+    # The first two waves are sent together, the last one once the first has completed
+    assert all(completed == 0 for _, completed in segment_agent[:4])
+    assert all(completed >= 2 for _, completed in segment_agent[4:])
+    assert [tag.index for tag in tags] == list(range(10))
+    assert confident_match is None
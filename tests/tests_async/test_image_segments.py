@@ -0,0 +1,51 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from dendrite.logic.ask.image import ImageSegments, segment_image
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+def _screenshot(width: int, height: int) -> str:
+    buffer = io.BytesIO()
+    Image.effect_noise((width, height), 60).convert("RGB").save(buffer, "PNG")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+def _size(segment: str):
+    return Image.open(io.BytesIO(base64.b64decode(segment))).size
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_segments_match_eager_segmentation():
+    """Segments fetched lazily should be the same as the ones encoded at once, in page order."""
+    screenshot = _screenshot(300, 2500)
+    segments = ImageSegments(screenshot, segment_height=1000)
+
+    assert len(segments) == 3
+    lazy = [await segments.get(i) for i in range(len(segments))]
+    assert lazy == segment_image(screenshot, segment_height=1000)
+    assert [_size(segment) for segment in lazy] == [
+        (300, 1000),
+        (300, 1000),
+        (300, 500),
+    ]
+
+    with pytest.raises(IndexError):
+        await segments.get(3)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_segments_are_downscaled_and_compressed():
+    """Segments wider than `max_width` should be downscaled, keeping their aspect ratio."""
+    screenshot = _screenshot(1200, 1000)
+    full = await ImageSegments(screenshot, segment_height=1000).get(0)
+    small = await ImageSegments(
+        screenshot, segment_height=1000, max_width=600, quality=50
+    ).get(0)
+
+    assert _size(small) == (600, 500)
+    assert len(small) < len(full)
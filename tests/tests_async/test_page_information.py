@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from dendrite.models.page_information import PageInformation
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_deferred_screenshot_is_taken_once():
+    """Consumers reading a deferred screenshot at the same time should share one capture."""
+    calls = 0
+
+    async def take_screenshot() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "screenshot"
+
+    page_information = PageInformation(
+        url="https://example.com", raw_html="", time_since_frame_navigated=0
+    )
+    page_information.defer_screenshot(take_screenshot)
+
+    screenshots = await asyncio.gather(
+        *(page_information.get_screenshot() for _ in range(3))
+    )
+
+    assert screenshots == ["screenshot"] * 3
+    assert calls == 1
+    assert await page_information.get_screenshot() == "screenshot"
+    assert calls == 1
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_failed_deferred_screenshot_is_retried():
+    """A screenshot that failed should be taken again on the next read."""
+    attempts = 0
+
+    async def take_screenshot() -> str:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError("Page closed")
+        return "screenshot"
+
+    page_information = PageInformation(
+        url="https://example.com", raw_html="", time_since_frame_navigated=0
+    )
+    page_information.defer_screenshot(take_screenshot)
+
+    with pytest.raises(RuntimeError):
+        await page_information.get_screenshot()
+    assert await page_information.get_screenshot() == "screenshot"
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+from dendrite.logic.llm.agent import LLM, Agent
+from dendrite.logic.llm.response_cache import LLMResponseCache
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+class _StubLLM(LLM):
+    """Answers with the given texts in turn instead of calling a model."""
+
+    def __init__(self, texts):
+        super().__init__("gpt-4o", temperature=0)
+        self.texts = list(texts)
+        self.calls = 0
+
+    async def acall(self, messages, priority="interactive"):
+        text = self.texts[self.calls]
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=text))]
+        )
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_response_is_only_cached_once_accepted(tmp_path):
+    """A response the caller didn't accept should be asked again, an accepted one reused."""
+    cache = LLMResponseCache(tmp_path)
+    llm = _StubLLM(["malformed", "valid"])
+    messages = [{"role": "user", "content": "Hello"}]
+
+    agent = Agent(llm, response_cache=cache)
+    assert await agent.call_llm(messages) == "malformed"
+
+    agent = Agent(llm, response_cache=cache)
+    assert await agent.call_llm(messages) == "valid"
+    agent.cache_response()
+
+    agent = Agent(llm, response_cache=cache)
+    assert await agent.call_llm(messages) == "valid"
+    assert llm.calls == 2
+
+
+def test_responses_stored_by_another_process_are_read(tmp_path):
+    """A response stored after the cache was created, e.g. by another process, should be a hit."""
+    first, second = LLMResponseCache(tmp_path), LLMResponseCache(tmp_path)
+    key = first.key({"model": "gpt-4o", "messages": []})
+
+    first.set(key, "response")
+
+    assert second.get(key) == "response"
+    assert second.stats()["entries"] == 1
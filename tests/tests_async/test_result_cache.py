@@ -0,0 +1,30 @@
+from dendrite.logic.cache.result_cache import (
+    ResultCache,
+    cache_result,
+    get_cached_result,
+)
+from dendrite.models.dto.cached_result_dto import CachedResultDTO
+
+
+def test_ask_and_extract_results_are_cached_separately():
+    """The same prompt and schema on the same content should be cached once per operation."""
+    cache = ResultCache()
+    schema = {"type": "string"}
+
+    def dto(operation, return_data=None):
+        return CachedResultDTO(
+            url="https://example.com/",
+            operation=operation,
+            prompt="Get the title",
+            dom_fingerprint="fingerprint",
+            return_data_json_schema=schema,
+            return_data=return_data,
+        )
+
+    cache_result(dto("ask", "Answered title"), cache)
+    assert get_cached_result(dto("extract"), cache) is None
+    assert get_cached_result(dto("ask"), cache) == "Answered title"
+
+    cache_result(dto("extract", "Extracted title"), cache)
+    assert get_cached_result(dto("extract"), cache) == "Extracted title"
+    assert get_cached_result(dto("ask"), cache) == "Answered title"
@@ -0,0 +1,69 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import pytest
+
+from dendrite.logic.code.sandbox import ScriptSandbox, ScriptTimeoutError
+
+PAGE = "<html><body><h1>Title</h1><p>First</p><p>Second</p></body></html>"
+
+
+@pytest.fixture(scope="module")
+def sandbox():
+    # The workers are spawned, so they are shared by the tests of the module
+    sandbox = ScriptSandbox(workers=1, timeout=5, cpu_time_limit=1)
+    yield sandbox
+    sandbox.close()
+
+
+def test_script_runs_in_a_worker(sandbox):
+    """A script should run on the shared page and return its response data."""
+    with sandbox.share_page(PAGE) as page:
+        res = sandbox.run(
+            "response_data = [p.text for p in soup.find_all('p')]", page, None
+        )
+    assert res == ["First", "Second"]
+
+
+def test_generated_script_is_described(sandbox):
+    """A script of the extract agent should return its response data and a description of its variables."""
+    with sandbox.share_page(PAGE) as page:
+        res, description = sandbox.run_generated(
+            "title = soup.h1.text\nresponse_data = title",
+            page,
+            {"type": "string"},
+            "Get the title",
+            1,
+            3,
+        )
+    assert res == "Title"
+    assert "`title=Title`" in description
+
+
+def test_cpu_time_limit(sandbox):
+    """A script using more CPU time than allowed should fail and leave the worker usable."""
+    with sandbox.share_page(PAGE) as page:
+        with pytest.raises(Exception, match="CPU time limit"):
+            sandbox.run("while True:\n    pass", page, None)
+        assert sandbox.run("response_data = soup.h1.text", page, None) == "Title"
+
+
+def test_wall_timeout_replaces_the_worker(sandbox):
+    """A script running longer than the timeout should have its worker replaced by a working one."""
+    worker = sandbox._workers[0]
+    with sandbox.share_page(PAGE) as page:
+        with pytest.raises(ScriptTimeoutError):
+            sandbox.run("import time\ntime.sleep(30)", page, None)
+
+        assert not worker.process.is_alive()
+        assert sandbox._workers[0] is not worker
+        assert sandbox.run("response_data = soup.h1.text", page, None) == "Title"
+
+
+def test_shared_page_is_freed(sandbox):
+    """The shared memory of a page should be unlinked once it is closed."""
+    with sandbox.share_page(PAGE) as page:
+        name = page.name
+        sandbox.run("response_data = soup.h1.text", page, None)
+
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(name=name)
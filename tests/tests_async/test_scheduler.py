@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from dendrite.logic.llm import scheduler as scheduler_module
+from dendrite.logic.llm.scheduler import LLMScheduler
+
+pytest_plugins = ("pytest_asyncio",)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_queued_request_starts_when_token_window_frees_up(monkeypatch):
+    """A request waiting for a slot should start once the token budget frees up, even if nothing else happens."""
+    monkeypatch.setattr(scheduler_module, "TOKEN_WINDOW_SECONDS", 0.5)
+    scheduler = LLMScheduler(max_in_flight=1, tokens_per_minute=100)
+
+    first = await scheduler.acquire(60)
+    waiting = asyncio.ensure_future(scheduler.acquire(60))
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    # The slot frees up, but the token window is still full
+    scheduler.release(first, None)
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+
+    second = await asyncio.wait_for(waiting, timeout=3)
+    scheduler.release(second, None)
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_interactive_requests_start_before_background_ones():
+    """Waiting requests should be started by priority, then in order."""
+    scheduler = LLMScheduler(max_in_flight=1)
+    first = await scheduler.acquire(10)
+
+    order = []
+
+    async def request(name, priority):
+        reservation = await scheduler.acquire(10, priority)
+        order.append(name)
+        scheduler.release(reservation, None)
+
+    tasks = [
+        asyncio.ensure_future(request("background", "background")),
+        asyncio.ensure_future(request("interactive", "interactive")),
+    ]
+    await asyncio.sleep(0.05)
+    scheduler.release(first, None)
+    await asyncio.gather(*tasks)
+
+    assert order == ["interactive", "background"]
@@ -0,0 +1,35 @@
+from bs4 import BeautifulSoup
+
+from dendrite.logic.dom.selector_variants import get_selector_variants
+
+PAGE = """
+<html><body>
+  <div><button d-id="1">Main</button></div>
+  <html iframe-path="2"><body iframe-path="2">
+    <div iframe-path="2"><button d-id="3" iframe-path="2">Framed</button></div>
+  </body></html>
+  <section><p d-id="4">Only in the page</p></section>
+</body></html>
+"""
+
+
+def _xpath_selectors(soup: BeautifulSoup, d_id: str):
+    tag = soup.find(attrs={"d-id": d_id})
+    return [
+        variant.selector
+        for variant in get_selector_variants(tag, soup)
+        if variant.strategy == "xpath"
+    ]
+
+
+def test_xpath_variant_is_skipped_when_another_frame_has_the_same_path():
+    """A positional path matching in the page and in an iframe shouldn't be stored."""
+    soup = BeautifulSoup(PAGE, "html.parser")
+    assert _xpath_selectors(soup, "1") == []
+    assert _xpath_selectors(soup, "3") == []
+
+
+def test_xpath_variant_is_kept_when_unique_across_frames():
+    """A positional path only matching in one document should be stored."""
+    soup = BeautifulSoup(PAGE, "html.parser")
+    assert _xpath_selectors(soup, "4") == ["xpath=/html/body/section/p"]
@@ -1,4 +1,5 @@
 import pytest
+from pydantic import BaseModel
 
 from dendrite import AsyncDendrite
 
@@ -61,6 +62,52 @@ async def test_extract():
         await browser.close()
 
 
+@pytest.mark.asyncio
+async def test_extract_many():
+    """Test the extract_many method extracts from every URL and reports failures per URL."""
+    browser = AsyncDendrite()
+    try:
+        urls = ["https://example.com", "https://example.org", "invalid.invalid"]
+        results = {
+            result.url: result
+            async for result in browser.extract_many(
+                urls, "Get the page title", str, concurrency=2
+            )
+        }
+        assert set(results) == set(urls)
+        assert results["https://example.com"].data == "Example Domain"
+        assert results["https://example.org"].data == "Example Domain"
+        assert not results["invalid.invalid"].ok
+    finally:
+        await browser.close()
+
+
+class Team(BaseModel):
+    name: str
+    year: int
+
+
+@pytest.mark.asyncio
+async def test_extract_iter():
+    """Test the extract_iter method yields the items of several pages without duplicates."""
+    browser = AsyncDendrite()
+    try:
+        page = await browser.goto("https://www.scrapethissite.com/pages/forms/")
+        teams = [
+            team
+            async for team in page.extract_iter(
+                "Get the team names and years in the table",
+                Team,
+                next_page="The link to the next page of the table",
+                max_steps=2,
+            )
+        ]
+        assert len(teams) > 25
+        assert len({(team.name, team.year) for team in teams}) == len(teams)
+    finally:
+        await browser.close()
+
+
 @pytest.mark.asyncio
 async def test_wait_for():
     """Test the wait_for method waits for a specific condition."""